@@ -25,8 +25,8 @@ export class PartyIssuePreference {
 
   @Column({ type: 'jsonb', nullable: true })
   utilityCurve: {
-    type: 'linear' | 'concave' | 'convex';
-    parameters: Record<string, number>;
+    type: 'linear' | 'concave' | 'convex' | 'exponential' | 'logistic' | 'piecewise_linear' | 'step';
+    parameters: Record<string, number | number[][]>;
   };
 
   @Column({ type: 'jsonb', nullable: true })
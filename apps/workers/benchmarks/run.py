@@ -0,0 +1,188 @@
+"""Benchmark the negotiation worker tasks in-process.
+
+Tasks are called directly, so no broker or result backend is needed.
+Each case is timed over ``--iterations`` calls after ``--warmup`` untimed
+calls. Peak memory comes from a separate tracemalloc pass, so tracing does
+not skew the timings.
+
+    python -m benchmarks.run                      # run and compare with baseline.json
+    python -m benchmarks.run --update-baseline    # record new baselines
+    python -m benchmarks.run --profile large --out results.json
+
+The exit status is 1 when any case's p50 latency or peak memory regresses
+past its baseline by more than the allowed slack: ``--tolerance`` relative to
+the baseline, NOISE_FACTOR times the measured spread (p75 - p25), or the
+absolute floor, whichever is largest. p99 is reported but not gated, the
+sample is too small for a stable tail.
+"""
+from typing import Callable, Dict, Any, List, Optional
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import structlog
+
+from workers.tasks.bundle_optimizer import MAX_COMBINATIONS, optimize_bundles
+from workers.tasks.intake_normalizer import normalize_intake
+from workers.tasks.mediator_agent import consolidate_final_package
+from workers.tasks.offer_proposer import propose_offer
+from workers.tasks.risk_engine import build_risk_tree
+from workers.tasks.zopa_checker import check_zopa
+
+from .scenarios import make_scenario, offers_for
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+PROFILES = {
+    'small': {'parties': 3, 'issues': 4, 'scenarios': 3, 'history': 10},
+    'large': {'parties': 8, 'issues': 8, 'scenarios': 50, 'history': 50},
+}
+
+# Latency differences below this many milliseconds are treated as noise when comparing
+MIN_SLACK_MS = 0.5
+# Allowed slowdown in multiples of the larger interquartile spread of baseline and run
+NOISE_FACTOR = 3.0
+# Peak memory differences below this many KB are treated as noise
+MIN_SLACK_KB = 4.0
+
+Case = Callable[[], Any]
+
+
+def build_cases(scenario: Dict[str, Any]) -> Dict[str, Case]:
+    """One zero-argument callable per benchmarked task."""
+    issues, parties = scenario['issues'], scenario['parties']
+    party, issue = parties[0], issues[0]
+    pref = scenario['preferences'][party['id']][issue['id']]
+    history = offers_for(scenario, party['id'], issue['id'])
+    intake = {
+        'id': scenario['negotiation']['id'],
+        'title': scenario['negotiation']['title'],
+        'parties': parties,
+        'issues': issues,
+        'preferences': scenario['preferences'],
+    }
+    # The optimizer streams the whole grid by default; benchmark a fixed-size slice of it
+    optimization = optimize_bundles(issues, scenario['utilities'], use_cache=False, max_combinations=MAX_COMBINATIONS)
+    risk = build_risk_tree(issues, scenario['scenarios'])
+
+    return {
+        'optimize_bundles': lambda: optimize_bundles(issues, scenario['utilities'], use_cache=False,
+                                                     max_combinations=MAX_COMBINATIONS),
+        'check_zopa': lambda: check_zopa(issues, scenario['reservations'], scenario['targets']),
+        'build_risk_tree': lambda: build_risk_tree(issues, scenario['scenarios']),
+        'normalize_intake': lambda: normalize_intake(intake),
+        'propose_offer': lambda: propose_offer(
+            party, issue,
+            {'weight': pref['weight'], 'reservation_value': pref['reservationValue'],
+             'target_value': pref['targetValue'], 'current_value': history[-1]['proposed_value'] if history else 50},
+            len(history) + 1, history),
+        'consolidate_final_package': lambda: consolidate_final_package(
+            scenario['negotiation'], parties, issues, {}, scenario['offers'], optimization, risk),
+    }
+
+
+def measure(case: Case, iterations: int, warmup: int = 5) -> Dict[str, float]:
+    """Latency percentiles, throughput and peak traced memory of one case."""
+    for _ in range(warmup):
+        case()
+    latencies = np.empty(iterations)
+    started = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        case()
+        latencies[i] = time.perf_counter() - t0
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    case()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'throughput_per_s': iterations / elapsed if elapsed > 0 else float('inf'),
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'spread_ms': float((np.percentile(latencies, 75) - np.percentile(latencies, 25)) * 1000),
+        'p99_ms': float(np.percentile(latencies, 99) * 1000),
+        'peak_kb': peak / 1024,
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float) -> List[str]:
+    """Human-readable regressions of ``results`` against ``baseline``.
+
+    Only p50 latency and peak memory are gated; p99 over a few dozen calls is
+    a single sample and flaps on identical code.
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        noise = NOISE_FACTOR * max(base.get('spread_ms', 0.0), current.get('spread_ms', 0.0))
+        for metric, floor in (('p50_ms', max(MIN_SLACK_MS, noise)), ('peak_kb', MIN_SLACK_KB)):
+            limit = base[metric] + max(base[metric] * tolerance, floor)
+            if current[metric] > limit:
+                regressions.append(f"{name}: {metric} {current[metric]:.3f} > {limit:.3f} (baseline {base[metric]:.3f})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='small')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=5, help='untimed calls before each case')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='*', help='benchmark only these tasks')
+    parser.add_argument('--out', help='write results JSON here')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed relative slowdown, 0.5 = 50%%')
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args(argv)
+
+    # Task logging would dominate the timings of the small tasks
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.ERROR))
+
+    scenario = make_scenario(seed=args.seed, **PROFILES[args.profile])
+    cases = build_cases(scenario)
+    if args.only:
+        cases = {name: case for name, case in cases.items() if name in args.only}
+
+    results = {}
+    for name, case in cases.items():
+        results[name] = measure(case, args.iterations, args.warmup)
+        r = results[name]
+        print(f"{name:28s} p50 {r['p50_ms']:9.3f} ms  p99 {r['p99_ms']:9.3f} ms  "
+              f"{r['throughput_per_s']:10.1f}/s  peak {r['peak_kb']:9.1f} KB")
+
+    report = {'profile': args.profile, 'params': PROFILES[args.profile], 'seed': args.seed, 'results': results}
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+    if args.update_baseline:
+        baselines[args.profile] = {**baselines.get(args.profile, {}), **results}
+        with open(args.baseline, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    regressions = compare(results, baselines.get(args.profile, {}), args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Synthetic negotiation scenarios for the worker benchmarks.
+
+Every generator is seeded, so a given (parties, issues, scenarios, history,
+seed) tuple always produces the same inputs and benchmark runs compare like
+with like.
+"""
+from typing import Dict, Any, List
+import random
+
+
+def make_scenario(parties: int = 3, issues: int = 4, scenarios: int = 3, history: int = 10,
+                  seed: int = 0) -> Dict[str, Any]:
+    """Build task inputs for one synthetic negotiation.
+
+    parties, issues: negotiation size
+    scenarios: risk scenarios for build_risk_tree
+    history: previous offers per party and issue for propose_offer
+    """
+    rng = random.Random(seed)
+    party_list = [{
+        'id': f'party_{p}',
+        'name': f'Party {p + 1}',
+        'type': rng.choice(['country', 'organization']),
+        'country': f'C{p}',
+    } for p in range(parties)]
+
+    issue_list = []
+    for i in range(issues):
+        lo = float(rng.randint(0, 50))
+        issue_list.append({
+            'id': f'issue_{i}',
+            'title': f'Issue {i + 1}',
+            'type': rng.choice(['distributive', 'integrative']),
+            'weight': round(rng.random(), 3),
+            'minValue': lo,
+            'maxValue': lo + float(rng.randint(10, 100)),
+        })
+
+    utilities: Dict[str, Dict[str, float]] = {}
+    reservations: Dict[str, Dict[str, float]] = {}
+    targets: Dict[str, Dict[str, float]] = {}
+    preferences: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for party in party_list:
+        pid = party['id']
+        utilities[pid], reservations[pid], targets[pid], preferences[pid] = {}, {}, {}, {}
+        for issue in issue_list:
+            iid, lo, hi = issue['id'], issue['minValue'], issue['maxValue']
+            # Parties pull in opposite directions on roughly half the issues
+            sign = rng.choice([1.0, -1.0])
+            weight = round(rng.random(), 3)
+            reservation = lo + (hi - lo) * rng.uniform(0.2, 0.5)
+            target = lo + (hi - lo) * rng.uniform(0.6, 0.95)
+            if sign < 0:
+                reservation, target = hi - (reservation - lo), hi - (target - lo)
+            utilities[pid][iid] = sign * weight
+            reservations[pid][iid] = reservation
+            targets[pid][iid] = target
+            preferences[pid][iid] = {'weight': weight, 'reservationValue': reservation, 'targetValue': target}
+
+    risk_scenarios = []
+    for s in range(scenarios):
+        risk_scenarios.append({
+            'name': f'scenario_{s}',
+            'probability': rng.random(),
+            'impacts': {issue['id']: rng.uniform(-1.0, 1.0) for issue in issue_list},
+        })
+
+    offers = []
+    for party in party_list:
+        for issue in issue_list:
+            value = targets[party['id']][issue['id']]
+            for r in range(history):
+                value += (reservations[party['id']][issue['id']] - value) * rng.uniform(0.05, 0.3)
+                offers.append({
+                    'party_id': party['id'],
+                    'party_name': party['name'],
+                    'issue_id': issue['id'],
+                    'round_number': r + 1,
+                    'proposed_value': value,
+                    'confidence': rng.random(),
+                })
+
+    return {
+        'negotiation': {'id': f'neg_{seed}', 'title': f'Synthetic negotiation {seed}'},
+        'parties': party_list,
+        'issues': issue_list,
+        'utilities': utilities,
+        'reservations': reservations,
+        'targets': targets,
+        'preferences': preferences,
+        'scenarios': risk_scenarios,
+        'offers': offers,
+    }
+
+
+def offers_for(scenario: Dict[str, Any], party_id: str, issue_id: str) -> List[Dict[str, Any]]:
+    """Offer history of one party on one issue, in round order."""
+    return [o for o in scenario['offers'] if o['party_id'] == party_id and o['issue_id'] == issue_id]
@@ -0,0 +1,155 @@
+"""Shared fixtures for the worker tests.
+
+Run from apps/workers: python -m pytest -q
+"""
+import os
+import sys
+
+import pytest
+from redis.exceptions import WatchError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis.Redis calls the workers make."""
+
+    def __init__(self):
+        self.data = {}
+        self.reads = 0
+        self.messages = []
+        # Write count per key, for WATCH
+        self.versions = {}
+
+    def _touch(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self._touch(key)
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    def delete(self, *keys):
+        for key in keys:
+            self._touch(key)
+            self.data.pop(key, None)
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def expire(self, key, ttl):
+        pass
+
+    def hmget(self, key, fields):
+        self.reads += len(fields)
+        table = self.data.get(key, {})
+        return [table.get(field) for field in fields]
+
+    def hset(self, key, mapping):
+        self._touch(key)
+        self.data.setdefault(key, {}).update(
+            {field: value.encode() if isinstance(value, str) else value for field, value in mapping.items()})
+
+    def hdel(self, key, *fields):
+        self._touch(key)
+        for field in fields:
+            self.data.get(key, {}).pop(field, None)
+
+    def hkeys(self, key):
+        return list(self.data.get(key, {}))
+
+    def hgetall(self, key):
+        table = self.data.get(key, {})
+        self.reads += len(table)
+        return dict(table)
+
+    def sadd(self, key, *members):
+        self._touch(key)
+        self.data.setdefault(key, set()).update(members)
+
+    def srem(self, key, *members):
+        self._touch(key)
+        self.data.setdefault(key, set()).difference_update(members)
+
+    def scard(self, key):
+        return len(self.data.get(key, set()))
+
+    def sismember(self, key, member):
+        return int(member in self.data.get(key, set()))
+
+    def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    def zadd(self, key, mapping):
+        self._touch(key)
+        self.data.setdefault(key, {}).update({member: float(score) for member, score in mapping.items()})
+
+    def zrem(self, key, *members):
+        self._touch(key)
+        for member in members:
+            self.data.get(key, {}).pop(member, None)
+
+    def zrange(self, key, start, end, desc=False, withscores=False):
+        ranked = sorted(self.data.get(key, {}).items(), key=lambda item: (item[1], item[0]), reverse=desc)
+        found = ranked[start:None if end == -1 else end + 1]
+        self.reads += len(found)
+        return [(member.encode(), score) if withscores else member.encode() for member, score in found]
+
+    def publish(self, channel, message):
+        self.messages.append((channel, message))
+        return 0
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Buffers commands until execute(); after watch() commands run at once until multi()."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.queue = []
+        self.watched = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.reset()
+
+    def reset(self):
+        self.queue = []
+        self.watched = None
+
+    def watch(self, *keys):
+        self.watched = {**(self.watched or {}), **{key: self.redis.versions.get(key, 0) for key in keys}}
+        self.queue = None
+
+    def multi(self):
+        self.queue = []
+
+    def execute(self):
+        try:
+            if self.watched and any(self.redis.versions.get(key, 0) != version
+                                    for key, version in self.watched.items()):
+                raise WatchError("Watched variable changed.")
+            return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.queue or []]
+        finally:
+            self.reset()
+
+    def __getattr__(self, name):
+        command = getattr(self.redis, name)
+        if self.queue is None:
+            return command
+
+        def queued(*args, **kwargs):
+            self.queue.append((name, args, kwargs))
+            return self
+        return queued
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
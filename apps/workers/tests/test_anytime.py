@@ -0,0 +1,42 @@
+"""Anytime optimization under a deadline."""
+import json
+
+import redis
+
+from workers.tasks.bundle_optimizer import optimize_bundles
+
+ISSUES = [{'id': f'i{i}', 'minValue': 0, 'maxValue': 10} for i in range(3)]
+UTILITIES = {'a': {'i0': 0.6, 'i1': 0.3, 'i2': 0.1}, 'b': {'i0': -0.4, 'i1': 0.2, 'i2': 0.4}}
+
+
+def test_generous_deadline_matches_the_full_run():
+    full = optimize_bundles(ISSUES, UTILITIES, grid_resolution=6, use_cache=False)
+    anytime = optimize_bundles(ISSUES, UTILITIES, grid_resolution=6, use_cache=False, deadline_ms=60_000)
+    assert anytime['stopped_early'] is None
+    assert anytime['combinations_evaluated'] == full['combinations_evaluated'] == 6 ** 3
+    assert anytime['best'] == full['best']
+
+
+def test_expired_deadline_returns_the_best_so_far():
+    full = optimize_bundles(ISSUES, UTILITIES, grid_resolution=6, use_cache=False)
+    partial = optimize_bundles(ISSUES, UTILITIES, grid_resolution=6, use_cache=False, deadline_ms=0, chunk_size=50)
+    assert partial['status'] == 'success'
+    assert partial['stopped_early'] == 'deadline'
+    assert partial['combinations_evaluated'] == 50
+    assert partial['best']['score'] <= full['best']['score']
+
+
+def test_snapshots_and_cancellation_go_through_the_channel(monkeypatch, fake_redis):
+    monkeypatch.setattr(redis.Redis, 'from_url', lambda url: fake_redis)
+    result = optimize_bundles(ISSUES, UTILITIES, grid_resolution=6, use_cache=False, deadline_ms=60_000,
+                              negotiation_id='n1')
+    assert result['snapshots_published'] == len(fake_redis.messages) >= 1
+    channel, final = fake_redis.messages[-1]
+    assert channel == 'neg:n1:opt'
+    assert json.loads(final)['type'] == 'final'
+
+    fake_redis.set('neg:n1:opt:cancel', '1')
+    cancelled = optimize_bundles(ISSUES, UTILITIES, grid_resolution=6, use_cache=False, deadline_ms=60_000,
+                                 negotiation_id='n1', chunk_size=50)
+    assert cancelled['stopped_early'] == 'cancelled'
+    assert cancelled['combinations_evaluated'] == 50
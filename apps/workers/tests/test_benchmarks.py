@@ -0,0 +1,30 @@
+"""Regression gate of the benchmark harness."""
+from benchmarks.run import MIN_SLACK_MS, NOISE_FACTOR, compare
+
+BASE = {'case': {'p50_ms': 0.2, 'p99_ms': 0.4, 'spread_ms': 0.01, 'peak_kb': 100.0}}
+
+
+def run(**changes):
+    return {'case': {**BASE['case'], **changes}}
+
+
+def test_sub_floor_jitter_and_p99_do_not_gate():
+    assert compare(run(p50_ms=0.2 + MIN_SLACK_MS * 0.9), BASE, 0.5) == []
+    assert compare(run(p99_ms=40.0), BASE, 0.5) == []
+    assert compare(run(peak_kb=102.0), BASE, 0.5) == []
+
+
+def test_slowdowns_past_the_slack_gate():
+    assert len(compare(run(p50_ms=0.2 + MIN_SLACK_MS * 1.1), BASE, 0.5)) == 1
+    assert len(compare(run(peak_kb=200.0), BASE, 0.5)) == 1
+    base = {'case': {**BASE['case'], 'p50_ms': 100.0}}
+    assert compare({'case': {**base['case'], 'p50_ms': 140.0}}, base, 0.5) == []
+    assert len(compare({'case': {**base['case'], 'p50_ms': 160.0}}, base, 0.5)) == 1
+
+
+def test_slack_scales_with_measured_spread():
+    base = {'case': {**BASE['case'], 'p50_ms': 10.0, 'spread_ms': 4.0}}
+    noisy = {'case': {**base['case'], 'p50_ms': 10.0 + NOISE_FACTOR * 4.0 * 0.9}}
+    assert compare(noisy, base, 0.5) == []
+    assert compare(noisy, {'case': {**base['case'], 'spread_ms': 0.1}}, 0.5) == []
+    assert len(compare({'case': {**noisy['case'], 'spread_ms': 0.1}}, {'case': {**base['case'], 'spread_ms': 0.1}}, 0.5)) == 1
@@ -0,0 +1,49 @@
+"""Branch-and-bound best bundle against brute-force enumeration."""
+from itertools import product
+
+import numpy as np
+import pytest
+
+from workers.engine.branch_bound import branch_and_bound
+from workers.engine.utility import UtilityEngine, aggregate_scores
+from workers.tasks.bundle_optimizer import optimize_bundles
+
+
+def make_problem(n_issues, n_parties, seed):
+    rng = np.random.default_rng(seed)
+    issues = [{'id': f'i{i}', 'minValue': 0, 'maxValue': float(rng.integers(10, 100))} for i in range(n_issues)]
+    utilities = {f'p{p}': {issue['id']: float(rng.random()) for issue in issues} for p in range(n_parties)}
+    return issues, utilities
+
+
+def brute_force_scores(issues, utilities, method, resolution):
+    engine = UtilityEngine(issues, utilities)
+    combos = np.array(list(product(*engine.grids(resolution))), dtype=float)
+    return aggregate_scores(engine.party_utilities(combos), method)
+
+
+@pytest.mark.parametrize('method', ['nash', 'wsw'])
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_branch_and_bound_finds_the_brute_force_best(method, seed):
+    issues, utilities = make_problem(4, 3, seed)
+    scores = brute_force_scores(issues, utilities, method, 6)
+    engine = UtilityEngine(issues, utilities)
+    best, stats = branch_and_bound(engine, engine.grids(6), method)
+    assert stats['exact']
+    assert best.score == pytest.approx(scores.max())
+    assert stats['leaves'] < len(scores)
+
+    result = optimize_bundles(issues, utilities, method=method, grid_resolution=6, search='branch_and_bound',
+                              use_cache=False)
+    assert result['exact']
+    assert result['best']['score'] == pytest.approx(scores.max())
+
+
+def test_node_budget_returns_the_incumbent():
+    issues, utilities = make_problem(5, 3, seed=3)
+    scores = brute_force_scores(issues, utilities, 'nash', 5)
+    result = optimize_bundles(issues, utilities, grid_resolution=5, search='branch_and_bound', max_nodes=3,
+                              use_cache=False)
+    assert result['status'] == 'success'
+    assert not result['exact'] and result['truncated']
+    assert result['best']['score'] <= scores.max() + 1e-12
@@ -0,0 +1,72 @@
+"""Byte-budgeted LRU, read-only cached arrays and cached optimization."""
+import json
+
+import pytest
+
+from workers.engine.cache import BundleCache, LRUCache
+from workers.engine.utility import UtilityEngine
+from workers.tasks.bundle_optimizer import get_bundle_cache, optimize_bundles
+
+
+def test_lru_evicts_by_size():
+    cache = LRUCache(max_entries=10, max_bytes=100)
+    cache.set('a', 1, 60)
+    cache.set('b', 2, 30)
+    cache.get('a')
+    cache.set('c', 3, 30)
+    assert cache.get('b') is None
+    assert cache.nbytes == 90
+
+    cache.set('huge', 4, 200)
+    assert cache.get('huge') is None
+    assert cache.nbytes == 90
+
+    cache.set('a', 5, 10)
+    assert cache.nbytes == 40
+
+
+def test_cached_arrays_are_read_only():
+    issues = [{'id': 'x', 'minValue': 0, 'maxValue': 10}, {'id': 'y', 'minValue': 0, 'maxValue': 1}]
+    engine = UtilityEngine(issues, {'a': {'x': 1.0, 'y': 0.5}})
+    cache = BundleCache(max_bytes=1024 * 1024)
+    grids = engine.grids(5)
+    _, combos, normalized = cache.grid(engine, grids, 25)
+    _, again, _ = cache.grid(engine, grids, 25)
+    assert again is combos
+    with pytest.raises(ValueError):
+        again[0, 0] = 1.0
+    assert cache.local.nbytes == combos.nbytes + normalized.nbytes
+
+
+def test_results_count_against_the_budget():
+    cache = BundleCache(max_bytes=10_000)
+    result = {'status': 'success', 'pareto': [{'values': {'x': float(i)}} for i in range(50)]}
+    cache.set_result('r1', result)
+    assert cache.local.nbytes == len(json.dumps(result))
+
+    big = {'pareto': [{'values': {'x': float(i)}} for i in range(2000)]}
+    cache.set_result('r2', big)
+    assert cache.get_result('r2') is None
+    assert cache.get_result('r1') == result
+
+    for i in range(20):
+        cache.set_result(f'more{i}', result)
+    assert cache.local.nbytes <= 10_000
+    assert cache.get_result('r1') is None
+
+
+def test_cached_optimization_matches_uncached():
+    issues = [{'id': f'i{i}', 'minValue': 0, 'maxValue': 10} for i in range(3)]
+    utilities = {'a': {'i0': 0.5, 'i1': 0.2, 'i2': 0.3}, 'b': {'i0': 0.1, 'i1': 0.6, 'i2': 0.3}}
+    uncached = optimize_bundles(issues, utilities, grid_resolution=5, use_cache=False)
+    for _ in range(2):
+        cached = optimize_bundles(issues, utilities, grid_resolution=5)
+        assert cached['best'] == uncached['best']
+        assert cached['pareto'] == uncached['pareto']
+
+    # A weight change re-scores only that party's column
+    cache = get_bundle_cache()
+    misses = cache.misses
+    changed = dict(utilities, b={'i0': 0.2, 'i1': 0.5, 'i2': 0.3})
+    assert optimize_bundles(issues, changed, grid_resolution=5)['status'] == 'success'
+    assert cache.misses - misses == 2  # the result and party b's column
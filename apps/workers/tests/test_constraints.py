@@ -0,0 +1,56 @@
+"""Constraint pruning before bundle enumeration."""
+from itertools import product
+
+import numpy as np
+import pytest
+
+from workers.engine.constraints import Interval, feasible_intervals, parse_constraint
+from workers.engine.utility import UtilityEngine, aggregate_scores
+from workers.tasks.bundle_optimizer import optimize_bundles
+
+ISSUES = [{'id': 'price', 'minValue': 0, 'maxValue': 100, 'constraints': {'redLines': ['<= 80']}},
+          {'id': 'term', 'minValue': 0, 'maxValue': 10},
+          {'id': 'units', 'minValue': 0, 'maxValue': 50}]
+UTILITIES = {'a': {'price': 0.7, 'term': 0.2, 'units': 0.1}, 'b': {'price': -0.5, 'term': 0.3, 'units': 0.2}}
+PREFERENCES = [
+    {'partyId': 'a', 'issueId': 'price', 'reservationValue': 30, 'targetValue': 90},
+    {'partyId': 'b', 'issueId': 'term', 'constraints': {'mustHaves': ['2-8', 'a long enough term']}},
+    {'partyId': 'b', 'issueId': 'units', 'reservationValue': 40, 'targetValue': 10},
+]
+
+
+@pytest.mark.parametrize('entry, inside, outside', [
+    ('<= 30', [30, -5], [30.5]), ('< 30', [29.9], [30]), ('>= 10', [10], [9.9]), ('> 10', [10.1], [10]),
+    ('== 5', [5], [4, 6]), ('10-20', [10, 20], [21]), ('10..20', [15], [9]),
+    ({'min': 10}, [10, 1e9], [9]), ({'op': '<', 'value': 3}, [2], [3]),
+])
+def test_parse_constraint(entry, inside, outside):
+    interval = parse_constraint(entry)
+    assert interval.contains(inside).all()
+    assert not interval.contains(outside).any()
+
+
+def test_free_text_is_counted_not_applied():
+    assert parse_constraint('as soon as possible') is None
+    intervals, unparsed = feasible_intervals(ISSUES, PREFERENCES)
+    assert unparsed == 1
+    assert intervals == [Interval(30, 80), Interval(2, 8), Interval(hi=40)]
+
+
+def test_pruned_search_matches_filtering_the_full_grid():
+    result = optimize_bundles(ISSUES, UTILITIES, grid_resolution=11, preferences=PREFERENCES, use_cache=False)
+    engine = UtilityEngine(ISSUES, UTILITIES)
+    combos = np.array(list(product(*engine.grids(11))))
+    feasible = (combos[:, 0] >= 30) & (combos[:, 0] <= 80) & (combos[:, 1] >= 2) & (combos[:, 1] <= 8) \
+        & (combos[:, 2] <= 40)
+    scores = aggregate_scores(engine.party_utilities(combos[feasible]), 'nash')
+
+    assert result['combinations_total'] == result['combinations_evaluated'] == int(feasible.sum())
+    assert result['combinations_pruned'] == len(combos) - int(feasible.sum())
+    assert result['best']['score'] == pytest.approx(scores.max())
+    values = np.array([list(point['values'].values()) for point in result['pareto']])
+    assert ((values[:, 0] >= 30) & (values[:, 0] <= 80) & (values[:, 2] <= 40)).all()
+
+    unpruned = optimize_bundles(ISSUES, UTILITIES, grid_resolution=11, preferences=PREFERENCES, prune=False,
+                                use_cache=False)
+    assert unpruned['combinations_total'] == len(combos)
@@ -0,0 +1,42 @@
+"""Continuous bargaining solutions against a fine grid over the same box."""
+from itertools import product
+
+import numpy as np
+import pytest
+
+from workers.engine.continuous import continuous_score, solve_continuous
+from workers.engine.utility import UtilityEngine
+from workers.tasks.bundle_optimizer import optimize_bundles
+
+ISSUES = [{'id': 'x', 'minValue': 0, 'maxValue': 10}, {'id': 'y', 'minValue': 100, 'maxValue': 200},
+          {'id': 'z', 'minValue': 1, 'maxValue': 1}]
+UTILITIES = {'a': {'x': 0.8, 'y': -0.2}, 'b': {'x': -0.3, 'y': 0.7}, 'c': {'x': 0.4, 'y': 0.4}}
+
+
+@pytest.mark.parametrize('objective', ['nash', 'kalai', 'wsw'])
+def test_continuous_optimum_beats_a_fine_grid(objective):
+    engine = UtilityEngine(ISSUES, UTILITIES)
+    solved = solve_continuous(engine, objective, starts=8, seed=0)
+    assert solved['success']
+    assert np.all(solved['values'] >= engine.lo) and np.all(solved['values'] <= engine.hi)
+
+    combos = np.array(list(product(*engine.grids([41, 41, 1]))))
+    utils = engine.party_utilities(combos)
+    active = engine.weights[engine.active]
+    grid_best = max(continuous_score(u, active, objective) for u in utils)
+    assert solved['score'] >= grid_best - 1e-6
+
+
+def test_continuous_mode_reports_every_objective():
+    result = optimize_bundles(ISSUES, UTILITIES, method='continuous', objective='kalai')
+    assert result['status'] == 'success'
+    assert set(result['solutions']) == {'nash', 'kalai', 'wsw'}
+    assert result['best'] == result['solutions']['kalai']
+    assert result['best']['values']['z'] == 1
+
+
+def test_continuous_mode_rejects_non_linear_curves():
+    preferences = [{'partyId': 'a', 'issueId': 'x', 'utilityCurve': {'type': 'exponential', 'parameters': {'k': 2}}}]
+    result = optimize_bundles(ISSUES, UTILITIES, method='continuous', preferences=preferences)
+    assert result['status'] == 'failed'
+    assert 'linear' in result['error']
@@ -0,0 +1,95 @@
+"""Non-linear utility curves against closed forms and a per-bundle scalar loop."""
+from itertools import product
+import math
+
+import numpy as np
+import pytest
+
+from workers.engine.curves import compile_curve, curves_from_preferences
+from workers.engine.utility import UtilityEngine, aggregate_scores
+from workers.tasks.bundle_optimizer import optimize_bundles
+
+X = np.linspace(0.0, 1.0, 21)
+
+
+def exponential(k):
+    return lambda x: (1 - math.exp(-k * x)) / (1 - math.exp(-k))
+
+
+def logistic(steepness, midpoint):
+    s = lambda x: 1 / (1 + math.exp(-steepness * (x - midpoint)))
+    return lambda x: (s(x) - s(0)) / (s(1) - s(0))
+
+
+def step(edges, levels, base):
+    return lambda x: ([base] + [u for e, u in zip(edges, levels) if x >= e])[-1]
+
+
+@pytest.mark.parametrize('spec, expected', [
+    ({'type': 'exponential', 'parameters': {'k': 2}}, exponential(2)),
+    ({'type': 'exponential', 'parameters': {'k': -1.5}}, exponential(-1.5)),
+    ({'type': 'exponential'}, exponential(3)),
+    ({'type': 'concave', 'parameters': {'k': -4}}, exponential(4)),
+    ({'type': 'convex', 'parameters': {'k': 4}}, exponential(-4)),
+    ({'type': 'logistic', 'parameters': {'steepness': 8, 'midpoint': 0.3}}, logistic(8, 0.3)),
+    ({'type': 'piecewise_linear', 'parameters': {'points': [[0.5, 0.9], [0.2, 0.1]]}},
+     lambda x: 0.1 if x <= 0.2 else 0.9 if x >= 0.5 else 0.1 + (x - 0.2) / 0.3 * 0.8),
+    ({'type': 'piecewise_linear', 'parameters': {'x1': 0, 'u1': 0, 'x2': 1, 'u2': 0.5}}, lambda x: 0.5 * x),
+    ({'type': 'step', 'parameters': {'steps': [[0.25, 0.4], [0.75, 1.0]], 'base': 0.1}},
+     step([0.25, 0.75], [0.4, 1.0], 0.1)),
+    ({'type': 'step', 'parameters': {'threshold': 0.6, 'low': 0.2, 'high': 0.8}}, step([0.6], [0.8], 0.2)),
+])
+def test_curves_match_closed_forms(spec, expected):
+    curve = compile_curve(spec)
+    assert curve(X) == pytest.approx([expected(x) for x in X])
+
+
+def test_linear_and_flat_curves_compile_away():
+    assert compile_curve(None) is None
+    assert compile_curve({'type': 'linear'}) is None
+    assert compile_curve({'type': 'exponential', 'parameters': {'k': 0}}) is None
+    with pytest.raises(ValueError):
+        compile_curve({'type': 'cubic'})
+
+
+ISSUES = [{'id': 'price', 'minValue': 10, 'maxValue': 50}, {'id': 'term', 'minValue': 0, 'maxValue': 12},
+          {'id': 'units', 'minValue': 0, 'maxValue': 100}]
+UTILITIES = {'a': {'price': 0.6, 'term': 0.3, 'units': 0.1}, 'b': {'price': -0.5, 'term': 0.4, 'units': 0.6}}
+PREFERENCES = [
+    {'partyId': 'a', 'issueId': 'price', 'utilityCurve': {'type': 'exponential', 'parameters': {'k': 2}}},
+    {'partyId': 'b', 'issueId': 'price', 'utilityCurve': {'type': 'exponential', 'parameters': {'k': 2}}},
+    {'partyId': 'b', 'issueId': 'units', 'utilityCurve': {'type': 'step', 'parameters': {'threshold': 0.5}}},
+    {'partyId': 'a', 'issueId': 'term', 'utilityCurve': {'type': 'linear'}},
+]
+
+
+def scalar_utility(party, values):
+    """One party's utility of one bundle, curves applied issue by issue."""
+    weights = UTILITIES[party]
+    specs = curves_from_preferences(PREFERENCES).get(party, {})
+    total = sum(max(w, 0.0) for w in weights.values())
+    utility = 0.0
+    for issue in ISSUES:
+        x = (values[issue['id']] - issue['minValue']) / (issue['maxValue'] - issue['minValue'])
+        curve = compile_curve(specs.get(issue['id']))
+        utility += weights[issue['id']] * (float(curve(np.array([x]))[0]) if curve else x)
+    return utility / total
+
+
+def test_engine_applies_curves_like_the_scalar_loop():
+    assert curves_from_preferences(PREFERENCES) == {
+        'a': {'price': PREFERENCES[0]['utilityCurve']},
+        'b': {'price': PREFERENCES[1]['utilityCurve'], 'units': PREFERENCES[2]['utilityCurve']}}
+    engine = UtilityEngine(ISSUES, UTILITIES, curves=curves_from_preferences(PREFERENCES))
+    assert not engine.is_linear
+    assert len(engine.curve_groups) == 2  # the shared price curve is evaluated once for both parties
+    combos = np.array(list(product(*engine.grids(5))))
+    utils = engine.party_utilities(combos)
+    for combo, row in zip(combos, utils):
+        values = dict(zip(engine.issue_ids, combo))
+        assert row == pytest.approx([scalar_utility(party, values) for party in engine.party_ids])
+    for p in range(engine.n_parties):
+        assert engine.normalized_utilities(engine.normalize(combos), party=p) == pytest.approx(utils[:, p])
+
+    result = optimize_bundles(ISSUES, UTILITIES, grid_resolution=5, preferences=PREFERENCES, use_cache=False)
+    assert result['best']['score'] == pytest.approx(aggregate_scores(utils, 'nash').max())
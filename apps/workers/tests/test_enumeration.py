@@ -0,0 +1,75 @@
+"""Streaming grid enumeration and uncapped optimization."""
+from itertools import product
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from workers.engine.enumeration import grid_size, iter_combination_chunks, resolve_resolutions
+from workers.engine.frontier import pareto_indices
+from workers.engine.utility import UtilityEngine, aggregate_scores
+from workers.tasks.bundle_optimizer import optimize_bundles
+
+
+def make_problem(n_issues, n_parties, seed):
+    rng = np.random.default_rng(seed)
+    issues = [{'id': f'i{i}', 'minValue': 0, 'maxValue': float(rng.integers(10, 100))} for i in range(n_issues)]
+    utilities = {f'p{p}': {issue['id']: float(rng.random()) for issue in issues} for p in range(n_parties)}
+    return issues, utilities
+
+
+def test_chunks_follow_product_order():
+    grids = [np.arange(3.0), np.arange(4.0) * 10, np.arange(2.0) * 100]
+    chunks = list(iter_combination_chunks(grids, chunk_size=5))
+    assert [offset for offset, _ in chunks] == list(range(0, 24, 5))
+    np.testing.assert_array_equal(np.vstack([combos for _, combos in chunks]), np.array(list(product(*grids))))
+
+    sliced = np.vstack([combos for _, combos in iter_combination_chunks(grids, chunk_size=4, start=7, stop=19)])
+    np.testing.assert_array_equal(sliced, np.array(list(product(*grids)))[7:19])
+
+
+def test_resolutions_per_issue():
+    issues = [{'id': 'a'}, {'id': 'b'}]
+    assert resolve_resolutions(issues, 5) == [5, 5]
+    assert resolve_resolutions(issues, {'a': 3}) == [3, 11]
+    with pytest.raises(ValueError):
+        resolve_resolutions(issues, {'b': 0})
+
+
+@pytest.mark.parametrize('method', ['nash', 'kalai', 'wsw'])
+def test_default_run_covers_the_whole_grid(method):
+    issues, utilities = make_problem(4, 3, seed=1)
+    engine = UtilityEngine(issues, utilities)
+    combos = np.array(list(product(*engine.grids(6))), dtype=float)
+    utils = engine.party_utilities(combos)
+    scores = aggregate_scores(utils, method)
+
+    result = optimize_bundles(issues, utilities, method=method, grid_resolution=6, use_cache=False,
+                              max_points=10_000, chunk_size=97)
+    assert result['status'] == 'success'
+    assert result['combinations_evaluated'] == result['combinations_total'] == len(combos)
+    assert not result['truncated']
+    assert result['best']['score'] == pytest.approx(scores.max())
+    expected = sorted(tuple(np.round(combo, 9)) for combo in combos[pareto_indices(utils)])
+    assert sorted(tuple(np.round(list(p['values'].values()), 9)) for p in result['pareto']) == expected
+
+
+def test_cap_is_opt_in_and_reported():
+    issues, utilities = make_problem(4, 2, seed=2)
+    capped = optimize_bundles(issues, utilities, grid_resolution=6, max_combinations=100, use_cache=False)
+    assert capped['combinations_evaluated'] == 100
+    assert capped['truncated']
+
+
+def test_memory_stays_flat_as_the_grid_grows():
+    issues, utilities = make_problem(6, 2, seed=3)
+    peaks = []
+    for resolution in (4, 7):
+        tracemalloc.start()
+        result = optimize_bundles(issues, utilities, grid_resolution=resolution, use_cache=False, chunk_size=1024)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert result['combinations_evaluated'] == grid_size([range(resolution)] * 6)
+        peaks.append(peak)
+    # 4**6 = 4096 vs 7**6 = 117649 bundles: ~29x the grid, far less than that in memory
+    assert peaks[1] < 4 * peaks[0]
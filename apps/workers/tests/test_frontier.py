@@ -0,0 +1,51 @@
+"""Pareto extraction against a pairwise dominance check."""
+import numpy as np
+import pytest
+
+from workers.engine.enumeration import ParetoArchive
+from workers.engine.frontier import pareto_indices, pareto_mask
+
+
+def brute_pareto(utils):
+    keep = []
+    for i, u in enumerate(utils):
+        dominated = np.any(np.all(utils >= u, axis=1) & np.any(utils > u, axis=1))
+        if not dominated:
+            keep.append(i)
+    return np.array(keep, dtype=np.int64)
+
+
+@pytest.mark.parametrize('n_parties', [1, 2, 3, 5])
+@pytest.mark.parametrize('seed', [0, 1])
+def test_pareto_indices_match_pairwise_check(n_parties, seed):
+    rng = np.random.default_rng(seed)
+    # Coarse values so ties and duplicate rows are common
+    utils = rng.integers(0, 6, size=(300, n_parties)).astype(float)
+    expected = brute_pareto(utils)
+    np.testing.assert_array_equal(pareto_indices(utils, block_size=32), expected)
+    np.testing.assert_array_equal(np.flatnonzero(pareto_mask(utils)), expected)
+
+
+def test_pareto_indices_edge_shapes():
+    assert len(pareto_indices(np.zeros((0, 3)))) == 0
+    np.testing.assert_array_equal(pareto_indices(np.zeros((4, 0))), np.arange(4))
+
+
+def test_archive_matches_one_pass_over_all_chunks():
+    rng = np.random.default_rng(7)
+    utils = rng.integers(0, 8, size=(500, 3)).astype(float)
+    combos = rng.random((500, 2))
+    scores = utils.sum(axis=1)
+
+    archive = ParetoArchive(2, 3)
+    for start in range(0, 500, 64):
+        stop = start + 64
+        archive.add(start, combos[start:stop], utils[start:stop], scores[start:stop])
+    np.testing.assert_array_equal(archive.index, brute_pareto(utils))
+
+    left, right = ParetoArchive(2, 3), ParetoArchive(2, 3)
+    left.add(0, combos[:250], utils[:250], scores[:250])
+    right.add(250, combos[250:], utils[250:], scores[250:])
+    right.merge(left)
+    np.testing.assert_array_equal(right.index, brute_pareto(utils))
+    np.testing.assert_array_equal(right.combos, combos[right.index])
@@ -0,0 +1,74 @@
+"""Joint (whole-package) ZOPA check against the per-issue check."""
+import numpy as np
+
+from workers.engine.zopa import analyze_joint_zopa, joint_zopa
+from workers.tasks.zopa_checker import check_zopa
+
+ISSUES = [{'id': f'i{i}', 'minValue': 0, 'maxValue': 100} for i in range(2)]
+
+
+def test_joint_zopa_with_no_issues():
+    result = check_zopa([], {'a': {}, 'b': {}}, {'a': {}, 'b': {}}, mode='both')
+    assert result['status'] == 'success'
+    assert result['joint']['feasible']
+
+    short = analyze_joint_zopa([], {'a': {}}, {'a': {}}, reservation_utilities={'a': 0.5})
+    assert not short['feasible']
+    assert short['binding_constraints'] == [{'type': 'party_utility', 'party_id': 'a', 'floor': 0.5}]
+
+
+def test_joint_zopa_finds_trade_offs_the_per_issue_check_misses():
+    issues = ISSUES
+    # The parties' reservations cross on each issue, but each cares about a different one
+    reservations = {'a': {'i0': 80, 'i1': 10}, 'b': {'i0': 20, 'i1': 90}}
+    targets = {'a': {'i0': 100, 'i1': 0}, 'b': {'i0': 0, 'i1': 100}}
+    weights = {'a': {'i0': 0.9, 'i1': 0.1}, 'b': {'i0': 0.1, 'i1': 0.9}}
+    per_issue = check_zopa(issues, reservations, targets)
+    assert not per_issue['all_issues_have_zopa']
+
+    joint = analyze_joint_zopa(issues, reservations, targets, weights)
+    assert joint['feasible']
+    assert all(u >= -1e-9 for u in joint['witness_utilities'].values())
+    for issue in issues:
+        assert issue['minValue'] <= joint['witness'][issue['id']] <= issue['maxValue']
+        assert issue['minValue'] <= joint['chebyshev_center'][issue['id']] <= issue['maxValue']
+
+
+def test_joint_zopa_infeasible_and_crossed_ranges():
+    coef = np.array([[1.0, 0.0], [-1.0, 0.0]])
+    # Party 0 needs x0 >= 0.8, party 1 needs x0 <= 0.2
+    infeasible = joint_zopa(np.zeros(2), np.ones(2), coef, np.array([0.0, 0.0]), np.array([0.8, -0.2]))
+    assert not infeasible['feasible']
+    assert infeasible['radius'] < 0
+    assert infeasible['witness'] is None
+    assert ('party', 0) in infeasible['binding'] and ('party', 1) in infeasible['binding']
+
+    crossed = joint_zopa(np.array([0.0, 5.0]), np.array([1.0, 4.0]), coef, np.zeros(2), np.zeros(2))
+    assert not crossed['feasible']
+    assert crossed['binding'] == [('min', 1), ('max', 1)]
+
+
+def test_joint_zopa_witness_stays_in_bounds():
+    rng = np.random.default_rng(2)
+    for _ in range(20):
+        n_parties, n_issues = 3, 4
+        lo = rng.uniform(0, 10, n_issues)
+        hi = lo + rng.uniform(0, 10, n_issues)
+        coef = rng.normal(size=(n_parties, n_issues))
+        solved = joint_zopa(lo, hi, coef, np.zeros(n_parties), np.full(n_parties, -50.0))
+        assert solved['feasible']
+        assert np.all(solved['witness'] >= lo) and np.all(solved['witness'] <= hi)
+        assert np.all(solved['center'] >= lo) and np.all(solved['center'] <= hi)
+
+
+def test_per_issue_mode_skips_the_joint_check():
+    reservations = {'a': {'i0': 80, 'i1': 10}, 'b': {'i0': 20, 'i1': 90}}
+    targets = {'a': {'i0': 100, 'i1': 0}, 'b': {'i0': 0, 'i1': 100}}
+    per_issue = check_zopa(ISSUES, reservations, targets)
+    assert 'joint' not in per_issue
+
+    joint_only = check_zopa(ISSUES, reservations, targets, mode='joint')
+    assert 'issues' not in joint_only
+    assert joint_only['joint_zopa_exists'] == joint_only['joint']['feasible']
+
+    assert check_zopa(ISSUES, reservations, targets, mode='nope')['status'] == 'failed'
@@ -0,0 +1,37 @@
+"""Final package consolidation."""
+from workers.engine.columnar import is_columnar, iter_points
+from workers.tasks.bundle_optimizer import optimize_bundles
+from workers.tasks.mediator_agent import consolidate_final_package
+
+ISSUES = [{'id': 'price', 'title': 'Price', 'minValue': 0, 'maxValue': 100},
+          {'id': 'term', 'title': 'Term', 'minValue': 1, 'maxValue': 5}]
+UTILITIES = {'a': {'price': 0.8, 'term': 0.2}, 'b': {'price': -0.5, 'term': 0.5}}
+
+
+def test_failed_or_empty_optimization_still_consolidates():
+    for optimization in ({'status': 'failed', 'error': 'x'}, {}):
+        result = consolidate_final_package({'id': 'n'}, [], [{'id': 'i1'}], {}, [], optimization, {})
+        assert result['status'] == 'success'
+        assert result['package']['pareto_frontier_size'] == 0
+        assert 'pareto_frontier' not in result['package']
+
+
+def test_frontier_is_carried_only_on_request():
+    optimization = optimize_bundles(ISSUES, UTILITIES, grid_resolution=5, use_cache=False)
+    offers = [{'issue_id': 'price', 'proposed_value': 40, 'confidence': 0.5},
+              {'issue_id': 'price', 'proposed_value': optimization['best']['values']['price'], 'confidence': 0.1}]
+    args = ({'id': 'n', 'title': 'Deal'}, [{'name': 'A'}, {'name': 'B'}], ISSUES, {}, offers, optimization, {})
+
+    package = consolidate_final_package(*args)['package']
+    assert 'pareto_frontier' not in package
+    assert package['pareto_frontier_size'] == optimization['frontier_size'] > 0
+    assert package['recommended_values'] == optimization['best']['values']
+    assert package['selected_offers'] == [offers[1]]
+
+    full = consolidate_final_package(*args, include_frontier=True)['package']
+    assert is_columnar(full['pareto_frontier'])
+    points = list(iter_points(full['pareto_frontier']))
+    assert len(points) == package['pareto_frontier_size']
+    expected = list(iter_points(optimization['pareto']))
+    for got, want in zip(points, expected):
+        assert got['values'] == want['values']
@@ -0,0 +1,38 @@
+"""Monte Carlo sampling of negotiation outcomes."""
+import numpy as np
+import pytest
+
+from workers.engine.montecarlo import BATCH_SIZE, batch_shards
+from workers.tasks.negotiation_simulator import sample_negotiation_outcomes, simulate_negotiation
+from tests.test_simulation import ISSUES, PARTIES, PREFERENCES
+
+SAMPLES = 3 * BATCH_SIZE + 5
+
+
+def test_batch_shards_tile_every_batch():
+    ranges = batch_shards(SAMPLES, 3)
+    assert ranges[0][0] == 0 and ranges[-1][1] == 4
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert batch_shards(0, 3) == []
+
+
+def test_shards_and_processes_reproduce_the_inline_sample():
+    inline = sample_negotiation_outcomes(PARTIES, ISSUES, PREFERENCES, samples=SAMPLES, seed=7)
+    sharded = sample_negotiation_outcomes(PARTIES, ISSUES, PREFERENCES, samples=SAMPLES, seed=7, shards=3)
+    pooled = sample_negotiation_outcomes(PARTIES, ISSUES, PREFERENCES, samples=SAMPLES, seed=7, processes=2)
+    assert inline['status'] == 'success' and inline['samples'] == SAMPLES
+    assert sharded.pop('shards') == 3
+    assert sharded == inline
+    assert pooled == inline
+    assert sample_negotiation_outcomes(PARTIES, ISSUES, PREFERENCES, samples=SAMPLES, seed=8) != inline
+
+
+def test_noiseless_samples_all_follow_the_single_simulation():
+    single = simulate_negotiation(PARTIES, ISSUES, PREFERENCES, max_rounds=20)
+    sampled = sample_negotiation_outcomes(PARTIES, ISSUES, PREFERENCES, samples=10, weight_sd=0.0,
+                                          value_sd=0.0, threshold_sd=0.0)
+    assert sampled['outcomes'][single['outcome']] == 10
+    assert sampled['agreement_probability'] == (1.0 if single['outcome'] == 'converged' else 0.0)
+    median = {iid: dist['percentiles']['p50'] for iid, dist in sampled['final_values'].items()}
+    expected = np.mean(single['trajectory']['values'][-1], axis=0)
+    assert list(median.values()) == pytest.approx(expected.tolist())
@@ -0,0 +1,70 @@
+"""Offer proposal, per offer and per round."""
+import pytest
+
+from workers.celery_app import celery_app
+from workers.engine.concession import ConcessionState
+from workers.tasks.offer_proposer import propose_offer, propose_round
+
+PARTIES = [{'id': 'a', 'name': 'Alpha'}, {'id': 'b', 'name': 'Beta'}]
+ISSUES = [{'id': 'price', 'title': 'Price'}, {'id': 'term', 'title': 'Term', 'type': 'integrative'}]
+PREFERENCES = {
+    'a': {'price': {'weight': 0.9, 'reservation_value': 40, 'target_value': 90, 'current_value': 70},
+          'term': {'weight': 0.3, 'reservation_value': 2, 'target_value': 10, 'current_value': 6}},
+    'b': {'price': {'weight': 0.6, 'reservation_value': 60, 'target_value': 20, 'current_value': 35}},
+}
+HISTORY = [{'party_name': 'Alpha', 'proposed_value': v} for v in (80, 79, 78)] + \
+          [{'party_name': 'Beta', 'proposed_value': v} for v in (20, 30, 40)]
+FIELDS = ('party_id', 'issue_id', 'proposed_value', 'strategy', 'confidence', 'flexibility')
+
+
+def test_round_task_is_registered():
+    assert propose_round.__module__ in celery_app.conf.include
+    assert propose_round.name in celery_app.tasks
+
+
+@pytest.mark.parametrize('round_number', [1, 2, 3, 5])
+def test_round_matches_per_offer_proposals(round_number):
+    result = propose_round(PARTIES, ISSUES, PREFERENCES, round_number, HISTORY)
+    assert result['status'] == 'success'
+    assert len(result['offers']) == len(PARTIES) * len(ISSUES)
+    offers = iter(result['offers'])
+    for party in PARTIES:
+        for issue in ISSUES:
+            single = propose_offer(party, issue, PREFERENCES.get(party['id'], {}).get(issue['id'], {}),
+                                   round_number, HISTORY)['offer']
+            batched = next(offers)
+            for field in FIELDS:
+                assert batched[field] == pytest.approx(single[field]) if field in ('proposed_value', 'confidence') \
+                    else batched[field] == single[field], field
+
+
+def test_parallel_updates_merge_without_lost_writes():
+    state = ConcessionState()
+    for value in (80, 78, 77):
+        state.record('a', 'price', value)
+    for value in (30, 31):
+        state.record('b', 'price', value)
+    shared = state.to_dict()
+
+    # Both proposals start from the same state, as parallel tasks would
+    updates = [propose_offer(party, ISSUES[0], PREFERENCES[party['id']]['price'], 4,
+                             concession_state=shared)['concession_update'] for party in PARTIES]
+    assert [list(update['entries']) for update in updates] == [['a:price'], ['b:price']]
+
+    merged = ConcessionState.from_dict(shared)
+    for update in updates:
+        merged.merge(ConcessionState.from_dict(update))
+    sequential = ConcessionState.from_dict(shared)
+    for update, party in zip(updates, PARTIES):
+        sequential.record(party['id'], 'price', update['entries'][f"{party['id']}:price"]['last'])
+    assert merged.to_dict() == sequential.to_dict()
+    assert merged.entries['a:price']['count'] == 4 and merged.entries['b:price']['count'] == 3
+
+
+def test_round_update_covers_every_pair():
+    result = propose_round(PARTIES, ISSUES, PREFERENCES, 2, concession_state={'entries': {}})
+    update = ConcessionState.from_dict(result['concession_update'])
+    assert sorted(update.entries) == ['a:price', 'a:term', 'b:price', 'b:term']
+    assert all(entry['count'] == 1 for entry in update.entries.values())
+    merged = ConcessionState().merge(update)
+    assert merged.pattern('a', 'price')['pattern'] == 'insufficient_data'
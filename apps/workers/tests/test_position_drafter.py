@@ -0,0 +1,43 @@
+"""Batched, memoized position briefs."""
+import pytest
+
+from workers.engine.cache import MemoCache
+from workers.tasks import position_drafter
+from workers.tasks.position_drafter import draft_position, draft_positions
+
+PARTIES = [{'id': 'a', 'name': 'Alpha', 'country': 'AT'}, {'id': 'b', 'name': 'Beta', 'type': 'state'}]
+ISSUES = [{'id': 'price', 'title': 'Price'}, {'id': 'term', 'title': 'Term', 'type': 'integrative'}]
+PREFERENCES = {
+    'a': {'price': {'weight': 0.9, 'reservationValue': 40, 'targetValue': 90, 'batna': 'Other buyer'}},
+    'b': {'price': {'weight': 0.4}, 'term': {'weight': 0.7, 'targetValue': 12}},
+}
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(position_drafter, '_cache', MemoCache(100))
+
+
+def test_batch_matches_single_briefs():
+    result = draft_positions(PARTIES, ISSUES, PREFERENCES)
+    assert result['status'] == 'completed'
+    expected = [draft_position(party, issue, PREFERENCES.get(party['id'], {}).get(issue['id'], {}), kind)
+                for party in PARTIES for issue in ISSUES for kind in ('public', 'private')]
+    assert result['briefs'] == expected
+    assert result['drafted'] == 8 and result['reused'] == 0
+
+
+def test_an_edit_redrafts_only_the_affected_pair():
+    first = draft_positions(PARTIES, ISSUES, PREFERENCES)
+    edited = {**PREFERENCES, 'b': {**PREFERENCES['b'], 'term': {'weight': 0.2, 'targetValue': 12}}}
+    second = draft_positions(PARTIES, ISSUES, edited)
+    assert second['drafted'] == 2 and second['reused'] == 6
+    changed = [i for i, (old, new) in enumerate(zip(first['briefs'], second['briefs'])) if old != new]
+    assert {(second['briefs'][i]['party_id'], second['briefs'][i]['issue_id']) for i in changed} <= {('b', 'term')}
+    assert second['briefs'][-2:] == [draft_position(PARTIES[1], ISSUES[1], edited['b']['term'], kind)
+                                     for kind in ('public', 'private')]
+
+    # Fields the drafter never reads do not invalidate a brief
+    noisy = [{**party, 'updatedAt': 'now'} for party in PARTIES]
+    assert draft_positions(noisy, ISSUES, edited)['reused'] == 8
+    assert draft_positions(PARTIES, ISSUES, edited, use_cache=False)['drafted'] == 8
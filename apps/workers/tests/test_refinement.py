@@ -0,0 +1,50 @@
+"""Adaptive refinement around the frontier."""
+from itertools import product
+
+import numpy as np
+
+from workers.engine.frontier import pareto_indices
+from workers.engine.refinement import MAX_BOX_ISSUES, level_resolutions, neighbour_offsets
+from workers.engine.utility import UtilityEngine, aggregate_scores
+from workers.tasks.bundle_optimizer import optimize_bundles
+
+ISSUES = [{'id': f'i{i}', 'minValue': 0, 'maxValue': 10 * (i + 1)} for i in range(3)]
+UTILITIES = {'a': {'i0': 0.7, 'i1': 0.2, 'i2': 0.1}, 'b': {'i0': 0.1, 'i1': 0.3, 'i2': 0.6},
+             'c': {'i0': 0.2, 'i1': 0.6, 'i2': 0.2}}
+
+
+def test_levels_keep_coarse_points_on_the_finer_grid():
+    assert level_resolutions([3, 5, 1], 2) == [9, 17, 1]
+    engine = UtilityEngine(ISSUES, UTILITIES)
+    coarse, fine = engine.grids(3), engine.grids(level_resolutions([3] * 3, 1))
+    for c, f in zip(coarse, fine):
+        assert np.isin(c, f).all()
+
+
+def test_refinement_improves_on_the_coarse_grid_within_the_fine_one():
+    coarse = optimize_bundles(ISSUES, UTILITIES, grid_resolution=3, use_cache=False)
+    refined = optimize_bundles(ISSUES, UTILITIES, grid_resolution=3, refine_levels=2, use_cache=False,
+                               max_points=10_000)
+    assert refined['status'] == 'success'
+    assert [level['level'] for level in refined['levels']] == [0, 1, 2]
+    assert refined['best']['score'] >= coarse['best']['score'] - 1e-12
+    assert refined['combinations_evaluated'] < 9 ** 3
+
+    engine = UtilityEngine(ISSUES, UTILITIES)
+    fine = engine.party_utilities(np.array(list(product(*engine.grids(9)))))
+    assert refined['best']['score'] <= aggregate_scores(fine, 'nash').max() + 1e-12
+    utils = np.array([list(point['party_utils'].values()) for point in refined['pareto']])
+    assert len(pareto_indices(utils)) == len(utils)
+
+
+def test_neighbourhood_is_linear_beyond_the_box_limit():
+    assert len(neighbour_offsets(np.ones(MAX_BOX_ISSUES, dtype=bool))) == 3 ** MAX_BOX_ISSUES
+    offsets = neighbour_offsets(np.ones(10, dtype=bool))
+    assert len(offsets) == 2 * 10 + 1
+    assert np.abs(offsets).sum(axis=1).max() == 1
+    assert not neighbour_offsets(np.array([True, False, True]))[:, 1].any()
+
+    issues = [{'id': f'i{i}', 'minValue': 0, 'maxValue': 1} for i in range(8)]
+    utilities = {'a': {issue['id']: 1.0 for issue in issues}, 'b': {'i0': 1.0}}
+    result = optimize_bundles(issues, utilities, grid_resolution=3, refine_levels=1, use_cache=False)
+    assert result['status'] == 'success'
@@ -0,0 +1,63 @@
+"""Risk tree expected impacts against the original per-issue scenario loop."""
+import numpy as np
+import pytest
+
+from workers.tasks.risk_engine import build_risk_tree
+
+ISSUES = [{'id': 'price'}, {'id': 'term'}, {'id': 'units'}]
+SCENARIOS = [
+    {'name': 'baseline', 'probability': 0.5, 'impacts': {'price': 0.1, 'term': -0.05}},
+    {'name': 'optimistic', 'probability': 0.3, 'impacts': {'price': 0.3, 'units': 0.2, 'other': 1.0}},
+    {'name': 'adverse', 'probability': 0.4, 'impacts': {'price': -0.6, 'term': -0.2, 'units': -0.1}},
+    {'name': 'void', 'probability': -0.2, 'impacts': {'price': -1.0}},
+]
+
+
+def loop_risk_tree(issues, scenarios):
+    """The pre-vectorization implementation: normalize, then loop issue by scenario."""
+    total_p = sum(max(0.0, float(s.get('probability', 0.0))) for s in scenarios) or 1.0
+    normalized = [{**s, 'probability': max(0.0, float(s.get('probability', 0.0))) / total_p} for s in scenarios]
+    results = []
+    for issue in issues:
+        per_scenario = [{'scenario': s.get('name', 'scenario'), 'probability': s['probability'],
+                         'impact': float(s.get('impacts', {}).get(issue['id'], 0.0))} for s in normalized]
+        results.append({'issue_id': issue['id'],
+                        'expected_impact': sum(x['probability'] * x['impact'] for x in per_scenario),
+                        'scenarios': per_scenario})
+    return results, sum(abs(r['expected_impact']) for r in results) / max(1, len(results))
+
+
+def test_full_breakdown_matches_the_scalar_loop():
+    expected, index = loop_risk_tree(ISSUES, SCENARIOS)
+    result = build_risk_tree(ISSUES, SCENARIOS)
+    assert result['status'] == 'success' and result['breakdown'] == 'full'
+    assert result['overall_risk_index'] == pytest.approx(index)
+    for got, want in zip(result['issues'], expected):
+        assert got['issue_id'] == want['issue_id']
+        assert got['expected_impact'] == pytest.approx(want['expected_impact'])
+        assert got['scenarios'] == pytest.approx(want['scenarios'])
+
+
+def test_columnar_scenarios_and_summary_breakdown():
+    rng = np.random.default_rng(0)
+    impacts = rng.uniform(-1, 1, (1500, len(ISSUES)))
+    probabilities = rng.random(1500)
+    columnar = {'names': [f's{s}' for s in range(1500)], 'probabilities': probabilities.tolist(),
+                'impacts': impacts.tolist()}
+    listed = [{'name': f's{s}', 'probability': float(probabilities[s]),
+               'impacts': dict(zip(['price', 'term', 'units'], impacts[s].tolist()))} for s in range(1500)]
+    expected, index = loop_risk_tree(ISSUES, listed)
+
+    result = build_risk_tree(ISSUES, columnar)
+    assert result['breakdown'] == 'summary' and result['scenario_count'] == 1500
+    assert result['overall_risk_index'] == pytest.approx(index)
+    p = probabilities / probabilities.sum()
+    for i, (got, want) in enumerate(zip(result['issues'], expected)):
+        assert got['expected_impact'] == pytest.approx(want['expected_impact'])
+        mean = want['expected_impact']
+        assert got['summary']['std'] == pytest.approx(np.sqrt(p @ (impacts[:, i] - mean) ** 2))
+        assert got['summary']['downside_probability'] == pytest.approx(p[impacts[:, i] < 0].sum())
+        assert got['summary']['min'] == impacts[:, i].min()
+        assert got['summary']['worst_scenario']['scenario'] == f's{int(np.argmin(impacts[:, i]))}'
+    assert 'issues' in build_risk_tree(ISSUES, columnar, breakdown='none')
+    assert build_risk_tree(ISSUES, SCENARIOS, breakdown='bogus')['status'] == 'failed'
@@ -0,0 +1,71 @@
+"""Monte Carlo VaR / CVaR against the exact order statistics of the same draws."""
+import numpy as np
+import pytest
+
+from workers.engine.risk import TAIL_BINS
+from workers.tasks.risk_engine import _risk_model, simulate_risk_outcomes, simulate_risk_shard
+
+ISSUES = [{'id': 'price'}, {'id': 'term'}, {'id': 'units'}]
+DISTRIBUTIONS = {'price': {'type': 'normal', 'mean': 0.1, 'sd': 0.3},
+                 'term': {'type': 'normal', 'mean': -0.05, 'sd': 0.2},
+                 'units': {'type': 'normal', 'mean': 0.0, 'sd': 0.5}}
+UTILITIES = {'a': {'price': 0.7, 'term': 0.3}, 'b': {'price': -0.4, 'units': 0.6}}
+BASELINE = {'a': 0.6, 'b': 0.5}
+ALPHAS = (0.9, 0.95, 0.99)
+
+
+def exact_series(draws, seed):
+    """The simulation's own draws (one chunk, independent normals), recomputed in full."""
+    rng = np.random.default_rng(np.random.SeedSequence(seed).spawn(1)[0])
+    z = rng.standard_normal((draws, len(ISSUES)))
+    means = np.array([DISTRIBUTIONS[i['id']]['mean'] for i in ISSUES])
+    sds = np.array([DISTRIBUTIONS[i['id']]['sd'] for i in ISSUES])
+    impacts = means + sds * z
+    weights = np.array([[UTILITIES[p].get(i['id'], 0.0) for p in UTILITIES] for i in ISSUES])
+    weights = weights / np.clip(weights, 0, None).sum(axis=0)
+    return np.column_stack([impacts.sum(axis=1), np.array(list(BASELINE.values())) + impacts @ weights])
+
+
+def simulate(draws, **kwargs):
+    return simulate_risk_outcomes(ISSUES, DISTRIBUTIONS, utilities=UTILITIES, baseline=BASELINE, draws=draws,
+                                  alphas=ALPHAS, **kwargs)
+
+
+def test_tail_metrics_match_exact_order_statistics():
+    draws = 50_000
+    result = simulate(draws, seed=3, chunk_size=draws)
+    series = np.sort(exact_series(draws, 3), axis=0)
+    model = _risk_model(ISSUES, DISTRIBUTIONS, None, UTILITIES, BASELINE, None, draws, ALPHAS)[0]
+    width = (model[8] - model[6]) / TAIL_BINS
+    offset = np.array([0.0] + list(BASELINE.values()))
+    reported = [result['total_impact']] + result['parties']
+    for alpha in ALPHAS:
+        k = int(np.ceil((1 - alpha) * draws - 1e-9))
+        for s, metrics in enumerate(reported):
+            assert metrics['var'][str(alpha)] == pytest.approx(offset[s] - series[k - 1, s], abs=width[s])
+            assert metrics['cvar'][str(alpha)] == pytest.approx(offset[s] - series[:k, s].mean(), abs=width[s] / 2)
+            assert metrics['cvar'][str(alpha)] >= metrics['var'][str(alpha)] - 1e-12
+
+
+def test_normal_total_matches_closed_form():
+    # Total impact ~ N(0.05, sqrt(0.38)); VaR = -(mu - z sd), CVaR = -(mu - sd pdf(z) / (1 - alpha))
+    result = simulate(400_000, seed=1)
+    mu, sd = 0.05, np.sqrt(0.3 ** 2 + 0.2 ** 2 + 0.5 ** 2)
+    z, pdf = 1.6448536269514722, 0.10313564037537128
+    assert result['total_impact']['var']['0.95'] == pytest.approx(-(mu - z * sd), abs=0.01)
+    assert result['total_impact']['cvar']['0.95'] == pytest.approx(-(mu - sd * pdf / 0.05), abs=0.01)
+
+
+def test_shards_send_fixed_size_state_and_merge_to_the_inline_result():
+    inline = simulate(60_000, seed=4, chunk_size=10_000)
+    sharded = simulate(60_000, seed=4, chunk_size=10_000, shards=3)
+    assert sharded.pop('shards') == 3
+    assert sharded['total_impact']['var'] == pytest.approx(inline['total_impact']['var'])
+    assert sharded['total_impact']['cvar'] == pytest.approx(inline['total_impact']['cvar'])
+    assert sharded['parties'][1]['percentiles'] == pytest.approx(inline['parties'][1]['percentiles'])
+
+    args = (ISSUES, DISTRIBUTIONS, None, UTILITIES, BASELINE, None)
+    small = simulate_risk_shard(*args, 1_000, ALPHAS, 0, 1_000, 0, 1)
+    large = simulate_risk_shard(*args, 200_000, ALPHAS, 0, 200_000, 0, 1)
+    assert {key: np.shape(value) for key, value in small.items()} == \
+        {key: np.shape(value) for key, value in large.items()}
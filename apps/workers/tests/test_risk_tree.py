@@ -0,0 +1,182 @@
+"""Incremental risk tree edits against a full bottom-up recompute."""
+import numpy as np
+import pytest
+
+from workers.engine.risk_tree import RiskTree
+from workers.tasks import risk_engine
+from workers.tasks.risk_engine import evaluate_risk_tree, risk_tree_key
+
+ISSUE_IDS = ['i0', 'i1', 'i2']
+ISSUES = [{'id': iid} for iid in ISSUE_IDS]
+WEIGHTS = [1.0, 2.0, 0.5]
+
+
+def random_tree(rng, size=120):
+    tree = RiskTree(ISSUE_IDS, WEIGHTS)
+    tree.add_node('root', 'decision')
+    for n in range(1, size):
+        parents = [node.id for node in tree.nodes.values() if node.kind != 'terminal']
+        kind = str(rng.choice(['decision', 'chance', 'terminal', 'terminal']))
+        impacts = {iid: float(v) for iid, v in zip(ISSUE_IDS, rng.uniform(-1, 1, 3))} if kind == 'terminal' else None
+        tree.add_node(f'n{n}', kind, str(rng.choice(parents)), float(rng.random()), impacts)
+    return tree
+
+
+def random_edit(rng, tree, step):
+    nodes = list(tree.nodes.values())
+    op = str(rng.choice(['add', 'remove', 'set_probability', 'set_impacts']))
+    if op == 'add':
+        parent = rng.choice([node for node in nodes if node.kind != 'terminal'])
+        kind = str(rng.choice(['decision', 'chance', 'terminal']))
+        return {'op': 'add', 'node_id': f'a{step}', 'kind': kind, 'parent_id': parent.id,
+                'probability': float(rng.random()), 'impacts': {'i0': float(rng.uniform(-1, 1))}}
+    if op == 'remove' and len(nodes) > 1:
+        return {'op': 'remove', 'node_id': rng.choice(nodes[1:]).id}
+    terminals = [node for node in nodes if node.kind == 'terminal']
+    if op == 'set_impacts' and terminals:
+        return {'op': 'set_impacts', 'node_id': rng.choice(terminals).id, 'impacts': {'i1': float(rng.uniform(-1, 1))}}
+    return {'op': 'set_probability', 'node_id': rng.choice(nodes).id, 'probability': float(rng.random())}
+
+
+def apply(tree, edit):
+    if edit['op'] == 'add':
+        return tree.add_node(edit['node_id'], edit['kind'], edit['parent_id'], edit['probability'], edit['impacts'])
+    if edit['op'] == 'remove':
+        return tree.remove_node(edit['node_id'])
+    if edit['op'] == 'set_probability':
+        return tree.set_probability(edit['node_id'], edit['probability'])
+    return tree.set_impacts(edit['node_id'], edit['impacts'])
+
+
+def assert_same_values(tree, reference):
+    assert set(tree.nodes) == set(reference.nodes)
+    for node_id, node in reference.nodes.items():
+        np.testing.assert_allclose(tree.nodes[node_id].value, node.value, atol=1e-9, err_msg=node_id)
+    assert tree.policy() == reference.policy()
+
+
+def test_edits_match_a_full_recompute():
+    rng = np.random.default_rng(0)
+    tree = random_tree(rng)
+    for step in range(300):
+        apply(tree, random_edit(rng, tree, step))
+        reference = RiskTree.from_dict(tree.to_dict())
+        assert_same_values(tree, reference)
+
+
+def test_changed_ids_cover_every_value_change():
+    rng = np.random.default_rng(1)
+    tree = random_tree(rng)
+    for step in range(100):
+        before = {node_id: node.value.copy() for node_id, node in tree.nodes.items()}
+        changed = set(apply(tree, random_edit(rng, tree, step)))
+        moved = {node_id for node_id, node in tree.nodes.items()
+                 if node_id in before and not np.array_equal(before[node_id], node.value)}
+        assert moved <= changed
+
+
+def test_removing_every_child_leaves_exact_zeros():
+    tree = RiskTree(['a'])
+    tree.add_node('r', 'chance')
+    tree.add_node('c1', 'terminal', 'r', 0.1, {'a': 1.0})
+    tree.add_node('c2', 'terminal', 'r', 0.2, {'a': 2.0})
+    tree.remove_node('c1')
+    tree.remove_node('c2')
+    assert tree.nodes['r'].total == 0.0
+    assert tree.expected() == {'a': 0.0}
+
+
+def test_zeroed_probabilities_give_no_expected_value():
+    tree = RiskTree(['a'])
+    tree.add_node('r', 'chance')
+    tree.add_node('c1', 'terminal', 'r', 0.1, {'a': 1.0})
+    tree.add_node('c2', 'terminal', 'r', 0.2, {'a': 3.0})
+    tree.set_probability('c1', 0.0)
+    tree.set_probability('c2', 0.0)
+    assert tree.expected() == {'a': 0.0}
+
+
+def test_decision_ties_go_to_the_first_child():
+    tree = RiskTree(['a'])
+    tree.add_node('d', 'decision')
+    tree.add_node('x', 'terminal', 'd', impacts={'a': 1.0})
+    tree.add_node('y', 'terminal', 'd', impacts={'a': 1.0})
+    assert tree.policy() == {'d': 'x'}
+    tree.set_impacts('y', {'a': 2.0})
+    assert tree.policy() == {'d': 'y'}
+
+
+def test_invalid_edits_are_rejected():
+    tree = RiskTree(['a'])
+    tree.add_node('t', 'terminal')
+    with pytest.raises(ValueError):
+        tree.add_node('u', 'terminal', 't')
+    with pytest.raises(ValueError):
+        tree.set_probability('t', 1.5)
+    with pytest.raises(KeyError):
+        tree.remove_node('missing')
+
+
+def test_stored_tree_loads_only_edited_paths(fake_redis, monkeypatch):
+    monkeypatch.setattr(risk_engine, '_redis', fake_redis)
+    rng = np.random.default_rng(2)
+    reference = random_tree(rng, size=300)
+    weights = dict(zip(ISSUE_IDS, WEIGHTS))
+    stored = evaluate_risk_tree(ISSUES, reference.to_dict(), weights=weights, negotiation_id='n1')
+    assert stored['status'] == 'success'
+
+    for step in range(150):
+        edit = random_edit(rng, reference, step)
+        reads = fake_redis.reads
+        result = evaluate_risk_tree(ISSUES, edits=[edit], negotiation_id='n1')
+        assert result['status'] == 'success', result
+        assert 'tree' not in result
+        assert fake_redis.reads - reads < len(reference.nodes) // 2
+        apply(reference, edit)
+        expected = reference.expected()
+        for item in result['issues']:
+            assert item['expected_impact'] == pytest.approx(expected[item['issue_id']], abs=1e-9)
+        for node_id, choice in result['policy'].items():
+            assert reference.policy()[node_id] == choice
+
+    assert set(fake_redis.hkeys(risk_tree_key('n1'))) == set(reference.nodes)
+    loaded = RiskTree.load(fake_redis, risk_tree_key('n1'), list(reference.nodes))
+    assert_same_values(loaded, RiskTree.from_dict(reference.to_dict()))
+
+
+def test_stored_tree_must_exist(fake_redis, monkeypatch):
+    monkeypatch.setattr(risk_engine, '_redis', fake_redis)
+    result = evaluate_risk_tree(ISSUES, edits=[], negotiation_id='missing')
+    assert result['status'] == 'failed'
+
+
+def test_concurrent_edits_of_a_stored_tree_both_land(fake_redis, monkeypatch):
+    monkeypatch.setattr(risk_engine, '_redis', fake_redis)
+    tree = RiskTree(['i0'])
+    tree.add_node('r', 'chance')
+    tree.add_node('x', 'terminal', 'r', 0.5, {'i0': 1.0})
+    tree.add_node('y', 'terminal', 'r', 0.5, {'i0': 3.0})
+    evaluate_risk_tree([{'id': 'i0'}], tree.to_dict(), negotiation_id='n1')
+
+    load = RiskTree.load.__func__
+    loads = []
+
+    def racing_load(cls, client, key, node_ids=(), subtrees=()):
+        loaded = load(cls, client, key, node_ids, subtrees)
+        loads.append(list(node_ids))
+        if len(loads) == 1:
+            # Another worker commits its edit between this read and EXEC
+            other = evaluate_risk_tree([], edits=[{'op': 'set_impacts', 'node_id': 'y', 'impacts': {'i0': 5.0}}],
+                                       negotiation_id='n1')
+            assert other['status'] == 'success'
+        return loaded
+
+    monkeypatch.setattr(RiskTree, 'load', classmethod(racing_load))
+    result = evaluate_risk_tree([], edits=[{'op': 'set_impacts', 'node_id': 'x', 'impacts': {'i0': 2.0}}],
+                                negotiation_id='n1')
+    assert result['status'] == 'success'
+    assert len(loads) == 3  # the first attempt, the concurrent edit, the retry
+    assert result['issues'] == [{'issue_id': 'i0', 'expected_impact': pytest.approx(3.5)}]
+    stored = load(RiskTree, fake_redis, risk_tree_key('n1'), ['x', 'y'])
+    assert stored.expected() == pytest.approx({'i0': 3.5})
+    assert_same_values(stored, RiskTree.from_dict(stored.to_dict()))
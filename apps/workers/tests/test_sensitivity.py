@@ -0,0 +1,72 @@
+"""Batched weight sensitivity against re-scoring the grid once per weight set."""
+from itertools import product
+
+import numpy as np
+import pytest
+
+from workers.engine.curves import curves_from_preferences
+from workers.engine.sensitivity import MODES, party_features, perturbed_weights, recommendations, tipping_points
+from workers.engine.utility import UtilityEngine, aggregate_scores, raw_weight_matrix
+from workers.tasks.bundle_optimizer import analyze_bundle_sensitivity
+
+ISSUES = [{'id': 'price', 'minValue': 0, 'maxValue': 100}, {'id': 'term', 'minValue': 1, 'maxValue': 9},
+          {'id': 'units', 'minValue': 0, 'maxValue': 40}]
+UTILITIES = {'a': {'price': 0.55, 'term': 0.25, 'units': 0.2}, 'b': {'price': -0.45, 'term': 0.35, 'units': 0.2},
+             'c': {'price': 0.1, 'term': -0.3, 'units': 0.6}}
+CURVES = [{'partyId': 'b', 'issueId': 'units', 'utilityCurve': {'type': 'exponential', 'parameters': {'k': 3}}}]
+
+
+def brute_force_scores(weights, preferences):
+    """(combos,) scores of the full grid under one (issues x parties) raw weight set."""
+    party_ids = list(UTILITIES)
+    utilities = {pid: {issue['id']: float(weights[i, p]) for i, issue in enumerate(ISSUES)}
+                 for p, pid in enumerate(party_ids)}
+    engine = UtilityEngine(ISSUES, utilities, party_ids, curves=curves_from_preferences(preferences))
+    combos = np.array(list(product(*engine.grids(6))))
+    return aggregate_scores(engine.party_utilities(combos), 'nash')
+
+
+@pytest.mark.parametrize('mode', MODES)
+@pytest.mark.parametrize('preferences', [None, CURVES])
+def test_recommendations_match_rescoring_each_weight_set(mode, preferences):
+    engine = UtilityEngine(ISSUES, UTILITIES, curves=curves_from_preferences(preferences))
+    combos = np.array(list(product(*engine.grids(6))))
+    features = party_features(engine, engine.normalize(combos))
+    raw = raw_weight_matrix(ISSUES, UTILITIES, engine.party_ids)
+    weights, _ = perturbed_weights(raw, mode, 0.3, 40, seed=5)
+    # A small element budget forces several batches
+    best, scores = recommendations(features, weights, 'nash', max_elements=5_000)
+    for sample, index, score in zip(weights, best, scores):
+        expected = brute_force_scores(sample, preferences)
+        assert score == pytest.approx(expected.max())
+        assert expected[index] == pytest.approx(expected.max())
+
+
+def test_tipping_points_and_flip_rate_match_brute_force():
+    engine = UtilityEngine(ISSUES, UTILITIES)
+    combos = np.array(list(product(*engine.grids(6))))
+    raw = raw_weight_matrix(ISSUES, UTILITIES, engine.party_ids)
+    baseline_scores = brute_force_scores(raw, None)
+    baseline = int(np.argmax(baseline_scores))
+    factors = np.linspace(0.5, 1.5, 11)
+    tipping = tipping_points(party_features(engine, engine.normalize(combos)), raw, 'nash', baseline, factors)
+    for i in range(len(ISSUES)):
+        for p in range(len(UTILITIES)):
+            flips = []
+            for factor in factors:
+                weights = raw.copy()
+                weights[i, p] *= factor
+                scores = brute_force_scores(weights, None)
+                flips.append(scores[baseline] < scores.max() - 1e-12)
+            up = [f - 1 for f, flip in zip(factors, flips) if flip and f > 1]
+            down = [1 - f for f, flip in zip(factors, flips) if flip and f < 1]
+            assert np.nan_to_num(tipping['increase'][i, p], nan=-1) == pytest.approx(min(up) if up else -1)
+            assert np.nan_to_num(tipping['decrease'][i, p], nan=-1) == pytest.approx(min(down) if down else -1)
+
+    result = analyze_bundle_sensitivity(ISSUES, UTILITIES, grid_resolution=6, samples=60, seed=2,
+                                        magnitude=0.3, use_cache=False)
+    assert result['status'] == 'success'
+    assert result['baseline']['values'] == dict(zip(engine.issue_ids, combos[baseline].tolist()))
+    weights, _ = perturbed_weights(raw, 'independent', 0.3, 60, seed=2)
+    flips = [brute_force_scores(w, None)[baseline] < brute_force_scores(w, None).max() - 1e-12 for w in weights]
+    assert result['flip_rate'] == pytest.approx(np.mean(flips))
@@ -0,0 +1,72 @@
+"""Shapley attribution against exact enumeration of party orders."""
+from itertools import permutations, product
+from math import factorial
+
+import numpy as np
+import pytest
+
+from workers.engine.shapley import shapley_values
+from workers.engine.utility import UtilityEngine, aggregate_scores
+from workers.tasks.bundle_optimizer import attribute_party_contributions
+
+
+def make_problem(n_parties, seed):
+    rng = np.random.default_rng(seed)
+    issues = [{'id': f'i{i}', 'minValue': 0, 'maxValue': 10} for i in range(3)]
+    utilities = {f'p{p}': {issue['id']: float(rng.uniform(-0.5, 1.0)) for issue in issues}
+                 for p in range(n_parties)}
+    return issues, utilities
+
+
+def party_utilities(issues, utilities, resolution=5):
+    engine = UtilityEngine(issues, utilities)
+    return engine.party_utilities(np.array(list(product(*engine.grids(resolution)))))
+
+
+def brute_force_shapley(party_utils, method):
+    """Average marginal contribution over every party order, coalitions scored from scratch."""
+    n = party_utils.shape[1]
+
+    def value(members):
+        return float(aggregate_scores(party_utils[:, sorted(members)], method).max()) if members else 0.0
+
+    values = np.zeros(n)
+    for order in permutations(range(n)):
+        before = []
+        for p in order:
+            values[p] += value(before + [p]) - value(before)
+            before.append(p)
+    return values / factorial(n)
+
+
+@pytest.mark.parametrize('method', ['wsw', 'nash'])
+def test_exact_values_match_every_party_order(method):
+    utils = party_utilities(*make_problem(4, seed=1))
+    expected = brute_force_shapley(utils, method)
+    exact = shapley_values(utils, method)
+    assert exact['exact']
+    assert exact['values'] == pytest.approx(expected)
+    assert exact['coalitions'] == 2 ** 4 - 1  # every non-empty coalition, scored once
+
+    sampled = shapley_values(utils, method, exact_parties=0, max_permutations=4000, min_permutations=4000)
+    assert not sampled['exact']
+    assert sampled['values'].sum() == pytest.approx(exact['grand_value'])
+    assert np.all(np.abs(sampled['values'] - expected) <= 4 * sampled['standard_errors'] + 1e-9)
+
+
+def test_task_sampling_and_shards_agree_with_exact_values():
+    issues, utilities = make_problem(9, seed=2)
+    utils = party_utilities(issues, utilities, resolution=3)
+    exact = shapley_values(utils, 'wsw', exact_parties=9)['values']
+
+    result = attribute_party_contributions(issues, utilities, grid_resolution=3, max_permutations=3000,
+                                           tolerance=0.002, use_cache=False)
+    sharded = attribute_party_contributions(issues, utilities, grid_resolution=3, max_permutations=3000,
+                                            tolerance=0.002, use_cache=False, shards=3)
+    for run in (result, sharded):
+        assert run['status'] == 'success' and not run['exact']
+        values = np.array([run['shapley_values'][pid] for pid in run['party_ids']])
+        errors = np.array([run['standard_errors'][pid] for pid in run['party_ids']])
+        assert values.sum() == pytest.approx(run['grand_value'])
+        assert np.all(np.abs(values - exact) <= 4 * errors + 1e-9)
+    assert sharded['shards'] == 3
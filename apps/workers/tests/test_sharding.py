@@ -0,0 +1,43 @@
+"""Sharded bundle optimization merges to the single-pass result."""
+import json
+
+import numpy as np
+
+from workers.engine.enumeration import grid_size, shard_ranges
+from workers.tasks.bundle_optimizer import merge_bundle_shards, optimize_bundle_shard, optimize_bundles
+
+ISSUES = [{'id': f'i{i}', 'minValue': 0, 'maxValue': 10 * (i + 1)} for i in range(3)]
+UTILITIES = {'a': {'i0': 0.6, 'i1': 0.1, 'i2': 0.3}, 'b': {'i0': 0.1, 'i1': 0.8, 'i2': 0.1},
+             'c': {'i0': 0.3, 'i1': 0.3, 'i2': 0.4}, 'd': {'i0': 0.5, 'i2': 0.5}}
+
+
+def frontier(result):
+    return sorted(tuple(np.round(list(point['values'].values()), 9)) for point in result['pareto'])
+
+
+def test_shard_ranges_tile_the_grid():
+    grids = [np.arange(5.0), np.arange(3.0), np.arange(4.0)]
+    for shards in (1, 2, 3, 5, 8):
+        ranges = shard_ranges(grids, shards)
+        assert ranges[0][0] == 0 and ranges[-1][1] == grid_size(grids)
+        assert all(stop == start for (_, stop), (start, _) in zip(ranges, ranges[1:]))
+        assert len(ranges) == min(shards, 5)
+
+
+def test_shards_match_a_single_pass():
+    single = optimize_bundles(ISSUES, UTILITIES, grid_resolution=6, use_cache=False, max_points=10_000)
+    sharded = optimize_bundles(ISSUES, UTILITIES, grid_resolution=6, use_cache=False, max_points=10_000, shards=4)
+    assert sharded['status'] == 'success'
+    assert sharded['shards'] == 4
+    assert sharded['best'] == single['best']
+    assert frontier(sharded) == frontier(single)
+
+
+def test_merge_survives_json_round_trips_in_any_order():
+    single = optimize_bundles(ISSUES, UTILITIES, method='wsw', grid_resolution=5, use_cache=False)
+    grids = [np.zeros(5)] * 3
+    parts = [json.loads(json.dumps(optimize_bundle_shard(ISSUES, UTILITIES, 'wsw', 5, lo, hi)))
+             for lo, hi in shard_ranges(grids, 3)]
+    merged = merge_bundle_shards(parts[::-1], ISSUES, UTILITIES, 'wsw', 500, 125, 125)
+    assert merged['best'] == single['best']
+    assert frontier(merged) == frontier(single)
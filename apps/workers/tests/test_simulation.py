@@ -0,0 +1,58 @@
+"""Multi-round negotiation simulation."""
+import numpy as np
+import pytest
+
+from workers.tasks.negotiation_simulator import simulate_negotiation
+from workers.tasks.offer_proposer import propose_round
+
+PARTIES = [{'id': 'a', 'name': 'Alpha'}, {'id': 'b', 'name': 'Beta'}, {'id': 'c', 'name': 'Gamma'}]
+ISSUES = [{'id': 'price', 'minValue': 0, 'maxValue': 100}, {'id': 'term', 'minValue': 0, 'maxValue': 20}]
+PREFERENCES = {
+    'a': {'price': {'weight': 0.9, 'reservation_value': 50, 'target_value': 90, 'current_value': 80},
+          'term': {'weight': 0.4, 'reservation_value': 5, 'target_value': 15, 'current_value': 12}},
+    'b': {'price': {'weight': 0.3, 'reservation_value': 70, 'target_value': 30, 'current_value': 40},
+          'term': {'weight': 0.6, 'reservation_value': 12, 'target_value': 4, 'current_value': 6}},
+    'c': {'price': {'weight': 0.5, 'reservation_value': 40, 'target_value': 60, 'current_value': 55}},
+}
+
+
+def replay(rounds):
+    """Drive propose_round round after round, feeding the offers back as history."""
+    prefs = {pid: {iid: dict(pref) for iid, pref in issues.items()} for pid, issues in PREFERENCES.items()}
+    names = {party['id']: party['name'] for party in PARTIES}
+    history, values = [], []
+    for round_number in range(1, rounds + 1):
+        offers = propose_round(PARTIES, ISSUES, prefs, round_number, history)['offers']
+        for offer in offers:
+            prefs.setdefault(offer['party_id'], {}).setdefault(offer['issue_id'], {})['current_value'] = \
+                offer['proposed_value']
+            history.append({'party_name': names[offer['party_id']], 'proposed_value': offer['proposed_value']})
+        values.append([[offer['proposed_value'] for offer in offers[p * len(ISSUES):(p + 1) * len(ISSUES)]]
+                       for p in range(len(PARTIES))])
+    return np.array(values)
+
+
+def test_trajectory_matches_replayed_rounds():
+    result = simulate_negotiation(PARTIES, ISSUES, PREFERENCES, max_rounds=8, tolerance=0.0, patience=0)
+    assert result['status'] == 'success'
+    assert result['outcome'] == 'round_limit'
+    assert result['rounds'] == 8
+    np.testing.assert_allclose(result['trajectory']['values'], replay(8))
+
+
+def test_stops_on_agreement_or_deadlock():
+    agreed = simulate_negotiation(PARTIES, ISSUES, PREFERENCES, max_rounds=50, tolerance=1.0)
+    assert agreed['outcome'] == 'converged'
+    spans = {'price': 100.0, 'term': 20.0}
+    assert all(spread <= spans[iid] for iid, spread in agreed['metrics']['final_spread'].items())
+    assert agreed['metrics']['agreement'] == pytest.approx(
+        dict(zip(['price', 'term'], np.mean(agreed['trajectory']['values'][-1], axis=0))))
+
+    # High-weight parties turn hardline after small steps and hold far apart
+    apart = {'a': {'price': {'weight': 0.9, 'reservation_value': 60, 'target_value': 90, 'current_value': 80}},
+             'b': {'price': {'weight': 0.9, 'reservation_value': 10, 'target_value': 30, 'current_value': 25}}}
+    stuck = simulate_negotiation(PARTIES[:2], ISSUES[:1], apart, max_rounds=200, tolerance=0.0, patience=3)
+    assert stuck['outcome'] == 'deadlock'
+    assert stuck['trajectory']['max_move'][-3:] == [0.0, 0.0, 0.0]
+    assert stuck['metrics']['agreement'] is None
+    assert set(np.array(stuck['trajectory']['strategies'][-1]).ravel()) == {1}  # maintain_position
@@ -0,0 +1,148 @@
+"""Incremental ZOPA index, in memory and stored in Redis sorted sets."""
+import numpy as np
+import pytest
+
+from workers.engine.zopa_index import ZopaIndex
+from workers.tasks import zopa_checker
+from workers.tasks.zopa_checker import check_zopa, update_zopa_index, zopa_index_key
+
+ISSUES = [{'id': f'i{i}', 'minValue': 0, 'maxValue': 100} for i in range(6)]
+
+
+def assert_matches_check_zopa(index, reservations, targets):
+    expected = check_zopa(ISSUES, reservations, targets)
+    snapshot = index.snapshot()
+    assert snapshot['all_issues_have_zopa'] == expected['all_issues_have_zopa']
+    for got, want in zip(snapshot['issues'], expected['issues']):
+        assert got['has_zopa'] == want['has_zopa'], got['issue_id']
+        if want['has_zopa']:
+            assert got['interval'] == pytest.approx(want['interval'])
+
+
+def random_update(rng, reservations, targets, step):
+    if rng.random() < 0.05 and len(reservations) > 1:
+        party_id = str(rng.choice(sorted(reservations)))
+        del reservations[party_id], targets[party_id]
+        return {'party_id': party_id, 'remove': True}
+    party_id = f'new{step}' if rng.random() < 0.05 else str(rng.choice(sorted(reservations)))
+    issue_id = ISSUES[rng.integers(len(ISSUES))]['id']
+    reservation, target = (float(v) for v in rng.uniform(0, 100, size=2))
+    reservations.setdefault(party_id, {})[issue_id] = reservation
+    targets.setdefault(party_id, {})[issue_id] = target
+    return {'party_id': party_id, 'issue_id': issue_id, 'reservation': reservation, 'target': target}
+
+
+def initial_values(rng, parties=8):
+    reservations = {f'p{p}': {issue['id']: float(rng.uniform(0, 40)) for issue in ISSUES} for p in range(parties)}
+    targets = {p: {issue['id']: float(rng.uniform(60, 100)) for issue in ISSUES} for p in reservations}
+    return reservations, targets
+
+
+def test_index_tracks_check_zopa_through_random_updates():
+    rng = np.random.default_rng(0)
+    reservations, targets = initial_values(rng)
+    index = ZopaIndex.build(ISSUES, reservations, targets)
+    assert_matches_check_zopa(index, reservations, targets)
+    for step in range(400):
+        update = random_update(rng, reservations, targets, step)
+        before = dict(index.zopa)
+        if update.get('remove'):
+            deltas = index.remove_party(update['party_id'])
+        else:
+            deltas = index.update(update['party_id'], update['issue_id'], update['reservation'], update['target'])
+        assert {delta['issue_id'] for delta in deltas} == {iid for iid in before if index.zopa[iid] != before[iid]}
+        assert_matches_check_zopa(index, reservations, targets)
+
+    restored = ZopaIndex.from_dict(index.to_dict())
+    assert restored.zopa == index.zopa
+
+
+def assert_stored_matches(fake_redis, reservations, targets, negotiation_id='n1'):
+    key = zopa_index_key(negotiation_id)
+    assert_matches_check_zopa(ZopaIndex.load(fake_redis, key), reservations, targets)
+    expected = check_zopa(ISSUES, reservations, targets)
+    assert ZopaIndex.open_issues(fake_redis, key) == sum(not item['has_zopa'] for item in expected['issues'])
+
+
+def test_stored_index_tracks_check_zopa_through_random_batches(fake_redis, monkeypatch):
+    monkeypatch.setattr(zopa_checker, '_redis', fake_redis)
+    rng = np.random.default_rng(1)
+    reservations, targets = initial_values(rng)
+    built = update_zopa_index('n1', [], ISSUES, reservations, targets, publish=False)
+    assert built['status'] == 'success'
+    assert len(built['issues']) == len(ISSUES)
+
+    for step in range(150):
+        before = check_zopa(ISSUES, reservations, targets)['issues']
+        # Batches repeat parties, so the top-k reads must skip every party in the batch
+        batch = [random_update(rng, reservations, targets, f'{step}.{i}') for i in range(rng.integers(1, 5))]
+        result = update_zopa_index('n1', batch, publish=False)
+        assert result['status'] == 'success'
+        after = check_zopa(ISSUES, reservations, targets)
+        assert result['all_issues_have_zopa'] == after['all_issues_have_zopa']
+        changed = {b['issue_id'] for b, a in zip(before, after['issues'])
+                   if b['has_zopa'] != a['has_zopa'] or b['interval'] != pytest.approx(a['interval'])}
+        assert {delta['issue_id'] for delta in result['deltas']} == changed
+        assert_stored_matches(fake_redis, reservations, targets)
+
+
+def test_stored_update_reads_do_not_grow_with_the_parties(fake_redis, monkeypatch):
+    monkeypatch.setattr(zopa_checker, '_redis', fake_redis)
+    rng = np.random.default_rng(3)
+    reservations, targets = initial_values(rng, parties=200)
+    update_zopa_index('n1', [], ISSUES, reservations, targets, publish=False)
+    for step in range(50):
+        party_id = f'p{rng.integers(200)}'
+        update = {'party_id': party_id, 'issue_id': 'i2', 'reservation': float(rng.uniform(0, 100))}
+        reservations[party_id]['i2'] = update['reservation']
+        reads = fake_redis.reads
+        assert update_zopa_index('n1', [update], publish=False)['status'] == 'success'
+        # The party's values on the issue plus the top two of each bound set
+        assert fake_redis.reads - reads <= 5
+    assert_stored_matches(fake_redis, reservations, targets)
+
+
+def test_concurrent_updates_of_one_issue_both_land(fake_redis, monkeypatch):
+    monkeypatch.setattr(zopa_checker, '_redis', fake_redis)
+    issues = ISSUES[:1]
+    update_zopa_index('n1', [], issues, {'a': {'i0': 0}, 'b': {'i0': 0}}, {'a': {'i0': 100}, 'b': {'i0': 100}},
+                      publish=False)
+
+    apply = ZopaIndex.apply
+    calls = []
+
+    def racing_apply(pipe, key, updates, ttl=None):
+        applied = apply(pipe, key, updates, ttl)
+        calls.append(updates)
+        if len(calls) == 1:
+            # Another worker narrows b's range between this read and EXEC
+            other = update_zopa_index('n1', [{'party_id': 'b', 'issue_id': 'i0', 'target': 50}], publish=False)
+            assert other['deltas'] == [{'issue_id': 'i0', 'has_zopa': True, 'interval': [0.0, 50.0]}]
+        return applied
+
+    monkeypatch.setattr(ZopaIndex, 'apply', staticmethod(racing_apply))
+    result = update_zopa_index('n1', [{'party_id': 'a', 'issue_id': 'i0', 'reservation': 60}], publish=False)
+    assert len(calls) == 3  # the first attempt, the concurrent update, the retry
+    assert result['deltas'] == [{'issue_id': 'i0', 'has_zopa': False, 'interval': None}]
+    assert not result['all_issues_have_zopa']
+    key = zopa_index_key('n1')
+    assert ZopaIndex.open_issues(fake_redis, key) == 1
+    assert ZopaIndex.load(fake_redis, key).values == {'a': {'i0': (60.0, 100.0)}, 'b': {'i0': (0.0, 50.0)}}
+
+
+def test_rebuild_drops_the_old_issues(fake_redis, monkeypatch):
+    monkeypatch.setattr(zopa_checker, '_redis', fake_redis)
+    rng = np.random.default_rng(4)
+    reservations, targets = initial_values(rng)
+    update_zopa_index('n1', [], ISSUES, reservations, targets, publish=False)
+    rebuilt = update_zopa_index('n1', [], ISSUES[:2], {'a': {'i0': 10}}, {'a': {'i0': 20}}, publish=False)
+    assert [item['issue_id'] for item in rebuilt['issues']] == ['i0', 'i1']
+    assert not any(':i5:' in key for key in fake_redis.data)
+    stored = ZopaIndex.load(fake_redis, zopa_index_key('n1'))
+    assert stored.zopa == {'i0': (10.0, 20.0), 'i1': (0.0, 100.0)}
+
+
+def test_update_without_a_stored_index_fails(fake_redis, monkeypatch):
+    monkeypatch.setattr(zopa_checker, '_redis', fake_redis)
+    result = update_zopa_index('missing', [{'party_id': 'a', 'issue_id': 'i0', 'reservation': 1}], publish=False)
+    assert result['status'] == 'failed'
@@ -9,6 +9,8 @@ celery_app = Celery(
         "workers.tasks.intake_normalizer",
         "workers.tasks.position_drafter", 
         "workers.tasks.bundle_optimizer",
+        "workers.tasks.negotiation_simulator",
+        "workers.tasks.offer_proposer",
         "workers.tasks.zopa_checker",
         "workers.tasks.risk_engine",
         "workers.tasks.transcript_writer",
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -14,6 +14,24 @@ class Settings(BaseSettings):
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Bundle optimization cache (Redis tier is off unless a URL is set)
+    BUNDLE_CACHE_SIZE: int = 256
+    # Per-worker budget for cached grids and utility columns
+    BUNDLE_CACHE_BYTES: int = 256 * 1024 * 1024
+    BUNDLE_CACHE_REDIS_URL: Optional[str] = None
+    BUNDLE_CACHE_TTL: int = 3600
+
+    # Position brief memo cache (Redis tier is off unless a URL is set)
+    BRIEF_CACHE_SIZE: int = 2048
+    BRIEF_CACHE_REDIS_URL: Optional[str] = None
+    BRIEF_CACHE_TTL: int = 24 * 3600
+
+    # Live ZOPA index kept in Redis (settings.REDIS_URL) between update tasks
+    ZOPA_INDEX_TTL: int = 24 * 3600
+
+    # Live risk trees kept in Redis (settings.REDIS_URL) between evaluate_risk_tree calls
+    RISK_TREE_TTL: int = 24 * 3600
     
     # External Services
     ORCHESTRATOR_URL: str = "http://localhost:3002"
@@ -0,0 +1,173 @@
+"""Exact best-bundle search by branch and bound over the per-issue grids.
+
+Party utilities are sums of per-issue contributions, so once some issues are
+fixed, the open issues can add at most their best per-value contribution to
+each party's utility, and to any non-negative weighted sum of utilities. That
+gives an optimistic score for the whole subtree, and subtrees that cannot
+beat the incumbent are dropped without being enumerated:
+
+- wsw:  the fixed welfare plus each open issue's best welfare contribution
+- nash: the largest product of utilities under the per-party caps and one
+        weighted-sum cap, found by water-filling, taking the smaller of the
+        welfare direction and the incumbent's supporting direction (weights
+        1/u, the tangent of the Nash product at the incumbent); bundles that
+        leave some party below the Nash floor are bounded separately
+
+Issues are branched on in order of how much they can move utilities, and
+children are visited best bound first. The incumbent starts from a
+coordinate-ascent pass so pruning bites from the first node. The result is the
+grid's exact argmax; ties go to the lowest flat grid index, as in enumeration.
+"""
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import time
+import numpy as np
+
+from .enumeration import RunningBest
+from .utility import NASH_FLOOR, UtilityEngine, aggregate_scores
+
+BOUNDED_METHODS = ('nash', 'wsw')
+
+# Relative slack on bound comparisons so float rounding never prunes a tie
+BOUND_TOLERANCE = 1e-9
+
+
+def branch_and_bound(engine: UtilityEngine, grids: Sequence[np.ndarray], method: str = 'nash',
+                     max_nodes: Optional[int] = None,
+                     time_budget: Optional[float] = None) -> Tuple[RunningBest, Dict[str, Any]]:
+    """Find the best-scoring bundle of the grid product without enumerating it.
+
+    max_nodes, time_budget: stop after this many expanded nodes / seconds and
+        return the incumbent (stats report exact=False)
+    Returns (best, stats) with stats { nodes, pruned, leaves, exact }: expanded
+    nodes, subtrees cut by the bound, and bundles actually scored.
+    """
+    if method not in BOUNDED_METHODS:
+        raise ValueError(f"Branch and bound supports {', '.join(BOUNDED_METHODS)}, not {method}")
+    best = RunningBest()
+    stats = {'nodes': 0, 'pruned': 0, 'leaves': 0, 'exact': True}
+    n_issues = len(grids)
+    if n_issues == 0 or any(len(grid) == 0 for grid in grids):
+        return best, stats
+
+    contrib = _contributions(engine, grids)
+    shape = tuple(len(grid) for grid in grids)
+
+    # Branch first on the issues whose value moves utilities most
+    order = sorted(range(n_issues), key=lambda i: -float(np.ptp(contrib[i], axis=0).sum()))
+    score, digits, utils = _coordinate_ascent(contrib, method)
+    incumbent = [score, int(np.ravel_multi_index(tuple(digits), shape)), digits]
+    directions = np.ones((1, engine.n_parties))
+    if method == 'nash':
+        directions = np.vstack([directions, 1.0 / np.maximum(utils, NASH_FLOOR)])
+
+    # Best utility per party, and best weighted sum per direction, that the
+    # issues from a depth on can still add
+    upper = np.zeros((n_issues + 1, engine.n_parties))
+    reach = np.zeros((n_issues + 1, len(directions)))
+    for depth in range(n_issues - 1, -1, -1):
+        block = contrib[order[depth]]
+        upper[depth] = upper[depth + 1] + block.max(axis=0)
+        reach[depth] = reach[depth + 1] + (block @ directions.T).max(axis=0)
+
+    started = time.monotonic()
+    stack = [(np.inf, 0, np.zeros(engine.n_parties), np.zeros(n_issues, dtype=np.int64))]
+    while stack:
+        if ((max_nodes is not None and stats['nodes'] >= max_nodes)
+                or (time_budget is not None and time.monotonic() - started >= time_budget)):
+            stats['exact'] = False
+            break
+        bound, depth, partial, path = stack.pop()
+        if bound < incumbent[0] - _slack(incumbent[0]):
+            stats['pruned'] += 1
+            continue
+        stats['nodes'] += 1
+        issue = order[depth]
+        children = partial + contrib[issue]
+
+        if depth == n_issues - 1:
+            scores = aggregate_scores(children, method)
+            stats['leaves'] += len(scores)
+            b = int(np.argmax(scores))
+            path = path.copy()
+            path[issue] = b
+            flat = int(np.ravel_multi_index(tuple(path), shape))
+            if scores[b] > incumbent[0] or (scores[b] == incumbent[0] and flat < incumbent[1]):
+                incumbent = [float(scores[b]), flat, path]
+            continue
+
+        rest = depth + 1
+        if method == 'wsw':
+            bounds = children.sum(axis=1) + reach[rest, 0]
+        else:
+            caps = children @ directions.T + reach[rest]
+            bounds = np.min([_nash_bound(children + upper[rest], direction, caps[:, k])
+                             for k, direction in enumerate(directions)], axis=0)
+        keep = np.flatnonzero(bounds >= incumbent[0] - _slack(incumbent[0]))
+        stats['pruned'] += len(bounds) - len(keep)
+        # Push worst first so the most promising child is expanded next
+        for value in keep[np.argsort(bounds[keep], kind='stable')]:
+            child = path.copy()
+            child[issue] = value
+            stack.append((float(bounds[value]), depth + 1, children[value], child))
+
+    combo = np.array([grid[d] for grid, d in zip(grids, incumbent[2])], dtype=float)[None, :]
+    utils = engine.party_utilities(combo)
+    best.update(incumbent[1], combo, utils, engine.score(utils, method))
+    return best, stats
+
+
+def _contributions(engine: UtilityEngine, grids: Sequence[np.ndarray]) -> List[np.ndarray]:
+    """Per issue, the (grid values x parties) utility each value adds to each party."""
+    return [engine.issue_contributions(i, grid) for i, grid in enumerate(grids)]
+
+
+def _nash_bound(upper: np.ndarray, direction: np.ndarray, cap: np.ndarray) -> np.ndarray:
+    """Largest product of floored utilities with u <= upper per party and direction . u <= cap.
+
+    upper: (nodes x parties) utility caps; direction: (parties,) positive weights;
+    cap: (nodes,) bound on the weighted sum
+    """
+    n_parties = upper.shape[1]
+    if n_parties == 0:
+        return np.ones(len(upper))
+    upper = np.maximum(upper, NASH_FLOOR)
+    # A party below the floor scores the floor, the others at most their caps
+    below = NASH_FLOOR * np.prod(upper, axis=1) / upper.min(axis=1)
+    # Otherwise every u >= floor and, scaled to y = direction * u, the cap is a
+    # plain sum, so the best product comes from water-filling
+    scaled = direction * upper
+    caps = np.sort(scaled, axis=1)
+    # Water level with the j smallest caps saturated; the first consistent j is the solution
+    saturated = np.concatenate([np.zeros((len(caps), 1)), np.cumsum(caps, axis=1)[:, :-1]], axis=1)
+    levels = (cap[:, None] - saturated) / (n_parties - np.arange(n_parties))
+    consistent = levels <= caps
+    level = levels[np.arange(len(caps)), np.argmax(consistent, axis=1)]
+    level = np.where(consistent.any(axis=1), level, np.inf)
+    filled = np.minimum(scaled, level[:, None]) / direction
+    return np.maximum(np.prod(np.maximum(filled, NASH_FLOOR), axis=1), below)
+
+
+def _coordinate_ascent(contrib: List[np.ndarray], method: str,
+                       sweeps: int = 10) -> Tuple[float, np.ndarray, np.ndarray]:
+    """Local optimum on the grid: start from the welfare argmax, then improve one issue at a time.
+
+    Returns (score, grid digits, party utilities).
+    """
+    digits = np.array([int(np.argmax(c.sum(axis=1))) for c in contrib], dtype=np.int64)
+    utils = sum(c[d] for c, d in zip(contrib, digits))
+    score = float(aggregate_scores(utils[None, :], method)[0])
+    for _ in range(sweeps):
+        improved = False
+        for i, c in enumerate(contrib):
+            scores = aggregate_scores(utils - c[digits[i]] + c, method)
+            b = int(np.argmax(scores))
+            if scores[b] > score and b != digits[i]:
+                utils = utils - c[digits[i]] + c[b]
+                digits[i], score, improved = b, float(scores[b]), True
+        if not improved:
+            break
+    return score, digits, utils
+
+
+def _slack(score: float) -> float:
+    return BOUND_TOLERANCE * max(1.0, abs(score))
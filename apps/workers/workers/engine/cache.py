@@ -0,0 +1,216 @@
+"""Content-addressed caches for worker results.
+
+:class:`MemoCache` memoizes JSON results of pure functions under a content
+hash of their inputs. :class:`BundleCache` extends it for bundle optimization.
+
+Entries are keyed by a hash of the inputs they depend on, so a what-if run
+that changes one party's weights reuses the grid, the normalized issue matrix
+and every other party's utility column:
+
+- grid:   (issues, grid values, bundles) -> combos and normalized issue matrix
+- column: (grid key, party weights, curves) -> that party's utility column
+- result: (issues, utilities, method, max_points, ...) -> the task result
+
+An in-process LRU is always used; a Redis tier is consulted on local misses
+when a client is configured. The cache is best-effort: Redis errors are
+logged and treated as misses. Entries count against a byte budget as well as
+the entry limit (arrays by nbytes, results by serialized length). Arrays are
+stored read-only: every hit hands out the same arrays, so a caller writing
+into them would corrupt later hits.
+"""
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import copy
+import hashlib
+import io
+import json
+import structlog
+import numpy as np
+
+from .enumeration import iter_combination_chunks
+from .utility import UtilityEngine
+
+logger = structlog.get_logger()
+
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL = 3600
+# Above this many bundles the grid is streamed instead of materialized for caching
+MAX_CACHED_BUNDLES = 200_000
+
+
+def content_key(kind: str, *parts: Any, namespace: str = 'bundle') -> str:
+    """Stable key for JSON-serializable ``parts``; dict key order does not matter."""
+    payload = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return f"{namespace}:{kind}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+
+def issues_fingerprint(issues: List[Dict[str, Any]]) -> List[Tuple[str, float, float]]:
+    """The parts of ``issues`` that affect evaluation: id and range."""
+    return [(issue['id'], float(issue.get('minValue', 0)), float(issue.get('maxValue', 100))) for issue in issues]
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entries.
+
+    max_bytes: optional budget for the sizes passed to ``set``; entries are
+        evicted until both the entry count and the total size fit, and an
+        entry larger than the whole budget is not stored
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._data: 'OrderedDict[str, Any]' = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[Any]:
+        if key not in self._data:
+            return None
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def set(self, key: str, value: Any, nbytes: int = 0) -> None:
+        self._discard(key)
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            return
+        self._data[key] = value
+        self._sizes[key] = nbytes
+        self.nbytes += nbytes
+        while len(self._data) > self.max_entries or (self.max_bytes is not None and self.nbytes > self.max_bytes):
+            self._discard(next(iter(self._data)))
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._sizes.clear()
+        self.nbytes = 0
+
+    def _discard(self, key: str) -> None:
+        if key in self._data:
+            del self._data[key]
+            self.nbytes -= self._sizes.pop(key)
+
+
+class MemoCache:
+    """Two-tier memo of JSON values: in-process LRU, then optional Redis.
+
+    redis_client: optional redis.Redis used as a shared second tier
+    max_bytes: optional byte budget of the local tier; JSON values count their
+        serialized length, arrays their nbytes
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE, redis_client=None, ttl: int = DEFAULT_TTL,
+                 max_bytes: Optional[int] = None):
+        self.local = LRUCache(max_entries, max_bytes)
+        self.redis = redis_client
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is None and self.redis is not None:
+            raw = self._redis_get(key)
+            if raw is not None:
+                value = json.loads(raw)
+                self.local.set(key, value, len(raw))
+        self._count(value is not None)
+        return copy.deepcopy(value) if value is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        # The serialized length stands in for the in-memory size of JSON values
+        payload = json.dumps(value)
+        self.local.set(key, copy.deepcopy(value), len(payload))
+        if self.redis is not None:
+            self._redis_set(key, payload)
+
+    def clear(self) -> None:
+        self.local.clear()
+        self.hits = self.misses = 0
+
+    def _redis_get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.redis.get(key)
+        except Exception as e:
+            logger.warning("Cache read failed", key=key, error=str(e))
+            return None
+
+    def _redis_set(self, key: str, value) -> None:
+        try:
+            self.redis.set(key, value, ex=self.ttl)
+        except Exception as e:
+            logger.warning("Cache write failed", key=key, error=str(e))
+
+    def _count(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+
+class BundleCache(MemoCache):
+    """Two-tier cache of grids, party utility columns and optimization results."""
+
+    def grid(self, engine: UtilityEngine, grids: Sequence[np.ndarray],
+             stop: int) -> Tuple[str, np.ndarray, np.ndarray]:
+        """Return (grid key, combos, normalized) for the first ``stop`` bundles of the grid product."""
+        key = content_key('grid', issues_fingerprint(engine.issues), [np.asarray(g).tolist() for g in grids], stop)
+        cached = self._get_arrays(key)
+        if cached is not None:
+            return key, cached[0], cached[1]
+        combos = np.vstack([combos for _, combos in iter_combination_chunks(grids, stop=stop)] or
+                           [np.zeros((0, engine.n_issues))])
+        normalized = engine.normalize(combos)
+        self._set_arrays(key, [combos, normalized])
+        return key, combos, normalized
+
+    def party_columns(self, grid_key: str, engine: UtilityEngine, utilities: Dict[str, Dict[str, float]],
+                      normalized: np.ndarray) -> np.ndarray:
+        """(bundles x parties) utilities, re-scoring only parties whose weights changed."""
+        columns = []
+        for pid in engine.party_ids:
+            party_weights = {issue_id: (utilities.get(pid) or {}).get(issue_id, 0.0) for issue_id in engine.issue_ids}
+            key = content_key('column', grid_key, party_weights, engine.party_curves(pid))
+            cached = self._get_arrays(key)
+            if cached is not None:
+                columns.append(cached[0])
+                continue
+            column = engine.normalized_utilities(normalized, engine.party_ids.index(pid))
+            self._set_arrays(key, [column])
+            columns.append(column)
+        if not columns:
+            return np.zeros((len(normalized), 0))
+        return np.column_stack(columns)
+
+    def get_result(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.get(key)
+
+    def set_result(self, key: str, result: Dict[str, Any]) -> None:
+        self.set(key, result)
+
+    def _get_arrays(self, key: str) -> Optional[List[np.ndarray]]:
+        arrays = self.local.get(key)
+        if arrays is None and self.redis is not None:
+            raw = self._redis_get(key)
+            if raw is not None:
+                with np.load(io.BytesIO(raw)) as data:
+                    arrays = [data[name] for name in sorted(data.files, key=lambda n: int(n.split('_')[1]))]
+                self._store_arrays(key, arrays)
+        self._count(arrays is not None)
+        return arrays
+
+    def _set_arrays(self, key: str, arrays: List[np.ndarray]) -> None:
+        self._store_arrays(key, arrays)
+        if self.redis is not None:
+            buffer = io.BytesIO()
+            np.savez(buffer, *arrays)
+            self._redis_set(key, buffer.getvalue())
+
+    def _store_arrays(self, key: str, arrays: List[np.ndarray]) -> None:
+        for arr in arrays:
+            arr.flags.writeable = False
+        self.local.set(key, arrays, sum(arr.nbytes for arr in arrays))
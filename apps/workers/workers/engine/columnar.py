@@ -0,0 +1,96 @@
+"""Compact columnar encoding of Pareto frontiers.
+
+The point format repeats every issue and party id in each point:
+
+    [{ values: { issue_id: v }, party_utils: { party_id: u }, score }, ...]
+
+The columnar format lists the ids once and stores row-major flat arrays:
+
+    { format: 'columnar', encoding: 'list' | 'base64', count,
+      issue_ids, party_ids, values, party_utils, scores }
+
+With encoding='base64' the arrays are little-endian float32 buffers, which
+trades precision below ~1e-7 for a payload a fraction of the size.
+Consumers read either shape through :func:`iter_points`.
+"""
+from typing import Dict, Any, Iterator, List, Sequence, Tuple, Union
+import base64
+import numpy as np
+
+ENCODINGS = ('list', 'base64')
+
+Frontier = Union[List[Dict[str, Any]], Dict[str, Any]]
+
+
+def to_columnar(issue_ids: Sequence[str], party_ids: Sequence[str], values: np.ndarray, party_utils: np.ndarray,
+                scores: np.ndarray, encoding: str = 'list') -> Dict[str, Any]:
+    """Encode (points x issues) values, (points x parties) utilities and (points,) scores."""
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown columnar encoding: {encoding}")
+    values = np.asarray(values, dtype=float).reshape(-1, len(issue_ids))
+    party_utils = np.asarray(party_utils, dtype=float).reshape(-1, len(party_ids))
+    return {
+        'format': 'columnar',
+        'encoding': encoding,
+        'count': int(len(values)),
+        'issue_ids': list(issue_ids),
+        'party_ids': list(party_ids),
+        'values': _encode(values, encoding),
+        'party_utils': _encode(party_utils, encoding),
+        'scores': _encode(np.asarray(scores, dtype=float), encoding),
+    }
+
+
+def from_columnar(frontier: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Decode a columnar frontier into (values, party_utils, scores) arrays."""
+    encoding = frontier.get('encoding', 'list')
+    count = int(frontier.get('count', 0))
+    values = _decode(frontier['values'], encoding).reshape(count, len(frontier['issue_ids']))
+    party_utils = _decode(frontier['party_utils'], encoding).reshape(count, len(frontier['party_ids']))
+    return values, party_utils, _decode(frontier['scores'], encoding).reshape(count)
+
+
+def is_columnar(frontier: Any) -> bool:
+    return isinstance(frontier, dict) and frontier.get('format') == 'columnar'
+
+
+def frontier_size(frontier: Frontier) -> int:
+    """Number of points in a frontier of either shape."""
+    if is_columnar(frontier):
+        return int(frontier.get('count', 0))
+    return len(frontier or [])
+
+
+def iter_points(frontier: Frontier) -> Iterator[Dict[str, Any]]:
+    """Yield frontier points in the point format, whichever shape was stored."""
+    if not is_columnar(frontier):
+        yield from frontier or []
+        return
+    values, party_utils, scores = from_columnar(frontier)
+    for row in range(len(values)):
+        yield {
+            'values': dict(zip(frontier['issue_ids'], values[row].tolist())),
+            'party_utils': dict(zip(frontier['party_ids'], party_utils[row].tolist())),
+            'score': float(scores[row]),
+        }
+
+
+def points_to_columnar(points: List[Dict[str, Any]], issue_ids: Sequence[str], party_ids: Sequence[str],
+                       encoding: str = 'list') -> Dict[str, Any]:
+    """Convert point-format results to columnar; missing entries read as 0."""
+    values = [[p.get('values', {}).get(iid, 0.0) for iid in issue_ids] for p in points]
+    utils = [[p.get('party_utils', {}).get(pid, 0.0) for pid in party_ids] for p in points]
+    scores = [p.get('score', 0.0) for p in points]
+    return to_columnar(issue_ids, party_ids, values, utils, scores, encoding)
+
+
+def _encode(array: np.ndarray, encoding: str) -> Union[List[float], str]:
+    if encoding == 'base64':
+        return base64.b64encode(np.ascontiguousarray(array, dtype='<f4').tobytes()).decode('ascii')
+    return array.ravel().tolist()
+
+
+def _decode(data: Union[List[float], str], encoding: str) -> np.ndarray:
+    if encoding == 'base64':
+        return np.frombuffer(base64.b64decode(data), dtype='<f4').astype(float)
+    return np.asarray(data, dtype=float)
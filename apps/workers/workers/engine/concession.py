@@ -0,0 +1,203 @@
+"""Vectorized concession dynamics for offer proposal.
+
+Array versions of the per-offer rules in :mod:`workers.tasks.offer_proposer`
+(strategy selection, concession math, confidence and flexibility), applied to
+a whole (parties x issues) round at once. Strategies and patterns are held as
+small integer codes; the string names are the ones the scalar task returns.
+"""
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import numpy as np
+
+STRATEGIES = (
+    'opening_position', 'maintain_position', 'minimal_concession', 'moderate_concession',
+    'flexible_concession', 'hold_position', 'standard_concession',
+)
+OPENING, MAINTAIN, MINIMAL, MODERATE, FLEXIBLE, HOLD, STANDARD = range(len(STRATEGIES))
+
+# Share of the target-reservation span conceded per round, scaled by weight
+CONCESSION_RATES = np.array([0.0, 0.0, 0.05, 0.1, 0.15, 0.0, 0.08])
+
+PATTERNS = ('initial', 'insufficient_data', 'hardline', 'moderate', 'flexible')
+INITIAL, INSUFFICIENT, HARDLINE, MODERATE_PATTERN, FLEXIBLE_PATTERN = range(len(PATTERNS))
+
+FLEXIBILITY = ('low', 'moderate', 'high')
+
+# Weight cut-offs (high, mid) between the high/mid/low weight strategy rules
+DEFAULT_THRESHOLDS = (0.8, 0.5)
+
+
+def preference_arrays(parties: List[Dict[str, Any]], issues: List[Dict[str, Any]],
+                      preferences: Dict[str, Dict[str, Dict[str, Any]]]) -> Tuple[np.ndarray, ...]:
+    """(weight, reservation, target, current) arrays of shape (parties x issues).
+
+    preferences: { party_id: { issue_id: { weight, reservation_value, target_value, current_value } } }
+    Missing entries take propose_offer's defaults.
+    """
+    shape = (len(parties), len(issues))
+    weight, reservation, target, current = (np.empty(shape) for _ in range(4))
+    for p, party in enumerate(parties):
+        party_prefs = preferences.get(party.get('id'), {}) or {}
+        for i, issue in enumerate(issues):
+            pref = party_prefs.get(issue.get('id'), {}) or {}
+            weight[p, i] = pref.get('weight', 0.5)
+            reservation[p, i] = pref.get('reservation_value', 0)
+            target[p, i] = pref.get('target_value', 100)
+            current[p, i] = pref.get('current_value', 50)
+    return weight, reservation, target, current
+
+
+def concession_patterns(previous_offers: Optional[List[Dict[str, Any]]],
+                        party_names: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """Concession pattern per party from one pass over the offer history.
+
+    Matches offers by ``party_name`` like the scalar analysis. Returns
+    (pattern codes, mean concession, consistency labels), one entry per party.
+    """
+    n = len(party_names)
+    codes = np.full(n, INITIAL if not previous_offers else INSUFFICIENT, dtype=np.int64)
+    rates = np.zeros(n)
+    consistency = ['unknown'] * n
+    if not previous_offers:
+        return codes, rates, consistency
+
+    slot = {name: p for p, name in enumerate(party_names)}
+    last: List[Optional[float]] = [None] * n
+    concessions: List[List[float]] = [[] for _ in range(n)]
+    for offer in previous_offers:
+        p = slot.get(offer.get('party_name'))
+        if p is None:
+            continue
+        value = offer.get('proposed_value', 0)
+        if last[p] is not None:
+            concessions[p].append(abs(value - last[p]))
+        last[p] = value
+
+    for p, steps in enumerate(concessions):
+        if not steps:
+            continue
+        rates[p] = sum(steps) / len(steps)
+        codes[p] = _pattern_code(rates[p])
+        consistency[p] = 'consistent' if len(set(steps)) <= 2 else 'variable'
+    return codes, rates, consistency
+
+
+class ConcessionState:
+    """Running concession statistics per (party, issue), updated in O(1) per offer.
+
+    Replaces rescanning the offer history: each entry keeps the offer count,
+    the last value, Welford mean/variance of the absolute steps between
+    consecutive offers, and up to three distinct step sizes (enough to tell
+    'consistent' from 'variable'). Round-trips through to_dict/from_dict so it
+    can travel between tasks as JSON.
+
+    Each (party, issue) slot has a single writer: the proposal for that pair.
+    Tasks return only the slots they recorded (see :meth:`slots`), and the
+    caller folds them back with :meth:`merge`, so proposals running in
+    parallel on different pairs never overwrite each other's updates.
+    """
+
+    def __init__(self, entries: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.entries: Dict[str, Dict[str, Any]] = entries or {}
+
+    @staticmethod
+    def key(party_id: str, issue_id: str) -> str:
+        return f"{party_id}:{issue_id}"
+
+    def record(self, party_id: str, issue_id: str, value: float) -> None:
+        entry = self.entries.setdefault(self.key(party_id, issue_id),
+                                        {'count': 0, 'last': None, 'mean': 0.0, 'm2': 0.0, 'distinct': []})
+        if entry['last'] is not None:
+            step = abs(value - entry['last'])
+            steps = entry['count']  # steps recorded after this one
+            delta = step - entry['mean']
+            entry['mean'] += delta / steps
+            entry['m2'] += delta * (step - entry['mean'])
+            if step not in entry['distinct'] and len(entry['distinct']) < 3:
+                entry['distinct'].append(step)
+        entry['count'] += 1
+        entry['last'] = value
+
+    def pattern(self, party_id: str, issue_id: str) -> Dict[str, Any]:
+        """Concession pattern in the shape of the offer proposer's history analysis."""
+        if not self.entries:
+            return {"pattern": "initial", "concession_rate": 0.0, "consistency": "unknown"}
+        entry = self.entries.get(self.key(party_id, issue_id))
+        if not entry or entry['count'] < 2:
+            return {"pattern": "insufficient_data", "concession_rate": 0.0, "consistency": "unknown"}
+        rate = entry['mean']
+        return {
+            "pattern": PATTERNS[_pattern_code(rate)],
+            "concession_rate": rate,
+            "concession_variance": entry['m2'] / (entry['count'] - 1),
+            "consistency": "consistent" if len(entry['distinct']) <= 2 else "variable",
+        }
+
+    def pattern_codes(self, party_ids: Sequence[str], issue_ids: Sequence[str]) -> np.ndarray:
+        """(parties x issues) pattern codes for select_strategies."""
+        return np.array([[PATTERNS.index(self.pattern(pid, iid)['pattern']) for iid in issue_ids]
+                         for pid in party_ids], dtype=np.int64).reshape(len(party_ids), len(issue_ids))
+
+    def slots(self, pairs: Sequence[Tuple[str, str]]) -> 'ConcessionState':
+        """The entries of the given (party_id, issue_id) pairs only."""
+        keys = (self.key(party_id, issue_id) for party_id, issue_id in pairs)
+        return ConcessionState({key: self.entries[key] for key in keys if key in self.entries})
+
+    def merge(self, other: 'ConcessionState') -> 'ConcessionState':
+        """Take ``other``'s entries over this state's, slot by slot; returns self."""
+        self.entries.update({key: dict(entry, distinct=list(entry['distinct'])) for key, entry in other.entries.items()})
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'entries': self.entries}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'ConcessionState':
+        return cls({k: dict(v, distinct=list(v.get('distinct', []))) for k, v in ((data or {}).get('entries') or {}).items()})
+
+
+def _pattern_code(rate: float) -> int:
+    return HARDLINE if rate < 2 else MODERATE_PATTERN if rate < 5 else FLEXIBLE_PATTERN
+
+
+def select_strategies(round_number: int, weights: np.ndarray, patterns: np.ndarray,
+                      thresholds: Tuple[float, float] = DEFAULT_THRESHOLDS) -> np.ndarray:
+    """Strategy codes for (parties x issues) weights.
+
+    patterns: per-party (parties,) or per-pair (parties x issues) pattern codes
+
+    thresholds: (high, mid) weight cut-offs between the high/mid/low weight rules
+    """
+    weights = np.asarray(weights, dtype=float)
+    if round_number == 1:
+        return np.full(weights.shape, OPENING, dtype=np.int64)
+    high_cut, mid_cut = thresholds
+    hardline = np.asarray(patterns) == HARDLINE
+    if hardline.ndim == 1:
+        hardline = hardline[:, None]
+    high = np.where(hardline, MAINTAIN, MINIMAL)
+    mid = MODERATE if round_number > 3 else HOLD
+    low = FLEXIBLE if round_number > 2 else MODERATE
+    return np.where(weights > high_cut, high, np.where(weights > mid_cut, mid, low)).astype(np.int64)
+
+
+def proposed_values(current: np.ndarray, target: np.ndarray, reservation: np.ndarray,
+                    strategies: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Next offer values; concessions stop at the reservation value."""
+    opening = target * np.where(weights > 0.7, 0.9, 0.8)
+    conceded = np.maximum(current - (target - reservation) * CONCESSION_RATES[strategies] * weights, reservation)
+    held = (strategies == MAINTAIN) | (strategies == HOLD)
+    return np.where(strategies == OPENING, opening, np.where(held, current, conceded))
+
+
+def confidences(weights: np.ndarray, round_number: int) -> np.ndarray:
+    """Offer confidence in [0.1, 1.0]; decreases over rounds."""
+    round_factor = max(0.5, 1.0 - (round_number - 1) * 0.1)
+    return np.clip((np.asarray(weights, dtype=float) * 0.8 + 0.2) * round_factor, 0.1, 1.0)
+
+
+def flexibility(weights: np.ndarray, round_number: int) -> np.ndarray:
+    """Indices into FLEXIBILITY for each weight."""
+    weights = np.asarray(weights, dtype=float)
+    mid = 1 if round_number > 3 else 0
+    low = 2 if round_number > 2 else 1
+    return np.where(weights > 0.8, 0, np.where(weights > 0.5, mid, low)).astype(np.int64)
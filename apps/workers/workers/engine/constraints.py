@@ -0,0 +1,163 @@
+"""Compile red lines, must-haves and reservation values into feasible intervals.
+
+Every constraint restricts a single issue, so the feasible bundle set is the
+cartesian product of per-issue feasible values. Pruning each issue's grid
+before enumeration therefore removes every infeasible branch of the
+combination tree before any utility is computed.
+
+Constraint entries (in ``constraints.redLines`` / ``constraints.mustHaves`` on
+an issue or a preference) state the condition an outcome must satisfy:
+
+- ``"<= 30"``, ``"< 30"``, ``">= 10"``, ``"> 10"``, ``"== 5"``
+- ``"10-20"`` / ``"10..20"`` (inclusive range)
+- ``{"min": 10, "max": 20}`` (either side optional) or ``{"op": "<=", "value": 30}``
+
+Free-text entries that do not parse are kept out of the intervals and counted.
+A preference also contributes its reservation value: at least the
+reservation when the target lies above it, at most the reservation otherwise.
+"""
+from typing import Dict, Any, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import re
+import numpy as np
+
+TOLERANCE = 1e-9
+
+_COMPARISON = re.compile(r'^\s*(<=|>=|==|=|<|>)\s*(-?\d+(?:\.\d+)?)\s*%?\s*$')
+_RANGE = re.compile(r'^\s*(-?\d+(?:\.\d+)?)\s*(?:-|\.\.|to)\s*(-?\d+(?:\.\d+)?)\s*%?\s*$')
+
+
+class Interval(NamedTuple):
+    """Feasible values lo..hi; open ends exclude the bound itself."""
+    lo: float = -np.inf
+    hi: float = np.inf
+    lo_open: bool = False
+    hi_open: bool = False
+
+    def intersect(self, other: 'Interval') -> 'Interval':
+        if other.lo > self.lo or (other.lo == self.lo and other.lo_open):
+            lo, lo_open = other.lo, other.lo_open
+        else:
+            lo, lo_open = self.lo, self.lo_open
+        if other.hi < self.hi or (other.hi == self.hi and other.hi_open):
+            hi, hi_open = other.hi, other.hi_open
+        else:
+            hi, hi_open = self.hi, self.hi_open
+        return Interval(lo, hi, lo_open, hi_open)
+
+    def contains(self, values: np.ndarray) -> np.ndarray:
+        values = np.asarray(values, dtype=float)
+        above = values > self.lo + TOLERANCE if self.lo_open else values >= self.lo - TOLERANCE
+        below = values < self.hi - TOLERANCE if self.hi_open else values <= self.hi + TOLERANCE
+        return above & below
+
+    def to_list(self) -> List[Optional[float]]:
+        return [None if np.isinf(self.lo) else float(self.lo), None if np.isinf(self.hi) else float(self.hi)]
+
+
+def parse_constraint(entry: Any) -> Optional[Interval]:
+    """Interval for one constraint entry, or None when it is not numeric."""
+    if isinstance(entry, dict):
+        if 'op' in entry and 'value' in entry:
+            return _comparison(str(entry['op']), float(entry['value']))
+        if entry.get('min') is None and entry.get('max') is None:
+            return None
+        lo = float(entry['min']) if entry.get('min') is not None else -np.inf
+        hi = float(entry['max']) if entry.get('max') is not None else np.inf
+        return Interval(lo, hi)
+    if not isinstance(entry, str):
+        return None
+    match = _COMPARISON.match(entry)
+    if match:
+        return _comparison(match.group(1), float(match.group(2)))
+    match = _RANGE.match(entry)
+    if match:
+        a, b = float(match.group(1)), float(match.group(2))
+        return Interval(min(a, b), max(a, b))
+    return None
+
+
+def reservation_interval(reservation: Optional[float], target: Optional[float]) -> Optional[Interval]:
+    """Values a party can accept given its reservation and the side its target is on."""
+    if reservation is None:
+        return None
+    reservation = float(reservation)
+    if target is not None and float(target) < reservation:
+        return Interval(hi=reservation)
+    return Interval(lo=reservation)
+
+
+def feasible_intervals(issues: List[Dict[str, Any]], preferences: Optional[Any] = None,
+                       reservations: bool = True) -> Tuple[List[Interval], int]:
+    """One feasible interval per issue, plus the number of entries that did not parse.
+
+    preferences: normalized preference list ([{ partyId, issueId, reservationValue,
+        targetValue, constraints }]) or { party_id: { issue_id: preference } }
+    """
+    intervals = {issue['id']: Interval() for issue in issues}
+    unparsed = 0
+
+    def apply(issue_id: str, entries: Iterable[Any]) -> None:
+        nonlocal unparsed
+        for entry in entries:
+            interval = parse_constraint(entry)
+            if interval is None:
+                unparsed += 1
+            else:
+                intervals[issue_id] = intervals[issue_id].intersect(interval)
+
+    for issue in issues:
+        apply(issue['id'], _constraint_entries(issue.get('constraints')))
+    for issue_id, pref in _iter_preferences(preferences):
+        if issue_id not in intervals:
+            continue
+        apply(issue_id, _constraint_entries(pref.get('constraints')))
+        if reservations:
+            interval = reservation_interval(pref.get('reservationValue'), pref.get('targetValue'))
+            if interval is not None:
+                intervals[issue_id] = intervals[issue_id].intersect(interval)
+    return [intervals[issue['id']] for issue in issues], unparsed
+
+
+def prune_grids(grids: Sequence[np.ndarray], intervals: Sequence[Interval]) -> List[np.ndarray]:
+    """Keep only the grid values inside each issue's feasible interval."""
+    return [np.asarray(grid)[interval.contains(grid)] for grid, interval in zip(grids, intervals)]
+
+
+def feasible_mask(combos: np.ndarray, intervals: Sequence[Interval]) -> np.ndarray:
+    """Rows of (combos x issues) whose every value is feasible."""
+    mask = np.ones(len(combos), dtype=bool)
+    for i, interval in enumerate(intervals):
+        mask &= interval.contains(combos[:, i])
+    return mask
+
+
+def _comparison(op: str, value: float) -> Optional[Interval]:
+    if op == '<=':
+        return Interval(hi=value)
+    if op == '<':
+        return Interval(hi=value, hi_open=True)
+    if op == '>=':
+        return Interval(lo=value)
+    if op == '>':
+        return Interval(lo=value, lo_open=True)
+    if op in ('==', '='):
+        return Interval(value, value)
+    return None
+
+
+def _constraint_entries(constraints: Optional[Dict[str, Any]]) -> List[Any]:
+    if not constraints:
+        return []
+    return list(constraints.get('redLines') or []) + list(constraints.get('mustHaves') or [])
+
+
+def _iter_preferences(preferences: Optional[Any]) -> Iterable[Tuple[str, Dict[str, Any]]]:
+    if not preferences:
+        return
+    if isinstance(preferences, dict):
+        for party_prefs in preferences.values():
+            for issue_id, pref in (party_prefs or {}).items():
+                yield issue_id, pref or {}
+    else:
+        for pref in preferences:
+            yield pref.get('issueId'), pref
@@ -0,0 +1,115 @@
+"""Continuous-space bargaining solutions over the issue box.
+
+Party utilities are linear in the normalized issue values, so every solution
+is searched directly over [0, 1]^issues instead of a discretized grid:
+
+- nash:  maximize sum(log u_p) with L-BFGS-B from several starting points
+- kalai: Kalai-Smorodinsky, maximize t s.t. u_p >= t * ideal_p (an LP)
+- wsw:   maximize sum(u_p) (an LP)
+
+The disagreement point is zero utility for every party, matching the grid
+scoring in :mod:`workers.engine.utility`.
+"""
+from typing import Dict, Any
+import numpy as np
+from scipy.optimize import linprog, minimize
+
+from .utility import NASH_FLOOR, UtilityEngine
+
+OBJECTIVES = ('nash', 'kalai', 'wsw')
+
+
+def solve_continuous(engine: UtilityEngine, objective: str = 'nash', starts: int = 8, seed: int = 0) -> Dict[str, Any]:
+    """Solve one bargaining objective over the continuous issue box.
+
+    Returns { values, party_utils, score, success, evaluations } where values
+    are (issues,) issue values and party_utils are (parties,) utilities.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown continuous objective: {objective}")
+
+    active = np.flatnonzero(engine.active)
+    weights = engine.weights[active]
+    if objective == 'nash':
+        x, success, evaluations = _solve_nash(weights, starts, seed)
+    elif objective == 'kalai':
+        x, success, evaluations = _solve_kalai(weights)
+    else:
+        x, success, evaluations = _solve_wsw(weights)
+
+    normalized = np.zeros(engine.n_issues)
+    normalized[active] = x
+    values = engine.lo + normalized * engine.span
+    party_utils = normalized @ engine.weights
+    return {
+        'values': values,
+        'party_utils': party_utils,
+        'score': continuous_score(party_utils, weights, objective),
+        'success': success,
+        'evaluations': evaluations,
+    }
+
+
+def continuous_score(party_utils: np.ndarray, weights: np.ndarray, objective: str) -> float:
+    """Objective value of a solution: Nash product, min ideal ratio, or welfare sum."""
+    if objective == 'nash':
+        return float(np.prod(np.maximum(party_utils, NASH_FLOOR)))
+    if objective == 'kalai':
+        ideal = np.clip(weights, 0.0, None).sum(axis=0)
+        ratios = party_utils[ideal > 0] / ideal[ideal > 0]
+        return float(ratios.min()) if len(ratios) else 0.0
+    return float(party_utils.sum())
+
+
+def _solve_nash(weights: np.ndarray, starts: int, seed: int):
+    """Multi-start L-BFGS-B on the negative log Nash product."""
+    n = weights.shape[0]
+    if n == 0:
+        return np.zeros(0), True, 0
+
+    def objective(x):
+        u = np.maximum(x @ weights, NASH_FLOOR)
+        grad = -(weights @ np.where(x @ weights > NASH_FLOOR, 1.0 / u, 0.0))
+        return -np.sum(np.log(u)), grad
+
+    rng = np.random.default_rng(seed)
+    # Always try the box centre and the all-favourable corner before random starts
+    candidates = [np.full(n, 0.5), (weights.sum(axis=1) > 0).astype(float)]
+    candidates += [rng.random(n) for _ in range(max(0, starts - len(candidates)))]
+
+    best_x, best_f, success, evaluations = None, np.inf, False, 0
+    for x0 in candidates:
+        res = minimize(objective, x0, jac=True, method='L-BFGS-B', bounds=[(0.0, 1.0)] * n)
+        evaluations += int(res.nfev)
+        if res.fun < best_f:
+            best_x, best_f, success = np.clip(res.x, 0.0, 1.0), float(res.fun), bool(res.success)
+    return best_x, success, evaluations
+
+
+def _solve_kalai(weights: np.ndarray):
+    """LP over (x, t): maximize t subject to t * ideal_p - u_p(x) <= 0."""
+    n = weights.shape[0]
+    ideal = np.clip(weights, 0.0, None).sum(axis=0)
+    parties = np.flatnonzero(ideal > 0)
+    if n == 0 or not len(parties):
+        return np.zeros(n), True, 0
+
+    c = np.zeros(n + 1)
+    c[-1] = -1.0
+    a_ub = np.hstack([-weights[:, parties].T, ideal[parties, None]])
+    res = linprog(c, A_ub=a_ub, b_ub=np.zeros(len(parties)),
+                  bounds=[(0.0, 1.0)] * n + [(None, None)], method='highs')
+    if not res.success:
+        return np.zeros(n), False, int(res.nit)
+    return np.clip(res.x[:n], 0.0, 1.0), True, int(res.nit)
+
+
+def _solve_wsw(weights: np.ndarray):
+    """LP maximizing summed utility over the box."""
+    n = weights.shape[0]
+    if n == 0:
+        return np.zeros(0), True, 0
+    res = linprog(-weights.sum(axis=1), bounds=[(0.0, 1.0)] * n, method='highs')
+    if not res.success:
+        return np.zeros(n), False, int(res.nit)
+    return np.clip(res.x, 0.0, 1.0), True, int(res.nit)
@@ -0,0 +1,137 @@
+"""Non-linear utility curves over normalized issue values.
+
+A preference's ``utilityCurve`` ({ type, parameters }) maps the issue value,
+normalized to [0, 1] over the issue range, to a utility share in [0, 1] that
+the party's weight then scales. Each curve is compiled once into a vectorized
+evaluator: closed forms for the smooth curves, breakpoint tables for the
+piecewise ones, so a whole grid column is transformed in one call.
+
+- linear:           u = x (the default; compiled to None so callers keep the matrix product)
+- exponential:      u = (1 - exp(-k x)) / (1 - exp(-k)); k > 0 concave, k < 0 convex (default 3)
+- concave / convex: exponential with k = |k| / -|k|
+- logistic:         S-curve with ``steepness`` (default 10) around ``midpoint`` (default 0.5),
+                    rescaled so u(0) = 0 and u(1) = 1
+- piecewise_linear: interpolates ``points`` [[x, u], ...], flat beyond the ends
+- step:             ``steps`` [[x, u], ...] jumps to u at each x, ``base`` below the first;
+                    or a single ``threshold`` with ``low`` / ``high`` levels
+
+Breakpoints may also be given as flat numbered parameters (x1, u1, x2, u2, ...),
+since stored curve parameters are plain numbers.
+"""
+from typing import Dict, Any, Callable, List, NamedTuple, Optional, Tuple
+import json
+import numpy as np
+
+CURVE_TYPES = ('linear', 'exponential', 'concave', 'convex', 'logistic', 'piecewise_linear', 'step')
+
+# Curvatures closer to zero than this are treated as linear
+MIN_CURVATURE = 1e-6
+# Slack for grid values that land a rounding error short of a step
+STEP_TOLERANCE = 1e-9
+
+
+class Curve(NamedTuple):
+    """A compiled curve; ``key`` identifies equal curves for sharing and caching."""
+    kind: str
+    key: str
+    evaluate: Callable[[np.ndarray], np.ndarray]
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        return self.evaluate(np.asarray(x, dtype=float))
+
+
+def compile_curve(spec: Optional[Dict[str, Any]]) -> Optional[Curve]:
+    """Compile one utilityCurve; None when it is linear (or absent)."""
+    if not spec:
+        return None
+    kind = spec.get('type') or 'linear'
+    params = spec.get('parameters') or {}
+    if kind not in CURVE_TYPES:
+        raise ValueError(f"Unknown utility curve: {kind}")
+    if kind == 'linear':
+        return None
+
+    if kind in ('exponential', 'concave', 'convex'):
+        k = float(params.get('k', 3.0))
+        if kind == 'concave':
+            k = abs(k)
+        elif kind == 'convex':
+            k = -abs(k)
+        if abs(k) < MIN_CURVATURE:
+            return None
+        scale = 1.0 / -np.expm1(-k)
+        return _curve('exponential', {'k': k}, lambda x: -np.expm1(-k * x) * scale)
+
+    if kind == 'logistic':
+        steepness = float(params.get('steepness', 10.0))
+        midpoint = float(params.get('midpoint', 0.5))
+        lo, hi = _sigmoid(np.array([0.0, 1.0]), steepness, midpoint)
+        if hi - lo < MIN_CURVATURE:
+            return None
+        return _curve('logistic', {'steepness': steepness, 'midpoint': midpoint},
+                      lambda x: (_sigmoid(x, steepness, midpoint) - lo) / (hi - lo))
+
+    if kind == 'piecewise_linear':
+        xs, us = _breakpoints(params, 'points')
+        if not len(xs):
+            raise ValueError("piecewise_linear curve needs at least one point")
+        return _curve('piecewise_linear', {'points': np.column_stack([xs, us]).tolist()},
+                      lambda x: np.interp(x, xs, us))
+
+    # step
+    if 'steps' in params or 'x1' in params:
+        xs, us = _breakpoints(params, 'steps')
+        base = float(params.get('base', 0.0))
+    else:
+        xs = np.array([float(params.get('threshold', 0.5))])
+        us = np.array([float(params.get('high', 1.0))])
+        base = float(params.get('low', 0.0))
+    levels = np.concatenate([[base], us])
+    edges = xs - STEP_TOLERANCE
+    return _curve('step', {'steps': np.column_stack([xs, us]).tolist(), 'base': base},
+                  lambda x: levels[np.searchsorted(edges, x, side='right')])
+
+
+def curves_from_preferences(preferences: Optional[Any]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Non-linear utilityCurve specs as { party_id: { issue_id: spec } }.
+
+    preferences: normalized preference list ([{ partyId, issueId, utilityCurve }])
+        or { party_id: { issue_id: preference } }
+    """
+    curves: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    if not preferences:
+        return curves
+    if isinstance(preferences, dict):
+        entries = ((pid, iid, pref) for pid, party_prefs in preferences.items()
+                   for iid, pref in (party_prefs or {}).items())
+    else:
+        entries = ((pref.get('partyId'), pref.get('issueId'), pref) for pref in preferences)
+    for party_id, issue_id, pref in entries:
+        spec = (pref or {}).get('utilityCurve')
+        if spec and (spec.get('type') or 'linear') != 'linear':
+            curves.setdefault(party_id, {})[issue_id] = spec
+    return curves
+
+
+def _curve(kind: str, params: Dict[str, Any], evaluate: Callable[[np.ndarray], np.ndarray]) -> Curve:
+    return Curve(kind, json.dumps([kind, params], sort_keys=True), evaluate)
+
+
+def _sigmoid(x: np.ndarray, steepness: float, midpoint: float) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-steepness * (x - midpoint)))
+
+
+def _breakpoints(params: Dict[str, Any], name: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorted (xs, us) from a [[x, u], ...] list or numbered x1/u1 parameters."""
+    pairs: List[Tuple[float, float]]
+    if name in params:
+        pairs = [(float(x), float(u)) for x, u in params[name]]
+    else:
+        pairs, n = [], 1
+        while f'x{n}' in params:
+            pairs.append((float(params[f'x{n}']), float(params.get(f'u{n}', 0.0))))
+            n += 1
+    pairs.sort()
+    xs = np.array([x for x, _ in pairs], dtype=float)
+    us = np.array([u for _, u in pairs], dtype=float)
+    return xs, us
@@ -0,0 +1,189 @@
+"""Streaming enumeration of the bundle grid.
+
+The cartesian product of per-issue grids is decoded in fixed-size blocks from
+flat mixed-radix indices, so only one block of bundles is ever materialized.
+Evaluation keeps a running best and an online Pareto archive, which keeps
+memory proportional to the frontier rather than to the grid.
+"""
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple, Union
+import numpy as np
+
+from .frontier import dominated_by, pareto_indices
+
+DEFAULT_CHUNK_SIZE = 4096
+
+GridResolution = Union[int, Dict[str, int]]
+
+
+def resolve_resolutions(issues: List[Dict[str, Any]], grid_resolution: GridResolution = 11) -> List[int]:
+    """Per-issue grid sizes from a scalar or an { issue_id: points } mapping.
+
+    Issues missing from the mapping fall back to 11 points.
+    """
+    if isinstance(grid_resolution, dict):
+        resolutions = [int(grid_resolution.get(issue['id'], 11)) for issue in issues]
+    else:
+        resolutions = [int(grid_resolution)] * len(issues)
+    for issue, points in zip(issues, resolutions):
+        if points < 1:
+            raise ValueError(f"Grid resolution for issue {issue['id']} must be at least 1")
+    return resolutions
+
+
+def grid_size(grids: Sequence[np.ndarray]) -> int:
+    """Number of bundles in the cartesian product of ``grids``."""
+    total = 1
+    for grid in grids:
+        total *= len(grid)
+    return total
+
+
+def iter_combination_chunks(grids: Sequence[np.ndarray], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                            start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield ``(offset, combos)`` blocks of the grid product in lexicographic order.
+
+    Order matches ``itertools.product(*grids)``: the first issue varies slowest.
+    ``start``/``stop`` select a contiguous slice of flat indices.
+    """
+    shape = tuple(len(grid) for grid in grids)
+    total = grid_size(grids)
+    if total >= np.iinfo(np.int64).max:
+        raise ValueError("Bundle grid is too large to index; reduce grid resolution or use another solver")
+    stop = total if stop is None else min(stop, total)
+    if not grids:
+        if start < stop:
+            yield start, np.zeros((1, 0))
+        return
+
+    columns = [np.asarray(grid, dtype=float) for grid in grids]
+    for offset in range(start, stop, chunk_size):
+        flat = np.arange(offset, min(offset + chunk_size, stop), dtype=np.int64)
+        digits = np.unravel_index(flat, shape)
+        yield offset, np.column_stack([col[d] for col, d in zip(columns, digits)])
+
+
+class RunningBest:
+    """Tracks the highest-scoring bundle seen so far (first one wins ties)."""
+
+    def __init__(self):
+        self.index: Optional[int] = None
+        self.score = -np.inf
+        self.combo: Optional[np.ndarray] = None
+        self.utils: Optional[np.ndarray] = None
+
+    def update(self, offset: int, combos: np.ndarray, party_utils: np.ndarray, scores: np.ndarray) -> bool:
+        if not len(scores):
+            return False
+        b = int(np.argmax(scores))
+        if self.index is not None and not scores[b] > self.score:
+            return False
+        self.index = offset + b
+        self.score = float(scores[b])
+        self.combo = combos[b].copy()
+        self.utils = party_utils[b].copy()
+        return True
+
+    def merge(self, other: 'RunningBest') -> None:
+        """Keep the better of two running bests; the lower flat index wins ties."""
+        if other.index is None:
+            return
+        if (self.index is None or other.score > self.score
+                or (other.score == self.score and other.index < self.index)):
+            self.index, self.score = other.index, other.score
+            self.combo, self.utils = other.combo, other.utils
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        if self.index is None:
+            return None
+        return {
+            'index': self.index,
+            'score': self.score,
+            'combo': self.combo.tolist(),
+            'utils': self.utils.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'RunningBest':
+        best = cls()
+        if data:
+            best.index = int(data['index'])
+            best.score = float(data['score'])
+            best.combo = np.asarray(data['combo'], dtype=float)
+            best.utils = np.asarray(data['utils'], dtype=float)
+        return best
+
+
+class ParetoArchive:
+    """Online archive of non-dominated bundles.
+
+    Rows are kept in enumeration order so ties resolve the same way as a
+    single-pass frontier over the full grid.
+    """
+
+    def __init__(self, n_issues: int, n_parties: int):
+        self.index = np.zeros(0, dtype=np.int64)
+        self.combos = np.zeros((0, n_issues))
+        self.utils = np.zeros((0, n_parties))
+        self.scores = np.zeros(0)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def add(self, offset: int, combos: np.ndarray, party_utils: np.ndarray, scores: np.ndarray) -> None:
+        local = pareto_indices(party_utils)
+        if len(self):
+            local = local[~dominated_by(party_utils[local], self.utils)]
+        if not len(local):
+            return
+        # Only the new survivors can dominate archived rows
+        alive = ~dominated_by(self.utils, party_utils[local])
+        self.index = np.concatenate([self.index[alive], offset + local])
+        self.utils = np.vstack([self.utils[alive], party_utils[local]])
+        self.combos = np.vstack([self.combos[alive], combos[local]])
+        self.scores = np.concatenate([self.scores[alive], scores[local]])
+
+    def merge(self, other: 'ParetoArchive') -> None:
+        """Fold another archive (e.g. from a different grid slice) into this one."""
+        index = np.concatenate([self.index, other.index])
+        order = np.argsort(index, kind='stable')
+        utils = np.vstack([self.utils, other.utils])[order]
+        keep = pareto_indices(utils)
+        self.index = index[order][keep]
+        self.utils = utils[keep]
+        self.combos = np.vstack([self.combos, other.combos])[order][keep]
+        self.scores = np.concatenate([self.scores, other.scores])[order][keep]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'index': self.index.tolist(),
+            'combos': self.combos.tolist(),
+            'utils': self.utils.tolist(),
+            'scores': self.scores.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], n_issues: int, n_parties: int) -> 'ParetoArchive':
+        archive = cls(n_issues, n_parties)
+        archive.index = np.asarray(data.get('index', []), dtype=np.int64)
+        archive.combos = np.asarray(data.get('combos', []), dtype=float).reshape(-1, n_issues)
+        archive.utils = np.asarray(data.get('utils', []), dtype=float).reshape(-1, n_parties)
+        archive.scores = np.asarray(data.get('scores', []), dtype=float)
+        return archive
+
+
+def shard_ranges(grids: Sequence[np.ndarray], shards: int) -> List[Tuple[int, int]]:
+    """Split the grid into contiguous flat-index ranges along the leading issue.
+
+    Each range covers whole leading-issue grid values, so a shard enumerates
+    every combination that starts with its slice of the first issue's grid.
+    """
+    total = grid_size(grids)
+    if not grids:
+        return [(0, total)]
+    lead = len(grids[0])
+    rest = total // lead if lead else 0
+    ranges = []
+    for part in np.array_split(np.arange(lead), max(1, min(shards, lead))):
+        if len(part):
+            ranges.append((int(part[0]) * rest, (int(part[-1]) + 1) * rest))
+    return ranges
@@ -0,0 +1,132 @@
+"""Pareto frontier extraction over party utility vectors.
+
+All functions take a (points x parties) utility matrix where higher is better
+and return the indices of non-dominated points in ascending order. A point is
+dominated when another point is at least as good for every party and strictly
+better for one; points with identical utility vectors do not dominate each
+other and are all kept.
+"""
+from typing import Sequence, Tuple
+import numpy as np
+
+DEFAULT_BLOCK_SIZE = 256
+
+
+def pareto_indices(party_utils: np.ndarray, block_size: int = DEFAULT_BLOCK_SIZE) -> np.ndarray:
+    """Return indices of the non-dominated rows of ``party_utils``."""
+    utils = np.asarray(party_utils, dtype=float)
+    n, k = utils.shape if utils.ndim == 2 else (len(utils), 0)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k == 0:
+        return np.arange(n, dtype=np.int64)
+    if k == 1:
+        return np.flatnonzero(utils[:, 0] == utils[:, 0].max())
+    if k == 2:
+        return _pareto_2d(utils)
+    return _pareto_skyline(utils, block_size)
+
+
+def pareto_mask(party_utils: np.ndarray, block_size: int = DEFAULT_BLOCK_SIZE) -> np.ndarray:
+    """Boolean mask variant of :func:`pareto_indices`."""
+    utils = np.asarray(party_utils, dtype=float)
+    mask = np.zeros(len(utils), dtype=bool)
+    mask[pareto_indices(utils, block_size)] = True
+    return mask
+
+
+def merge_frontiers(frontiers: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge several frontiers into one.
+
+    Returns the stacked index of surviving points (into the concatenation of
+    ``frontiers``) and their utility rows.
+    """
+    non_empty = [np.asarray(f, dtype=float) for f in frontiers if len(f)]
+    if not non_empty:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 0))
+    stacked = np.vstack(non_empty)
+    keep = pareto_indices(stacked)
+    return keep, stacked[keep]
+
+
+def _pareto_2d(utils: np.ndarray) -> np.ndarray:
+    """Sort-and-sweep frontier for two parties, O(n log n).
+
+    Points are ordered by u0 desc then u1 desc. Within a run of equal u0 only
+    the rows reaching the run's max u1 can survive, and they survive only if
+    that max beats every u1 seen in runs with larger u0.
+    """
+    u0, u1 = utils[:, 0], utils[:, 1]
+    order = np.lexsort((-u1, -u0))
+    s0, s1 = u0[order], u1[order]
+
+    starts = np.flatnonzero(np.r_[True, s0[1:] != s0[:-1]])
+    run_max = np.maximum.reduceat(s1, starts)
+    prior_max = np.r_[-np.inf, np.maximum.accumulate(run_max)[:-1]]
+
+    run_of = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(s0)]))
+    keep = (s1 == run_max[run_of]) & (run_max[run_of] > prior_max[run_of])
+    return np.sort(order[keep])
+
+
+def _pareto_skyline(utils: np.ndarray, block_size: int) -> np.ndarray:
+    """Sort-filter skyline for k parties.
+
+    Points are visited in descending (sum, u0, u1, ...) order, so no point can
+    be dominated by one visited after it. Each block is filtered against the
+    frontier found so far and against itself with vectorized comparisons, which
+    costs O(n * frontier) rather than O(n^2).
+    """
+    keys = [-utils[:, j] for j in range(utils.shape[1] - 1, -1, -1)]
+    order = np.lexsort(keys + [-utils.sum(axis=1)])
+
+    frontier_idx = []
+    frontier = np.zeros((0, utils.shape[1]))
+    for start in range(0, len(order), block_size):
+        block_idx = order[start:start + block_size]
+        block = utils[block_idx]
+
+        if len(frontier):
+            alive = ~dominated_by(block, frontier)
+            block_idx, block = block_idx[alive], block[alive]
+        if len(block) > 1:
+            alive = ~dominated_by(block, block)
+            block_idx, block = block_idx[alive], block[alive]
+
+        if len(block):
+            frontier_idx.append(block_idx)
+            frontier = np.vstack([frontier, block])
+
+    if not frontier_idx:
+        return np.zeros(0, dtype=np.int64)
+    return np.sort(np.concatenate(frontier_idx))
+
+
+def dominated_by(candidates: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    """Mask of candidate rows dominated by at least one reference row."""
+    dominated = np.zeros(len(candidates), dtype=bool)
+    open_idx = np.arange(len(candidates))
+    # Compare in growing reference chunks and drop candidates as soon as they are
+    # knocked out; with strong reference rows first most candidates go early.
+    step = 64
+    start = 0
+    while start < len(reference) and len(open_idx):
+        ref = reference[start:start + step]
+        cand = candidates[open_idx]
+        # Column-wise 2D comparisons avoid (candidates x chunk x parties) temporaries
+        ge = np.ones((len(cand), len(ref)), dtype=bool)
+        for j in range(candidates.shape[1]):
+            ge &= ref[:, j] >= cand[:, j, None]
+        rows = np.flatnonzero(ge.any(axis=1))
+        if len(rows):
+            # Weakly dominating rows only count when they differ somewhere
+            eq = ge[rows]
+            for j in range(candidates.shape[1]):
+                eq &= ref[:, j] == cand[rows, j, None]
+            hit = rows[np.any(ge[rows] & ~eq, axis=1)]
+            dominated[open_idx[hit]] = True
+            open_idx = np.delete(open_idx, hit)
+        start += step
+        # Grow chunks while keeping the (candidates x chunk) masks bounded
+        step = min(step * 2, max(64, 4_000_000 // max(1, len(open_idx))))
+    return dominated
@@ -0,0 +1,113 @@
+"""Monte Carlo sampling of negotiation outcomes.
+
+Each sample perturbs weights, reservation and target values, and the strategy
+weight thresholds, then runs :func:`workers.engine.simulation.simulate`.
+Samples are cut into fixed-size batches, and each batch draws from its own
+RNG stream spawned from ``SeedSequence(seed)``. A given seed therefore gives
+the same samples whether the batches run inline, over worker processes, or as
+separate ranges of batches (``batch_range``) whose outputs are concatenated in
+order, which is how Celery tasks fan the work out.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+from .concession import DEFAULT_THRESHOLDS
+from .simulation import CONVERGED, DEADLOCK, ROUND_LIMIT, simulate
+
+OUTCOMES = (CONVERGED, DEADLOCK, ROUND_LIMIT)
+BATCH_SIZE = 64
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def sample_outcomes(weights: np.ndarray, reservation: np.ndarray, target: np.ndarray, current: np.ndarray,
+                    issue_span: np.ndarray, samples: int = 1000, seed: int = 0, processes: Optional[int] = 1,
+                    max_rounds: int = 20, tolerance: float = 0.01, patience: int = 3, weight_sd: float = 0.1,
+                    value_sd: float = 0.05, threshold_sd: float = 0.05,
+                    batch_range: Optional[Tuple[int, int]] = None) -> Dict[str, np.ndarray]:
+    """Run ``samples`` perturbed simulations; returns per-sample outcome arrays.
+
+    value_sd: reservation/target noise as a share of each issue's range
+    processes: worker processes; 1 runs inline, None uses every core. Inside a
+        Celery prefork worker only 1 works (daemonic processes cannot fork a pool)
+    batch_range: run only batches [start, stop) of the full sample, e.g. from batch_shards
+    Returns { outcome (samples,) codes into OUTCOMES, rounds (samples,),
+    final (samples x parties x issues) }.
+    """
+    base = (np.asarray(weights, dtype=float), np.asarray(reservation, dtype=float),
+            np.asarray(target, dtype=float), np.asarray(current, dtype=float), np.asarray(issue_span, dtype=float))
+    settings = (max_rounds, tolerance, patience, weight_sd, value_sd, threshold_sd)
+    sizes = [min(BATCH_SIZE, samples - start) for start in range(0, samples, BATCH_SIZE)]
+    streams = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(base, settings, size, stream) for size, stream in zip(sizes, streams)]
+    if batch_range is not None:
+        jobs = jobs[batch_range[0]:batch_range[1]]
+
+    if processes == 1 or len(jobs) <= 1:
+        batches = [_run_batch(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            batches = list(pool.map(_run_batch, jobs))
+
+    n_parties, n_issues = base[0].shape
+    if not batches:
+        return {'outcome': np.zeros(0, dtype=np.int64), 'rounds': np.zeros(0, dtype=np.int64),
+                'final': np.zeros((0, n_parties, n_issues))}
+    return {key: np.concatenate([batch[key] for batch in batches]) for key in ('outcome', 'rounds', 'final')}
+
+
+def batch_shards(samples: int, shards: int) -> List[Tuple[int, int]]:
+    """Split the sample's batches into at most ``shards`` contiguous [start, stop) ranges."""
+    n_batches = -(-samples // BATCH_SIZE) if samples > 0 else 0
+    bounds = np.linspace(0, n_batches, max(1, min(shards, n_batches)) + 1).round().astype(int)
+    return [(int(lo), int(hi)) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+
+
+def summarize(outcomes: Dict[str, np.ndarray], max_rounds: int) -> Dict[str, Any]:
+    """Agreement probability, final value distributions and rounds-to-agreement histogram."""
+    outcome, rounds, final = outcomes['outcome'], outcomes['rounds'], outcomes['final']
+    samples = len(outcome)
+    agreed = outcome == OUTCOMES.index(CONVERGED)
+    # Agreement point per sample: the mean position across parties
+    points = final.mean(axis=1) if samples else np.zeros((0, final.shape[2]))
+
+    return {
+        'samples': samples,
+        'agreement_probability': float(agreed.mean()) if samples else 0.0,
+        'outcomes': {name: int((outcome == code).sum()) for code, name in enumerate(OUTCOMES)},
+        'rounds_to_agreement': np.bincount(rounds[agreed], minlength=max_rounds + 1)[1:].tolist(),
+        'final_values': _distribution(points),
+        'agreed_values': _distribution(points[agreed]),
+    }
+
+
+def _distribution(points: np.ndarray) -> List[Optional[Dict[str, Any]]]:
+    """Per-issue mean, std and percentiles of (samples x issues) values."""
+    if not len(points):
+        return [None] * points.shape[1]
+    pct = np.percentile(points, PERCENTILES, axis=0)
+    return [{
+        'mean': float(points[:, i].mean()),
+        'std': float(points[:, i].std()),
+        'percentiles': dict(zip((f'p{q}' for q in PERCENTILES), pct[:, i].tolist())),
+    } for i in range(points.shape[1])]
+
+
+def _run_batch(job: Tuple) -> Dict[str, np.ndarray]:
+    (weights, reservation, target, current, span), settings, size, stream = job
+    max_rounds, tolerance, patience, weight_sd, value_sd, threshold_sd = settings
+    rng = np.random.default_rng(stream)
+
+    outcome = np.empty(size, dtype=np.int64)
+    rounds = np.empty(size, dtype=np.int64)
+    final = np.empty((size,) + weights.shape)
+    for s in range(size):
+        w = np.clip(weights + rng.normal(0.0, weight_sd, weights.shape), 0.0, 1.0)
+        r = reservation + rng.normal(0.0, 1.0, weights.shape) * value_sd * span
+        t = target + rng.normal(0.0, 1.0, weights.shape) * value_sd * span
+        high, mid = np.asarray(DEFAULT_THRESHOLDS) + rng.normal(0.0, threshold_sd, 2)
+        run = simulate(w, r, t, current, span, max_rounds, tolerance, patience, (high, min(mid, high)))
+        outcome[s] = OUTCOMES.index(run['status'])
+        rounds[s] = run['rounds']
+        final[s] = run['values'][-1] if run['rounds'] else current
+    return {'outcome': outcome, 'rounds': rounds, 'final': final}
@@ -0,0 +1,146 @@
+"""Adaptive multi-resolution refinement around the Pareto frontier.
+
+A coarse grid pass is followed by levels that halve the grid step. At each
+level only the cells touching the current frontier are subdivided: every
+frontier bundle's neighbours within one fine step on each issue are
+evaluated, so dominated regions never get the finer resolution. The full
+neighbourhood has 3**n - 1 bundles over n open issues, so beyond
+MAX_BOX_ISSUES open issues only the 2n axis-aligned neighbours are taken.
+
+Bundles are addressed by integer coordinates on the current level's grid;
+level L has (r0 - 1) * 2**L + 1 points per issue, which keeps every coarser
+grid point on the finer grid.
+"""
+from itertools import product
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import math
+import time
+import numpy as np
+
+from .constraints import Interval, feasible_mask, prune_grids
+from .enumeration import DEFAULT_CHUNK_SIZE, ParetoArchive, RunningBest, grid_size, iter_combination_chunks
+from .utility import UtilityEngine
+
+# Most open issues whose full 3**n neighbourhood (80 offsets at 4) is still evaluated
+MAX_BOX_ISSUES = 4
+
+
+def level_resolutions(resolutions: Sequence[int], level: int) -> List[int]:
+    """Points per issue after ``level`` halvings of the coarse grid step."""
+    return [(r - 1) * 2 ** level + 1 if r > 1 else 1 for r in resolutions]
+
+
+def refine_frontier(engine: UtilityEngine, resolutions: Sequence[int], method: str, levels: int,
+                    stop: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    time_budget: Optional[float] = None,
+                    intervals: Optional[Sequence[Interval]] = None) -> Tuple[RunningBest, ParetoArchive, List[Dict[str, Any]]]:
+    """Coarse pass plus up to ``levels`` refinement levels.
+
+    stop: cap on bundles evaluated in the coarse pass
+    time_budget: seconds after which no further level is started
+    intervals: per-issue feasible intervals; infeasible bundles are never evaluated
+    Returns (best, archive, stats) where stats has one entry per level run:
+    { level, resolution, evaluated, pruned }. Archive and best indices are
+    evaluation order, so ties resolve towards coarser bundles.
+    """
+    started = time.monotonic()
+    best = RunningBest()
+    archive = ParetoArchive(engine.n_issues, engine.n_parties)
+
+    shape = tuple(resolutions)
+    full = engine.grids(list(resolutions))
+    grids = prune_grids(full, intervals) if intervals is not None else full
+    coarse_total = grid_size(grids)
+    stop = coarse_total if stop is None else min(stop, coarse_total)
+    # Flat indices (on the current level's full grid) of everything evaluated so far
+    visited = []
+    for offset, combos in iter_combination_chunks(grids, chunk_size, stop=stop):
+        _evaluate(engine, method, offset, combos, best, archive)
+        visited.append(np.ravel_multi_index(tuple(_coordinates(engine, combos, shape).T), shape))
+    seen = np.unique(np.concatenate(visited)) if visited else np.zeros(0, dtype=np.int64)
+    stats = [{'level': 0, 'resolution': list(resolutions), 'evaluated': stop, 'pruned': grid_size(full) - coarse_total}]
+    evaluated = stop
+    offsets = neighbour_offsets(engine.active)
+    for level in range(1, levels + 1):
+        if time_budget is not None and time.monotonic() - started >= time_budget:
+            break
+        fine = tuple(level_resolutions(resolutions, level))
+        if math.prod(fine) >= np.iinfo(np.int64).max or fine == shape:
+            break
+
+        # Carry evaluated coordinates onto the finer grid
+        scale = np.array([2 if f > s else 1 for f, s in zip(fine, shape)], dtype=np.int64)
+        seen = np.ravel_multi_index(tuple((np.stack(np.unravel_index(seen, shape), axis=1) * scale).T), fine)
+        seen.sort()
+        coords = _coordinates(engine, archive.combos, fine)
+        candidates = _neighbours(coords, offsets, fine, chunk_size)
+        new = candidates[~np.isin(candidates, seen, assume_unique=True)]
+        shape = fine
+
+        level_grids = engine.grids(list(fine))
+        columns = [np.asarray(grid, dtype=float) for grid in level_grids]
+        count = pruned = 0
+        for start in range(0, len(new), chunk_size):
+            digits = np.unravel_index(new[start:start + chunk_size], fine)
+            combos = np.column_stack([col[d] for col, d in zip(columns, digits)])
+            if intervals is not None:
+                feasible = feasible_mask(combos, intervals)
+                pruned += int((~feasible).sum())
+                combos = combos[feasible]
+            _evaluate(engine, method, evaluated + count, combos, best, archive)
+            count += len(combos)
+        evaluated += count
+        seen = np.union1d(seen, new)
+        stats.append({'level': level, 'resolution': list(fine), 'evaluated': count, 'pruned': pruned})
+        if not len(new):
+            break
+    return best, archive, stats
+
+
+def neighbour_offsets(active: np.ndarray) -> np.ndarray:
+    """Grid steps to a bundle's neighbours, the zero step included.
+
+    Issues that are not ``active`` (an empty range, one distinct value) are
+    never stepped along. Up to MAX_BOX_ISSUES active issues every combination
+    of -1/0/+1 is taken, beyond that one step along one issue at a time.
+    """
+    active = np.asarray(active, dtype=bool)
+    columns = np.flatnonzero(active)
+    if len(columns) <= MAX_BOX_ISSUES:
+        steps = np.array(list(product((-1, 0, 1), repeat=len(columns))), dtype=np.int64)
+        steps = steps.reshape(3 ** len(columns), len(columns))
+    else:
+        steps = np.vstack([np.zeros((1, len(columns)), dtype=np.int64),
+                           np.eye(len(columns), dtype=np.int64), -np.eye(len(columns), dtype=np.int64)])
+    offsets = np.zeros((len(steps), len(active)), dtype=np.int64)
+    offsets[:, columns] = steps
+    return offsets
+
+
+def _evaluate(engine: UtilityEngine, method: str, offset: int, combos: np.ndarray,
+              best: RunningBest, archive: ParetoArchive) -> None:
+    party_utils = engine.party_utilities(combos)
+    scores = engine.score(party_utils, method)
+    best.update(offset, combos, party_utils, scores)
+    archive.add(offset, combos, party_utils, scores)
+
+
+def _coordinates(engine: UtilityEngine, combos: np.ndarray, shape: Sequence[int]) -> np.ndarray:
+    """Integer grid coordinates of ``combos`` on a grid with ``shape`` points per issue."""
+    steps = np.array([points - 1 for points in shape], dtype=float)
+    coords = np.rint(engine.normalize(combos) * steps).astype(np.int64)
+    return np.clip(coords, 0, np.array(shape, dtype=np.int64) - 1)
+
+
+def _neighbours(coords: np.ndarray, offsets: np.ndarray, shape: Sequence[int], chunk_size: int) -> np.ndarray:
+    """Sorted unique flat indices of every in-bounds neighbour of ``coords``."""
+    upper = np.array(shape, dtype=np.int64) - 1
+    batch = max(1, chunk_size // max(1, len(offsets)))
+    found = []
+    for start in range(0, len(coords), batch):
+        around = (coords[start:start + batch, None, :] + offsets[None, :, :]).reshape(-1, len(shape))
+        inside = np.all((around >= 0) & (around <= upper), axis=1)
+        found.append(np.unique(np.ravel_multi_index(tuple(around[inside].T), shape)))
+    if not found:
+        return np.zeros(0, dtype=np.int64)
+    return np.unique(np.concatenate(found))
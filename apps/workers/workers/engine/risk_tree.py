@@ -0,0 +1,414 @@
+"""Decision/chance risk tree with cached subtree expected values.
+
+Every node caches its expected per-issue impact vector:
+
+- terminal: its own impacts
+- chance:   the probability-weighted mean of its children, kept as a running
+            weighted sum and probability total
+- decision: the child with the highest score (issue weights . expected
+            impacts), tracked with a lazy max-heap; ties go to the child
+            added first
+
+An edit to one node's probability or impacts changes its cached value and then
+walks up its ancestor path only, adjusting each parent by the child's delta,
+and stops as soon as an ancestor's value is unchanged. A chance parent costs
+O(issues) per step; a decision parent O(log children) amortized, since stale
+heap entries are dropped lazily. Running sums can drift by float rounding over
+very long edit sequences; ``recompute`` rebuilds every cache bottom-up.
+
+The serialized form is a flat node list in parent-before-child order, one row
+per node as in the ``risk_nodes`` table: { id, parent_id, kind, name,
+probability, impacts }. Caches are not stored; loading rebuilds them in one
+bottom-up pass.
+
+``save`` / ``load`` keep a live tree in a Redis hash instead, one field per
+node holding its row plus its cached value, running sums and child ids. An
+edit then loads only what it touches: the edited nodes' ancestor paths, the
+children of every decision node on them (to rank alternatives) and the
+subtrees being removed; ``save`` writes back just the rows that changed.
+Concurrent edits of one stored tree load and write inside a WATCH / MULTI
+transaction (``write`` queues the rows on it), so one edit never overwrites
+another's running sums.
+"""
+from typing import Dict, Any, Iterable, List, Optional, Sequence
+import heapq
+import json
+import numpy as np
+
+NODE_KINDS = ('decision', 'chance', 'terminal')
+# Stale decision-heap entries tolerated before the heap is compacted
+HEAP_SLACK = 16
+# Chance nodes whose children's probabilities sum to no more than this have no expected value
+PROBABILITY_TOLERANCE = 1e-12
+
+
+class RiskNode:
+    __slots__ = ('id', 'kind', 'name', 'parent', 'probability', 'impacts', 'children', 'child_ids', 'order',
+                 'value', 'weighted', 'total', 'heap', 'version')
+
+    def __init__(self, node_id: str, kind: str, name: Optional[str], parent: Optional['RiskNode'],
+                 probability: float, impacts: np.ndarray, order: int):
+        self.id = node_id
+        self.kind = kind
+        self.name = name
+        self.parent = parent
+        self.probability = probability
+        self.impacts = impacts
+        self.children: List['RiskNode'] = []
+        # Every child's id, including children not loaded from storage
+        self.child_ids: List[str] = []
+        self.order = order
+        self.value = impacts.copy() if kind == 'terminal' else np.zeros_like(impacts)
+        # chance: sum of probability * child value and of child probabilities
+        self.weighted = np.zeros_like(impacts)
+        self.total = 0.0
+        # decision: (-score, order, version, child) entries, stale ones skipped on read
+        self.heap: List[Any] = []
+        self.version = 0
+
+
+class RiskTree:
+    """Decision/chance tree over a fixed issue list with incremental expected values."""
+
+    def __init__(self, issue_ids: Sequence[str], weights: Optional[Sequence[float]] = None):
+        self.issue_ids = list(issue_ids)
+        self.index = {iid: i for i, iid in enumerate(self.issue_ids)}
+        self.weights = np.ones(len(self.issue_ids)) if weights is None else np.asarray(weights, dtype=float)
+        self.nodes: Dict[str, RiskNode] = {}
+        self.root: Optional[RiskNode] = None
+        self._order = 0
+        # Rows changed or removed since the last save
+        self._dirty: Dict[str, None] = {}
+        self._removed: Dict[str, None] = {}
+
+    # --- edits ------------------------------------------------------------------
+
+    def add_node(self, node_id: str, kind: str, parent_id: Optional[str] = None, probability: float = 1.0,
+                 impacts: Optional[Dict[str, float]] = None, name: Optional[str] = None) -> List[str]:
+        """Attach a node; returns the ids whose cached value changed."""
+        node = self._attach(node_id, kind, parent_id, probability, impacts, name)
+        if node.parent is None:
+            return [node.id]
+        parent = node.parent
+        if parent.kind == 'chance':
+            parent.weighted += node.probability * node.value
+            parent.total += node.probability
+        else:
+            self._push(parent, node)
+        return self._propagate(parent)
+
+    def set_probability(self, node_id: str, probability: float) -> List[str]:
+        """Change a node's probability under its chance parent; returns the changed ids."""
+        node = self._node(node_id)
+        probability = _probability(probability)
+        delta = probability - node.probability
+        node.probability = probability
+        self._dirty[node.id] = None
+        parent = node.parent
+        if parent is None or parent.kind != 'chance' or delta == 0:
+            return []
+        parent.weighted += delta * node.value
+        parent.total += delta
+        return self._propagate(parent)
+
+    def set_impacts(self, node_id: str, impacts: Dict[str, float]) -> List[str]:
+        """Replace a terminal node's impacts (issues not listed keep theirs); returns the changed ids."""
+        node = self._node(node_id)
+        if node.kind != 'terminal':
+            raise ValueError(f"Only terminal nodes carry impacts: {node_id}")
+        node.impacts = node.impacts.copy()
+        for iid, impact in impacts.items():
+            node.impacts[self._issue(iid)] = float(impact)
+        return self._propagate(node)
+
+    def remove_node(self, node_id: str) -> List[str]:
+        """Drop a node and its subtree; returns the changed ids of the remaining ancestors."""
+        node = self._node(node_id)
+        for descendant in self._subtree(node):
+            del self.nodes[descendant.id]
+            self._dirty.pop(descendant.id, None)
+            self._removed[descendant.id] = None
+        parent = node.parent
+        if parent is None:
+            self.root = None
+            return []
+        parent.children.remove(node)
+        parent.child_ids.remove(node.id)
+        node.version = -1
+        if parent.kind == 'chance':
+            if parent.child_ids:
+                parent.weighted -= node.probability * node.value
+                parent.total -= node.probability
+            else:
+                # Start the last child's removal from exact zeros rather than subtraction residue
+                parent.weighted = np.zeros(len(self.issue_ids))
+                parent.total = 0.0
+        return self._propagate(parent)
+
+    def recompute(self) -> None:
+        """Rebuild every cached value bottom-up, clearing accumulated rounding."""
+        if self.root is None:
+            return
+        for node in reversed(list(self._subtree(self.root))):
+            if node.kind == 'chance':
+                node.weighted = np.zeros(len(self.issue_ids))
+                node.total = 0.0
+                for child in node.children:
+                    node.weighted += child.probability * child.value
+                    node.total += child.probability
+            elif node.kind == 'decision':
+                node.heap = []
+                for child in node.children:
+                    self._push(node, child)
+            node.value = self._evaluate(node)
+            self._dirty[node.id] = None
+
+    # --- queries ----------------------------------------------------------------
+
+    def expected(self, node_id: Optional[str] = None) -> Dict[str, float]:
+        """Cached expected impact per issue of a node (default the root)."""
+        node = self.root if node_id is None else self._node(node_id)
+        if node is None:
+            return {iid: 0.0 for iid in self.issue_ids}
+        return dict(zip(self.issue_ids, node.value.tolist()))
+
+    def score(self, node_id: Optional[str] = None) -> float:
+        node = self.root if node_id is None else self._node(node_id)
+        return float(self.weights @ node.value) if node is not None else 0.0
+
+    def policy(self) -> Dict[str, Optional[str]]:
+        """The chosen child of every decision node (of a loaded tree: every one whose children are loaded)."""
+        choices = {}
+        for node in self.nodes.values():
+            if node.kind == 'decision' and len(node.children) == len(node.child_ids):
+                best = self._best(node)
+                choices[node.id] = best.id if best is not None else None
+        return choices
+
+    # --- serialization ----------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        nodes = []
+        if self.root is not None:
+            for node in self._subtree(self.root):
+                nodes.append({
+                    'id': node.id,
+                    'parent_id': node.parent.id if node.parent else None,
+                    'kind': node.kind,
+                    'name': node.name,
+                    'probability': node.probability,
+                    'impacts': ({iid: float(v) for iid, v in zip(self.issue_ids, node.impacts) if v}
+                                if node.kind == 'terminal' else {}),
+                })
+        return {'issue_ids': self.issue_ids, 'weights': self.weights.tolist(), 'nodes': nodes}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RiskTree':
+        tree = cls(data['issue_ids'], data.get('weights'))
+        for row in data.get('nodes') or []:
+            tree._attach(row['id'], row['kind'], row.get('parent_id'), row.get('probability', 1.0),
+                         row.get('impacts'), row.get('name'))
+        tree.recompute()
+        return tree
+
+    # --- storage ----------------------------------------------------------------
+
+    def save(self, redis_client, key: str, ttl: Optional[int] = None, replace: bool = False) -> None:
+        """Write the rows changed since the last save (``replace``: drop the stored tree first)."""
+        pipe = redis_client.pipeline()
+        self.write(pipe, key, ttl, replace)
+        pipe.execute()
+
+    def write(self, pipe, key: str, ttl: Optional[int] = None, replace: bool = False) -> None:
+        """Queue save's writes on ``pipe``, e.g. a transaction that loaded this tree under WATCH."""
+        meta = {'issue_ids': self.issue_ids, 'weights': self.weights.tolist(),
+                'root': self.root.id if self.root is not None else None, 'order': self._order}
+        if replace:
+            pipe.delete(key)
+        elif self._removed:
+            pipe.hdel(key, *self._removed)
+        rows = {node_id: json.dumps(self._row(self.nodes[node_id])) for node_id in self._dirty}
+        if rows:
+            pipe.hset(key, mapping=rows)
+        pipe.set(f"{key}:meta", json.dumps(meta), ex=ttl)
+        if ttl:
+            pipe.expire(key, ttl)
+        self._dirty, self._removed = {}, {}
+
+    @classmethod
+    def load(cls, redis_client, key: str, node_ids: Iterable[str] = (),
+             subtrees: Iterable[str] = ()) -> Optional['RiskTree']:
+        """Load the root and the paths to ``node_ids``, plus the whole subtrees under ``subtrees``.
+
+        Ids not stored (e.g. nodes about to be added) are skipped.
+        """
+        raw = redis_client.get(f"{key}:meta")
+        if raw is None:
+            return None
+        meta = json.loads(raw)
+        tree = cls(meta['issue_ids'], meta.get('weights'))
+        tree._order = meta['order']
+        rows: Dict[str, Dict[str, Any]] = {}
+
+        def fetch(ids: Iterable[str]) -> List[str]:
+            ids = [node_id for node_id in dict.fromkeys(ids) if node_id is not None and node_id not in rows]
+            found = []
+            for node_id, row in zip(ids, redis_client.hmget(key, ids) if ids else []):
+                if row is not None:
+                    rows[node_id] = json.loads(row)
+                    found.append(node_id)
+            return found
+
+        frontier = fetch([meta['root'], *node_ids])
+        while frontier:
+            frontier = fetch([rows[node_id]['parent_id'] for node_id in frontier])
+        frontier = [node_id for node_id in dict.fromkeys(subtrees) if node_id in rows]
+        while frontier:
+            children = [child for node_id in frontier for child in rows[node_id]['children']]
+            fetch(children)
+            frontier = [child for child in children if child in rows]
+        fetch([child for row in list(rows.values()) if row['kind'] == 'decision' for child in row['children']])
+
+        # Every loaded row's parent is loaded too, so ordering by creation puts parents first
+        for row in sorted(rows.values(), key=lambda row: row['order']):
+            tree._restore(row)
+        for node in tree.nodes.values():
+            if node.kind == 'decision' and len(node.children) == len(node.child_ids):
+                for child in node.children:
+                    tree._push(node, child)
+        tree._dirty = {}
+        return tree
+
+    # --- internals --------------------------------------------------------------
+
+    def _attach(self, node_id: str, kind: str, parent_id: Optional[str], probability: float,
+                impacts: Optional[Dict[str, float]], name: Optional[str]) -> RiskNode:
+        if kind not in NODE_KINDS:
+            raise ValueError(f"Unknown risk node kind: {kind}")
+        if node_id in self.nodes:
+            raise ValueError(f"Duplicate risk node: {node_id}")
+        vector = np.zeros(len(self.issue_ids))
+        for iid, impact in (impacts or {}).items():
+            vector[self._issue(iid)] = float(impact)
+        if parent_id is None:
+            if self.root is not None:
+                raise ValueError(f"Risk tree already has a root: {self.root.id}")
+            parent = None
+        else:
+            parent = self._node(parent_id)
+            if parent.kind == 'terminal':
+                raise ValueError(f"Terminal node {parent_id} cannot have children")
+        node = RiskNode(node_id, kind, name, parent, _probability(probability), vector, self._order)
+        self._order += 1
+        self.nodes[node_id] = node
+        self._dirty[node_id] = None
+        self._removed.pop(node_id, None)
+        if parent is None:
+            self.root = node
+        else:
+            parent.children.append(node)
+            parent.child_ids.append(node_id)
+            self._dirty[parent.id] = None
+        return node
+
+    def _row(self, node: RiskNode) -> Dict[str, Any]:
+        return {
+            'id': node.id,
+            'parent_id': node.parent.id if node.parent else None,
+            'kind': node.kind,
+            'name': node.name,
+            'probability': node.probability,
+            'impacts': node.impacts.tolist(),
+            'order': node.order,
+            'children': node.child_ids,
+            'value': node.value.tolist(),
+            'weighted': node.weighted.tolist(),
+            'total': node.total,
+        }
+
+    def _restore(self, row: Dict[str, Any]) -> RiskNode:
+        """Recreate a stored node with its caches; its parent must already be loaded."""
+        parent = self.nodes.get(row['parent_id']) if row['parent_id'] is not None else None
+        node = RiskNode(row['id'], row['kind'], row['name'], parent, row['probability'],
+                        np.array(row['impacts'], dtype=float), row['order'])
+        node.child_ids = list(row['children'])
+        node.value = np.array(row['value'], dtype=float)
+        node.weighted = np.array(row['weighted'], dtype=float)
+        node.total = row['total']
+        self.nodes[node.id] = node
+        if parent is None:
+            self.root = node
+        else:
+            parent.children.append(node)
+        return node
+
+    def _propagate(self, node: RiskNode) -> List[str]:
+        """Refresh ``node``'s value from its own state, then its ancestors' from the deltas."""
+        changed = []
+        while node is not None:
+            self._dirty[node.id] = None
+            value = self._evaluate(node)
+            if np.array_equal(value, node.value):
+                break
+            old, node.value = node.value, value
+            changed.append(node.id)
+            parent = node.parent
+            if parent is not None:
+                if parent.kind == 'chance':
+                    parent.weighted += node.probability * (value - old)
+                else:
+                    node.version += 1
+                    self._push(parent, node)
+            node = parent
+        return changed
+
+    def _evaluate(self, node: RiskNode) -> np.ndarray:
+        if node.kind == 'terminal':
+            return node.impacts.copy()
+        if node.kind == 'chance':
+            return (node.weighted / node.total if node.total > PROBABILITY_TOLERANCE
+                    else np.zeros(len(self.issue_ids)))
+        best = self._best(node)
+        return best.value.copy() if best is not None else np.zeros(len(self.issue_ids))
+
+    def _push(self, parent: RiskNode, child: RiskNode) -> None:
+        heap = parent.heap
+        heapq.heappush(heap, (-float(self.weights @ child.value), child.order, child.version, child))
+        if len(heap) > 2 * len(parent.children) + HEAP_SLACK:
+            # Too many stale entries: keep only the current one per child
+            parent.heap = [entry for entry in heap if entry[2] == entry[3].version]
+            heapq.heapify(parent.heap)
+
+    def _best(self, node: RiskNode) -> Optional[RiskNode]:
+        """Highest-scoring child, dropping stale heap entries (edited or removed children)."""
+        heap = node.heap
+        while heap and heap[0][2] != heap[0][3].version:
+            heapq.heappop(heap)
+        return heap[0][3] if heap else None
+
+    def _subtree(self, node: RiskNode) -> Iterable[RiskNode]:
+        """Nodes under ``node`` (inclusive), parents before children."""
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            yield current
+            stack.extend(reversed(current.children))
+
+    def _node(self, node_id: str) -> RiskNode:
+        node = self.nodes.get(node_id)
+        if node is None:
+            raise KeyError(f"Unknown risk node: {node_id}")
+        return node
+
+    def _issue(self, issue_id: str) -> int:
+        i = self.index.get(issue_id)
+        if i is None:
+            raise KeyError(f"Unknown issue: {issue_id}")
+        return i
+
+
+def _probability(probability: float) -> float:
+    probability = float(probability)
+    if not 0.0 <= probability <= 1.0:
+        raise ValueError(f"Probability must lie in [0, 1]: {probability}")
+    return probability
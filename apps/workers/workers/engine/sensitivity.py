@@ -0,0 +1,142 @@
+"""Batch sensitivity of the recommended bundle to party weights.
+
+The grid's normalized issue matrix (and any curve-transformed columns) does
+not depend on the weights, so it is built once and every perturbed weight set
+only costs a matrix product: a batch of K weight sets over C bundles and P
+parties is one (C x I) @ (I x K*P) product, or one einsum when utility curves
+give each party its own feature matrix. Batches are cut so that no more than
+``max_elements`` utilities are held at once.
+
+Perturbation modes (``magnitude`` is the relative change, e.g. 0.1 = ±10%):
+
+- independent: every (party, issue) weight scaled by its own factor
+- issue:       one factor per issue, shared by all parties
+- party:       every sample perturbs a single party's weights, cycling
+               through the parties, so flips can be attributed
+- dirichlet:   each party's weight shares redrawn from a Dirichlet centred on
+               the current shares (``concentration`` sets the spread)
+"""
+from typing import Dict, Any, Optional, Sequence, Tuple
+import numpy as np
+
+from .utility import UtilityEngine, aggregate_scores, normalize_weights
+
+MODES = ('independent', 'issue', 'party', 'dirichlet')
+DEFAULT_MAX_ELEMENTS = 1 << 22
+
+
+def party_features(engine: UtilityEngine, normalized: np.ndarray) -> np.ndarray:
+    """(parties x combos x issues) curve-transformed values, or (1 x combos x issues) when all are linear."""
+    if engine.is_linear:
+        return normalized[None, :, :]
+    features = np.repeat(normalized[None, :, :], engine.n_parties, axis=0)
+    for i, parties, curve in engine.curve_groups:
+        features[parties, :, i] = curve(normalized[:, i])
+    return features
+
+
+def perturbed_weights(raw: np.ndarray, mode: str, magnitude: float, samples: int, seed: int = 0,
+                      concentration: float = 100.0) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """(samples x issues x parties) perturbed raw weights.
+
+    raw: (issues x parties) weights as given
+    Returns (weights, perturbed party per sample for mode='party' else None).
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown perturbation mode: {mode}")
+    rng = np.random.default_rng(seed)
+    n_issues, n_parties = raw.shape
+    if mode == 'independent':
+        return raw * (1.0 + rng.uniform(-magnitude, magnitude, (samples, n_issues, n_parties))), None
+    if mode == 'issue':
+        return raw * (1.0 + rng.uniform(-magnitude, magnitude, (samples, n_issues, 1))), None
+    if mode == 'party':
+        parties = np.arange(samples) % max(n_parties, 1)
+        factors = np.ones((samples, n_issues, n_parties))
+        if n_parties:
+            factors[np.arange(samples), :, parties] = 1.0 + rng.uniform(-magnitude, magnitude, (samples, n_issues))
+        return raw * factors, parties
+
+    # dirichlet: redraw each party's shares of its absolute weight, keeping signs and total
+    magnitude_total = np.abs(raw).sum(axis=0)
+    shares = np.divide(np.abs(raw), magnitude_total, out=np.zeros_like(raw), where=magnitude_total > 0)
+    weights = np.empty((samples, n_issues, n_parties))
+    for p in range(n_parties):
+        active = shares[:, p] > 0
+        weights[:, :, p] = 0.0
+        if active.any():
+            drawn = rng.dirichlet(concentration * shares[active, p], samples)
+            weights[:, active, p] = drawn * magnitude_total[p] * np.sign(raw[active, p])
+    return weights, None
+
+
+def recommendations(features: np.ndarray, raw_weights: np.ndarray, method: str,
+                    max_elements: int = DEFAULT_MAX_ELEMENTS) -> Tuple[np.ndarray, np.ndarray]:
+    """Best bundle index and score for every raw weight set; the first bundle wins ties.
+
+    features: from party_features; raw_weights: (samples x issues x parties)
+    """
+    weights = normalize_weights(raw_weights)
+    samples, n_issues, n_parties = weights.shape
+    n_combos = features.shape[1]
+    best = np.zeros(samples, dtype=np.int64)
+    scores = np.full(samples, -np.inf)
+    if n_combos == 0:
+        return best, scores
+    batch = max(1, max_elements // max(1, n_combos * n_parties))
+    for start in range(0, samples, batch):
+        block = weights[start:start + batch]
+        k = len(block)
+        if features.shape[0] == 1:
+            flat = features[0] @ block.transpose(1, 0, 2).reshape(n_issues, k * n_parties)
+            utils = flat.reshape(n_combos, k, n_parties).transpose(1, 0, 2)
+        else:
+            utils = np.einsum('pci,kip->kcp', features, block)
+        block_scores = aggregate_scores(utils.reshape(-1, n_parties), method).reshape(k, n_combos)
+        best[start:start + k] = np.argmax(block_scores, axis=1)
+        scores[start:start + k] = block_scores[np.arange(k), best[start:start + k]]
+    return best, scores
+
+
+def tipping_points(features: np.ndarray, raw: np.ndarray, method: str, baseline: int,
+                   factors: Sequence[float], max_elements: int = DEFAULT_MAX_ELEMENTS) -> Dict[str, np.ndarray]:
+    """Smallest single-weight changes that move the recommendation away from ``baseline``.
+
+    Each (issue, party) weight is scaled by every factor in turn, all in one batch.
+    Returns { increase, decrease } (issues x parties) relative changes (factor - 1,
+    1 - factor), NaN where no tested factor flips the recommendation or the weight is zero.
+    """
+    factors = np.asarray(factors, dtype=float)
+    n_issues, n_parties = raw.shape
+    weights = np.repeat(raw[None, None, None], n_issues, axis=0)
+    weights = np.repeat(weights, n_parties, axis=1)
+    weights = np.repeat(weights, len(factors), axis=2)  # (issues x parties x factors x issues x parties)
+    idx_i, idx_p = np.meshgrid(np.arange(n_issues), np.arange(n_parties), indexing='ij')
+    weights[idx_i, idx_p, :, idx_i, idx_p] *= factors
+    best, _ = recommendations(features, weights.reshape(-1, n_issues, n_parties), method, max_elements)
+    flipped = (best != baseline).reshape(n_issues, n_parties, len(factors)) & (raw != 0)[:, :, None]
+
+    up = factors > 1.0
+    down = factors < 1.0
+    increase = np.where(flipped & up, factors - 1.0, np.inf).min(axis=2)
+    decrease = np.where(flipped & down, 1.0 - factors, np.inf).min(axis=2)
+    return {'increase': np.where(np.isinf(increase), np.nan, increase),
+            'decrease': np.where(np.isinf(decrease), np.nan, decrease)}
+
+
+def elasticities(features: np.ndarray, raw: np.ndarray, normalized: np.ndarray, method: str,
+                 factors: Sequence[float], max_elements: int = DEFAULT_MAX_ELEMENTS) -> np.ndarray:
+    """Per issue, the least-squares slope of its recommended value (as a share of the
+    issue range) against the relative change of that issue's weight for every party."""
+    factors = np.asarray(factors, dtype=float)
+    n_issues, n_parties = raw.shape
+    weights = np.repeat(np.repeat(raw[None, None], n_issues, axis=0), len(factors), axis=1)
+    weights[np.arange(n_issues), :, np.arange(n_issues), :] *= factors[None, :, None]
+    best, _ = recommendations(features, weights.reshape(-1, n_issues, n_parties), method, max_elements)
+    values = normalized[best.reshape(n_issues, len(factors)), np.arange(n_issues)[:, None]]
+    x = factors - 1.0
+    x = x - x.mean()
+    denom = (x ** 2).sum()
+    if denom == 0:
+        return np.zeros(n_issues)
+    return ((values - values.mean(axis=1, keepdims=True)) * x).sum(axis=1) / denom
@@ -0,0 +1,194 @@
+"""Monte Carlo Shapley attribution of joint utility to parties.
+
+A coalition's value is the best score the grid offers when only its members
+count: the highest welfare ('wsw') or Nash product ('nash') of their
+utilities, with the empty coalition worth 0. Shapley values are estimated by
+permutation sampling: every sampled party order adds each party's marginal
+contribution to the coalition of the parties before it.
+
+Permutations are drawn in rounds (each with its reverse, to cut variance).
+A round first collects the coalitions its prefixes need, looks them up in the
+coalition cache, and evaluates only the missing ones, across a process pool
+when ``processes`` allows, so no coalition is ever scored twice. Sampling
+stops once every party's standard error is within ``tolerance`` of the grand
+coalition's value, or at ``max_permutations``. The permutations depend only
+on ``seed``, so results do not depend on the process count. Independent runs
+with different seeds (e.g. Celery shards) pool their sums with
+``combine_shapley``.
+
+With at most ``exact_parties`` parties all 2^P coalitions are cheaper than
+sampling, so every coalition is scored once and the exact values returned.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from math import factorial
+from typing import Dict, Any, List, Optional, Sequence
+import numpy as np
+
+from .utility import aggregate_scores
+
+COALITION_METHODS = ('wsw', 'nash')
+VALUE_BATCH = 256
+EXACT_PARTIES = 8
+
+# Per-process party utility matrix, set once by the pool initializer
+_worker_utils: Optional[np.ndarray] = None
+_worker_method: str = 'wsw'
+
+
+def coalition_value(party_utils: np.ndarray, mask: int, method: str) -> float:
+    """Best score over the bundles counting only the parties in bitmask ``mask``."""
+    members = [p for p in range(party_utils.shape[1]) if mask >> p & 1]
+    if not members or not len(party_utils):
+        return 0.0
+    return float(aggregate_scores(party_utils[:, members], method).max())
+
+
+def shapley_values(party_utils: np.ndarray, method: str = 'wsw', max_permutations: int = 2000,
+                   min_permutations: int = 100, batch: int = 64, tolerance: float = 0.01, seed: int = 0,
+                   processes: Optional[int] = 1, exact_parties: int = EXACT_PARTIES) -> Dict[str, Any]:
+    """Estimate each party's Shapley value from a (bundles x parties) utility matrix.
+
+    batch: permutations per round (rounded up to an even count for the reversed pairs)
+    tolerance: stop when every standard error <= tolerance * |grand coalition value|
+    processes: worker processes for coalition values; 1 runs inline, None uses every core.
+        Inside a Celery prefork worker only 1 works (daemonic processes cannot fork a pool)
+    exact_parties: enumerate every coalition instead of sampling up to this many parties
+    Returns { values, standard_errors, grand_value, permutations, coalitions, converged, exact,
+    totals, squares } where totals/squares are the marginal-contribution sums.
+    """
+    if method not in COALITION_METHODS:
+        raise ValueError(f"Shapley attribution supports {', '.join(COALITION_METHODS)}, not {method}")
+    n_parties = party_utils.shape[1]
+    full = (1 << n_parties) - 1
+    cache: Dict[int, float] = {0: 0.0}
+    rng = np.random.default_rng(seed)
+    half = max(1, (batch + 1) // 2)
+
+    total = np.zeros(n_parties)
+    squares = np.zeros(n_parties)
+    drawn = 0
+    converged = False
+    pool = None
+    if processes != 1 and n_parties > 1:
+        pool = ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(party_utils, method))
+    try:
+        if n_parties <= exact_parties:
+            _evaluate(cache, range(full + 1), party_utils, method, pool)
+            return {
+                'values': _exact_values(cache, n_parties),
+                'standard_errors': np.zeros(n_parties),
+                'grand_value': cache[full],
+                'permutations': 0,
+                'coalitions': len(cache) - 1,
+                'converged': True,
+                'exact': True,
+                'totals': np.zeros(n_parties),
+                'squares': np.zeros(n_parties),
+            }
+        _evaluate(cache, [full], party_utils, method, pool)
+        grand = cache[full]
+        while drawn < max_permutations:
+            count = min(half, (max_permutations - drawn + 1) // 2)
+            orders = np.array([rng.permutation(n_parties) for _ in range(count)])
+            orders = np.concatenate([orders, orders[:, ::-1]])
+            prefixes = _prefix_masks(orders)
+            _evaluate(cache, np.unique(prefixes).tolist(), party_utils, method, pool)
+
+            values = np.vectorize(cache.__getitem__, otypes=[float])(prefixes)
+            marginal = np.empty(orders.shape)
+            np.put_along_axis(marginal, orders, np.diff(values, axis=1), axis=1)
+            total += marginal.sum(axis=0)
+            squares += (marginal ** 2).sum(axis=0)
+            drawn += len(orders)
+
+            if drawn >= min_permutations:
+                errors = _standard_errors(total, squares, drawn)
+                if np.all(errors <= tolerance * max(abs(grand), np.finfo(float).tiny)):
+                    converged = True
+                    break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    means = total / drawn if drawn else np.zeros(n_parties)
+    return {
+        'values': means,
+        'standard_errors': _standard_errors(total, squares, drawn),
+        'grand_value': cache.get(full, 0.0),
+        'permutations': drawn,
+        'coalitions': len(cache) - 1,
+        'converged': converged,
+        'exact': False,
+        'totals': total,
+        'squares': squares,
+    }
+
+
+def combine_shapley(parts: Sequence[Dict[str, Any]], tolerance: float = 0.01) -> Dict[str, Any]:
+    """Pool independent sampled runs (different seeds) into one estimate."""
+    total = np.sum([part['totals'] for part in parts], axis=0)
+    squares = np.sum([part['squares'] for part in parts], axis=0)
+    drawn = sum(part['permutations'] for part in parts)
+    grand = parts[0]['grand_value']
+    errors = _standard_errors(total, squares, drawn)
+    return {
+        'values': total / drawn if drawn else np.zeros(len(total)),
+        'standard_errors': errors,
+        'grand_value': grand,
+        'permutations': drawn,
+        'coalitions': sum(part['coalitions'] for part in parts),
+        'converged': bool(np.all(errors <= tolerance * max(abs(grand), np.finfo(float).tiny))),
+        'exact': False,
+        'totals': total,
+        'squares': squares,
+    }
+
+
+def _exact_values(cache: Dict[int, float], n_parties: int) -> np.ndarray:
+    """Shapley values from the full table of coalition values."""
+    masks = np.arange(1 << n_parties)
+    values = np.array([cache[int(mask)] for mask in masks])
+    sizes = np.array([bin(int(mask)).count('1') for mask in masks])
+    weights = np.array([factorial(k) * factorial(n_parties - k - 1) for k in range(n_parties)]) / factorial(n_parties)
+    shapley = np.zeros(n_parties)
+    for p in range(n_parties):
+        without = masks[(masks >> p & 1) == 0]
+        shapley[p] = (weights[sizes[without]] * (values[without | 1 << p] - values[without])).sum()
+    return shapley
+
+
+def _prefix_masks(orders: np.ndarray) -> np.ndarray:
+    """(permutations x parties + 1) bitmasks of the coalitions formed along each order."""
+    bits = np.left_shift(np.int64(1), orders.astype(np.int64))
+    return np.concatenate([np.zeros((len(orders), 1), dtype=np.int64), np.cumsum(bits, axis=1)], axis=1)
+
+
+def _evaluate(cache: Dict[int, float], masks: Sequence[int], party_utils: np.ndarray, method: str,
+              pool: Optional[ProcessPoolExecutor]) -> None:
+    """Fill the cache with the values of any coalitions it does not hold yet."""
+    missing = [int(mask) for mask in masks if int(mask) not in cache]
+    if not missing:
+        return
+    chunks = [missing[start:start + VALUE_BATCH] for start in range(0, len(missing), VALUE_BATCH)]
+    if pool is None or len(chunks) <= 1:
+        results = [[coalition_value(party_utils, mask, method) for mask in chunk] for chunk in chunks]
+    else:
+        results = list(pool.map(_worker_values, chunks))
+    for chunk, values in zip(chunks, results):
+        cache.update(zip(chunk, values))
+
+
+def _standard_errors(total: np.ndarray, squares: np.ndarray, drawn: int) -> np.ndarray:
+    if drawn < 2:
+        return np.full(len(total), np.inf)
+    variance = np.maximum(squares - total ** 2 / drawn, 0.0) / (drawn - 1)
+    return np.sqrt(variance / drawn)
+
+
+def _init_worker(party_utils: np.ndarray, method: str) -> None:
+    global _worker_utils, _worker_method
+    _worker_utils, _worker_method = party_utils, method
+
+
+def _worker_values(masks: List[int]) -> List[float]:
+    return [coalition_value(_worker_utils, mask, _worker_method) for mask in masks]
@@ -0,0 +1,93 @@
+"""In-process multi-round concession simulation.
+
+Runs the propose_offer rules round after round on (parties x issues) arrays:
+each round picks strategies from weights and each party's concession pattern,
+moves every current value with the concession math in
+:mod:`workers.engine.concession`, and feeds the new offers back into the
+pattern statistics. Offers are ordered party by party, issue by issue, as
+propose_round returns them, so patterns evolve as they would from the
+accumulated offer history.
+
+A run stops when every issue's spread across parties falls within the
+tolerance (converged), when no value moves for ``patience`` rounds
+(deadlock), or at the round limit.
+"""
+from typing import Dict, Any, Tuple
+import numpy as np
+
+from .concession import (
+    DEFAULT_THRESHOLDS, FLEXIBLE_PATTERN, HARDLINE, INITIAL, INSUFFICIENT, MODERATE_PATTERN,
+    proposed_values, select_strategies,
+)
+
+CONVERGED, DEADLOCK, ROUND_LIMIT = 'converged', 'deadlock', 'round_limit'
+
+
+def simulate(weights: np.ndarray, reservation: np.ndarray, target: np.ndarray, current: np.ndarray,
+             issue_span: np.ndarray, max_rounds: int = 20, tolerance: float = 0.01,
+             patience: int = 3, thresholds: Tuple[float, float] = DEFAULT_THRESHOLDS) -> Dict[str, Any]:
+    """Simulate up to ``max_rounds`` rounds from (parties x issues) starting arrays.
+
+    issue_span: (issues,) range used to scale ``tolerance``
+    thresholds: (high, mid) weight cut-offs for strategy selection
+    Returns { status, rounds, values, strategies, spread, moved } where values and
+    strategies are (rounds x parties x issues) and spread is (rounds x issues).
+    """
+    weights = np.asarray(weights, dtype=float)
+    current = np.array(current, dtype=float)
+    n_parties, n_issues = weights.shape
+    threshold = tolerance * np.asarray(issue_span, dtype=float)
+
+    # Running concession statistics per party, in offer-history order
+    total = np.zeros(n_parties)
+    count = np.zeros(n_parties, dtype=np.int64)
+    last = np.full(n_parties, np.nan)
+
+    values, strategies, spreads, moved = [], [], [], []
+    status, still = ROUND_LIMIT, 0
+    for round_number in range(1, max_rounds + 1):
+        patterns = _patterns(total, count, round_number)
+        chosen = select_strategies(round_number, weights, patterns, thresholds)
+        proposed = proposed_values(current, target, reservation, chosen, weights)
+
+        if n_issues:
+            steps = np.abs(np.diff(proposed, axis=1)).sum(axis=1)
+            bridge = np.abs(proposed[:, 0] - last)
+            has_last = ~np.isnan(last)
+            total += steps + np.where(has_last, bridge, 0.0)
+            count += (n_issues - 1) + has_last
+            last = proposed[:, -1].copy()
+
+        delta = np.abs(proposed - current).max() if proposed.size else 0.0
+        current = proposed
+        spread = current.max(axis=0) - current.min(axis=0) if n_parties else np.zeros(n_issues)
+        values.append(current)
+        strategies.append(chosen)
+        spreads.append(spread)
+        moved.append(float(delta))
+
+        if np.all(spread <= threshold):
+            status = CONVERGED
+            break
+        still = still + 1 if round_number > 1 and delta == 0.0 else 0
+        if patience and still >= patience:
+            status = DEADLOCK
+            break
+
+    return {
+        'status': status,
+        'rounds': len(values),
+        'values': np.array(values).reshape(-1, n_parties, n_issues),
+        'strategies': np.array(strategies, dtype=np.int64).reshape(-1, n_parties, n_issues),
+        'spread': np.array(spreads).reshape(-1, n_issues),
+        'moved': np.array(moved),
+    }
+
+
+def _patterns(total: np.ndarray, count: np.ndarray, round_number: int) -> np.ndarray:
+    """Pattern codes as the scalar analysis would derive them from the history so far."""
+    if round_number == 1:
+        return np.full(len(total), INITIAL, dtype=np.int64)
+    rate = np.divide(total, count, out=np.zeros_like(total), where=count > 0)
+    codes = np.where(rate < 2, HARDLINE, np.where(rate < 5, MODERATE_PATTERN, FLEXIBLE_PATTERN))
+    return np.where(count > 0, codes, INSUFFICIENT).astype(np.int64)
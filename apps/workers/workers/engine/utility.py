@@ -0,0 +1,175 @@
+"""Vectorized utility evaluation for bundle optimization.
+
+Bundles are held as a (combos x issues) array and party weights as an
+(issues x parties) matrix, so every party is scored over a whole block of
+bundles with a single matrix product. Non-linear utility curves (see
+:mod:`workers.engine.curves`) are compiled once and applied per issue column
+on top of the product, one call per distinct curve.
+"""
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+import numpy as np
+
+from .curves import Curve, compile_curve
+
+NASH_FLOOR = 1e-6
+
+
+def weight_matrix(issues: List[Dict[str, Any]], utilities: Dict[str, Dict[str, float]],
+                  party_ids: Sequence[str]) -> np.ndarray:
+    """Build the (issues x parties) matrix of normalized weights.
+
+    Each column is divided by the sum of the party's positive weights, matching
+    the per-party normalization of the original scalar implementation.
+    """
+    return normalize_weights(raw_weight_matrix(issues, utilities, party_ids))
+
+
+def raw_weight_matrix(issues: List[Dict[str, Any]], utilities: Dict[str, Dict[str, float]],
+                      party_ids: Sequence[str]) -> np.ndarray:
+    """The (issues x parties) matrix of weights as given."""
+    weights = np.zeros((len(issues), len(party_ids)), dtype=float)
+    for p, pid in enumerate(party_ids):
+        party_weights = utilities.get(pid, {}) or {}
+        for i, issue in enumerate(issues):
+            weights[i, p] = float(party_weights.get(issue['id'], 0.0))
+    return weights
+
+
+def normalize_weights(weights: np.ndarray) -> np.ndarray:
+    """Divide each party's weights by the sum of its positive weights.
+
+    weights: (..., issues, parties); leading axes hold independent weight sets
+    """
+    weight_sum = np.clip(weights, 0.0, None).sum(axis=-2, keepdims=True)
+    scale = np.divide(1.0, weight_sum, out=np.zeros_like(weight_sum), where=weight_sum > 0)
+    return weights * scale
+
+
+def aggregate_scores(party_utils: np.ndarray, method: str) -> np.ndarray:
+    """Aggregate a (combos x parties) utility matrix into one score per combo.
+
+    method: 'nash' (Nash product) | 'kalai' (negative spread around the mean) | 'wsw' (sum)
+    """
+    if method == 'nash':
+        return np.prod(np.maximum(party_utils, NASH_FLOOR), axis=1)
+    if method == 'kalai':
+        if party_utils.shape[1] == 0:
+            return np.zeros(party_utils.shape[0])
+        deviation = party_utils - party_utils.mean(axis=1, keepdims=True)
+        return -np.sum(deviation ** 2, axis=1)
+    return party_utils.sum(axis=1)
+
+
+class UtilityEngine:
+    """Scores bundles for every party at once.
+
+    issues: [{ id, minValue, maxValue }]
+    utilities: { party_id: { issue_id: weight } }
+    curves: { party_id: { issue_id: utilityCurve } }; pairs not listed are linear
+    """
+
+    def __init__(self, issues: List[Dict[str, Any]], utilities: Dict[str, Dict[str, float]],
+                 party_ids: Optional[Sequence[str]] = None,
+                 curves: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None):
+        self.issues = issues
+        self.issue_ids = [issue['id'] for issue in issues]
+        self.party_ids = list(party_ids) if party_ids is not None else list(utilities.keys())
+        self.lo = np.array([float(issue.get('minValue', 0)) for issue in issues], dtype=float)
+        self.hi = np.array([float(issue.get('maxValue', 100)) for issue in issues], dtype=float)
+        span = self.hi - self.lo
+        self.active = span > 0
+        self.span = np.where(self.active, span, 1.0)
+        self.weights = weight_matrix(issues, utilities, self.party_ids)
+        self.curves = curves or {}
+        self.linear_weights, self.curve_groups = self._compile_curves()
+
+    @property
+    def n_issues(self) -> int:
+        return len(self.issue_ids)
+
+    @property
+    def n_parties(self) -> int:
+        return len(self.party_ids)
+
+    def grids(self, resolution: Union[int, Sequence[int]] = 11) -> List[np.ndarray]:
+        """Evenly spaced grid values per issue, endpoints included.
+
+        resolution: points per issue, either one value for all issues or one per issue.
+        """
+        if isinstance(resolution, int):
+            resolution = [resolution] * self.n_issues
+        grids = []
+        for lo, hi, points in zip(self.lo, self.hi, resolution):
+            step = (hi - lo) / (points - 1) if points > 1 else 0.0
+            grids.append(lo + step * np.arange(points, dtype=float))
+        return grids
+
+    def normalize(self, combos: np.ndarray) -> np.ndarray:
+        """Map issue values to [0, 1] by issue range; degenerate ranges map to 0."""
+        normalized = (np.asarray(combos, dtype=float) - self.lo) / self.span
+        normalized[:, ~self.active] = 0.0
+        return normalized
+
+    @property
+    def is_linear(self) -> bool:
+        return not self.curve_groups
+
+    def party_utilities(self, combos: np.ndarray) -> np.ndarray:
+        """(combos x issues) values -> (combos x parties) utilities."""
+        return self.normalized_utilities(self.normalize(combos))
+
+    def normalized_utilities(self, normalized: np.ndarray, party: Optional[int] = None) -> np.ndarray:
+        """(combos x parties) utilities from normalized values, or one party's (combos,) column."""
+        if party is not None:
+            column = normalized @ self.linear_weights[:, party]
+            for i, parties, curve in self.curve_groups:
+                if party in parties:
+                    column = column + curve(normalized[:, i]) * self.weights[i, party]
+            return column
+        utils = normalized @ self.linear_weights
+        for i, parties, curve in self.curve_groups:
+            utils[:, parties] += np.outer(curve(normalized[:, i]), self.weights[i, parties])
+        return utils
+
+    def issue_contributions(self, i: int, values: np.ndarray) -> np.ndarray:
+        """(values x parties) utility that each value of issue ``i`` adds to each party."""
+        normalized = (np.asarray(values, dtype=float) - self.lo[i]) / self.span[i]
+        if not self.active[i]:
+            normalized = np.zeros_like(normalized)
+        contrib = normalized[:, None] * self.linear_weights[i][None, :]
+        for issue, parties, curve in self.curve_groups:
+            if issue == i:
+                contrib[:, parties] += np.outer(curve(normalized), self.weights[i, parties])
+        return contrib
+
+    def party_curves(self, party_id: str) -> Dict[str, Any]:
+        """The party's non-linear curve specs by issue id (for cache keys)."""
+        return {issue_id: spec for issue_id, spec in (self.curves.get(party_id) or {}).items()
+                if issue_id in self.issue_ids}
+
+    def score(self, party_utils: np.ndarray, method: str) -> np.ndarray:
+        return aggregate_scores(party_utils, method)
+
+    def _compile_curves(self) -> Tuple[np.ndarray, List[Tuple[int, np.ndarray, Curve]]]:
+        """Linear part of the weights, plus (issue, parties, curve) for each distinct curve per issue."""
+        linear = self.weights.copy()
+        groups: Dict[Tuple[int, str], Tuple[Curve, List[int]]] = {}
+        for p, pid in enumerate(self.party_ids):
+            for issue_id, spec in (self.curves.get(pid) or {}).items():
+                if issue_id not in self.issue_ids:
+                    continue
+                curve = compile_curve(spec)
+                if curve is None:
+                    continue
+                i = self.issue_ids.index(issue_id)
+                linear[i, p] = 0.0
+                groups.setdefault((i, curve.key), (curve, []))[1].append(p)
+        return linear, [(i, np.array(parties), curve) for (i, _), (curve, parties) in groups.items()]
+
+    def to_point(self, combo: np.ndarray, party_utils: np.ndarray, score: float) -> Dict[str, Any]:
+        """Render one evaluated bundle in the task's result point shape."""
+        return {
+            'values': dict(zip(self.issue_ids, np.asarray(combo, dtype=float).tolist())),
+            'party_utils': dict(zip(self.party_ids, np.asarray(party_utils, dtype=float).tolist())),
+            'score': float(score),
+        }
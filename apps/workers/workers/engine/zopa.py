@@ -0,0 +1,181 @@
+"""Joint ZOPA feasibility over whole packages as one linear program.
+
+The per-issue check intersects acceptable ranges issue by issue, so it cannot
+see trade-offs: a party may accept less than its reservation on one issue in
+exchange for more on another. Here each party's package utility is its
+weighted satisfaction over the issues, linear in the issue values:
+
+    U_p(x) = sum_i w_ip * (x_i - reservation_ip) / (target_ip - reservation_ip)
+
+(0 at every reservation, 1 at every target, extended linearly beyond both,
+weights normalized per party),
+and a package is acceptable to a party when U_p(x) >= its reservation
+utility (default 0, i.e. no worse overall than all its reservations). Together
+with each issue's range the acceptable packages form a polytope; a joint ZOPA
+exists iff it is non-empty.
+
+Issue values are rescaled to [0, 1] so distances compare across units. One
+LP finds the Chebyshev center (the package deepest inside the region) and its
+radius; a negative radius means no package satisfies everyone, and by how
+much. Constraints with non-zero duals are the binding ones: those holding
+the center in place, or in conflict when the region is empty. A second LP
+picks a witness package that maximizes the parties' total surplus.
+"""
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy.optimize import linprog
+
+from .constraints import feasible_intervals
+from .utility import normalize_weights
+
+ZOPA_TOLERANCE = 1e-9
+# The largest ball that fits in the rescaled unit box; caps the radius when nothing else does
+MAX_RADIUS = 0.5
+
+
+def analyze_joint_zopa(issues: List[Dict[str, Any]], reservations: Dict[str, Dict[str, float]],
+                       targets: Dict[str, Dict[str, float]], weights: Optional[Dict[str, Dict[str, float]]] = None,
+                       reservation_utilities: Optional[Dict[str, float]] = None,
+                       preferences: Optional[Any] = None) -> Dict[str, Any]:
+    """JSON-ready joint ZOPA report for the parties in ``reservations``.
+
+    issues: [{ id, minValue, maxValue, constraints? }]
+    weights: { party_id: { issue_id: weight } } (default 1 per issue)
+    reservation_utilities: { party_id: minimum package utility } (default 0)
+    preferences: preference list or { party_id: { issue_id: preference } } whose red
+        lines and must-haves further restrict the issue ranges
+    """
+    party_ids = list(reservations.keys())
+    reservation_utilities = reservation_utilities or {}
+    coef, const = utility_constraints(issues, party_ids, reservations, targets, weights)
+    intervals, unparsed = feasible_intervals(issues, preferences, reservations=False)
+    lo = np.array([max(float(issue.get('minValue', 0)), interval.lo) for issue, interval in zip(issues, intervals)])
+    hi = np.array([min(float(issue.get('maxValue', 100)), interval.hi) for issue, interval in zip(issues, intervals)])
+    floors = np.array([float(reservation_utilities.get(pid, 0.0)) for pid in party_ids])
+    solved = joint_zopa(lo, hi, coef, const, floors)
+
+    def package(values: Optional[np.ndarray]) -> Optional[Dict[str, float]]:
+        return None if values is None else {issue['id']: float(v) for issue, v in zip(issues, values)}
+
+    def utilities(values: Optional[np.ndarray]) -> Optional[Dict[str, float]]:
+        return None if values is None else {pid: float(u) for pid, u in zip(party_ids, values)}
+
+    binding = [{'type': 'party_utility', 'party_id': party_ids[k], 'floor': float(floors[k])} if kind == 'party'
+               else {'type': f'issue_{kind}', 'issue_id': issues[k]['id'], 'value': float(lo[k] if kind == 'min' else hi[k])}
+               for kind, k in solved['binding']]
+    return {
+        'feasible': solved['feasible'],
+        'chebyshev_radius': solved['radius'] if np.isfinite(solved['radius']) else None,
+        'chebyshev_center': package(solved['center']),
+        'center_utilities': utilities(solved['center_utils']),
+        'witness': package(solved['witness']),
+        'witness_utilities': utilities(solved['witness_utils']),
+        'binding_constraints': binding,
+        'unparsed_constraints': unparsed,
+    }
+
+
+def utility_constraints(issues: List[Dict[str, Any]], party_ids: Sequence[str],
+                        reservations: Dict[str, Dict[str, float]], targets: Dict[str, Dict[str, float]],
+                        weights: Optional[Dict[str, Dict[str, float]]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """(coef (parties x issues), const (parties,)) with U_p(x) = coef[p] @ x + const[p].
+
+    Missing reservations default to the issue minimum, targets to its maximum, and
+    weights to 1 per issue. Issues whose reservation equals the target add nothing.
+    """
+    raw = np.ones((len(issues), len(party_ids)))
+    if weights is not None:
+        raw = np.array([[float((weights.get(pid) or {}).get(issue['id'], 0.0)) for pid in party_ids]
+                        for issue in issues]).reshape(len(issues), len(party_ids))
+    w = normalize_weights(raw)
+    coef = np.zeros((len(party_ids), len(issues)))
+    const = np.zeros(len(party_ids))
+    for p, pid in enumerate(party_ids):
+        for i, issue in enumerate(issues):
+            r = float((reservations.get(pid) or {}).get(issue['id'], issue.get('minValue', 0)))
+            t = float((targets.get(pid) or {}).get(issue['id'], issue.get('maxValue', 100)))
+            if t == r:
+                continue
+            coef[p, i] = w[i, p] / (t - r)
+            const[p] -= w[i, p] * r / (t - r)
+    return coef, const
+
+
+def joint_zopa(lo: np.ndarray, hi: np.ndarray, coef: np.ndarray, const: np.ndarray,
+               floors: np.ndarray) -> Dict[str, Any]:
+    """Feasibility, Chebyshev center and witness of { lo <= x <= hi, coef @ x + const >= floors }.
+
+    Returns { feasible, radius, center, witness, binding, center_utils, witness_utils }
+    where binding lists constraint labels ('party', p) / ('min', i) / ('max', i).
+    """
+    n_parties, n_issues = coef.shape
+    lo = np.asarray(lo, dtype=float)
+    hi = np.asarray(hi, dtype=float)
+    if n_issues == 0:
+        # The only package is the empty one; each party accepts it iff its floor is at most 0
+        short = np.flatnonzero(const < floors - ZOPA_TOLERANCE)
+        if len(short):
+            return _result(False, -np.inf, None, None, [('party', int(p)) for p in short], coef, const)
+        empty = np.zeros(0)
+        return _result(True, MAX_RADIUS, empty, empty, [], coef, const)
+    crossed = np.flatnonzero(hi < lo - ZOPA_TOLERANCE)
+    if len(crossed):
+        labels = [label for i in crossed for label in (('min', int(i)), ('max', int(i)))]
+        return _result(False, -np.inf, None, None, labels, coef, const)
+
+    span = np.maximum(hi - lo, 0.0)
+    free = span > 0
+    # Rows a @ z <= b over the rescaled values z in [0, 1]: parties first, then ranges
+    a_party = -coef * span
+    b_party = const + coef @ lo - floors
+    rows, bounds_b, labels = [a_party], [b_party], [('party', p) for p in range(n_parties)]
+    for i in np.flatnonzero(free):
+        unit = np.zeros(n_issues)
+        unit[i] = 1.0
+        rows += [-unit[None, :], unit[None, :]]
+        bounds_b += [np.zeros(1), np.ones(1)]
+        labels += [('min', int(i)), ('max', int(i))]
+    a = np.vstack(rows) if rows else np.zeros((0, n_issues))
+    b = np.concatenate(bounds_b) if bounds_b else np.zeros(0)
+    norms = np.linalg.norm(a, axis=1)
+
+    # Parties whose utility does not depend on any open issue either always or never accept
+    fixed = norms <= ZOPA_TOLERANCE
+    if np.any(fixed & (b < -ZOPA_TOLERANCE)):
+        return _result(False, -np.inf, None, None, [labels[k] for k in np.flatnonzero(fixed & (b < -ZOPA_TOLERANCE))],
+                       coef, const)
+    keep = np.flatnonzero(~fixed)
+    var_bounds = [(0.0, 1.0) if f else (0.0, 0.0) for f in free]
+
+    # Chebyshev center: maximize r with a_k @ z + r * |a_k| <= b_k
+    res = linprog(np.concatenate([np.zeros(n_issues), [-1.0]]),
+                  A_ub=np.column_stack([a[keep], norms[keep]]), b_ub=b[keep],
+                  bounds=var_bounds + [(None, MAX_RADIUS)], method='highs')
+    if not res.success:
+        raise RuntimeError(f"Joint ZOPA LP failed: {res.message}")
+    radius = float(-res.fun)
+    center = np.clip(lo + res.x[:n_issues] * span, lo, hi)
+    duals = np.abs(res.ineqlin.marginals)
+    binding = [labels[keep[k]] for k in np.flatnonzero(duals > ZOPA_TOLERANCE)]
+    feasible = radius >= -ZOPA_TOLERANCE
+    if not feasible:
+        return _result(False, radius, center, None, binding, coef, const)
+
+    # Witness: the acceptable package with the largest total surplus
+    res = linprog(a_party.sum(axis=0), A_ub=a[keep], b_ub=b[keep] + ZOPA_TOLERANCE, bounds=var_bounds, method='highs')
+    # HiGHS may return values a hair outside the variable bounds
+    witness = np.clip(lo + res.x * span, lo, hi) if res.success else center
+    return _result(True, radius, center, witness, binding, coef, const)
+
+
+def _result(feasible: bool, radius: float, center: Optional[np.ndarray], witness: Optional[np.ndarray],
+            binding: List[Tuple[str, int]], coef: np.ndarray, const: np.ndarray) -> Dict[str, Any]:
+    return {
+        'feasible': feasible,
+        'radius': radius,
+        'center': center,
+        'witness': witness,
+        'binding': binding,
+        'center_utils': coef @ center + const if center is not None else None,
+        'witness_utils': coef @ witness + const if witness is not None else None,
+    }
@@ -0,0 +1,349 @@
+"""Incremental per-issue ZOPA maintenance for streaming preference updates.
+
+Each party's acceptable range on an issue is [min(r, t), max(r, t)] of its
+reservation and target (defaulting to the issue's minValue / maxValue, as in
+``check_zopa``), and the issue's ZOPA is the intersection: the largest lower
+bound to the smallest upper bound. The index keeps, per issue, a max-heap of
+the parties' lower bounds and a min-heap of their upper bounds, so one
+reservation or target change costs O(log P): the new bound is pushed and the
+old entry is left to be skipped lazily when it reaches the top. Heaps are
+compacted once stale entries outnumber live ones.
+
+Every update returns only the issues whose ZOPA status or interval changed.
+``to_dict`` / ``from_dict`` give a JSON form holding just the parties' values
+(the heaps are rebuilt on load).
+
+In Redis (``save`` / ``load`` / ``apply``) each issue keeps the parties'
+values in a hash and their bounds in two sorted sets, beside a meta key (the
+issues), a set of the parties and a set of the issues without a ZOPA.
+``apply`` edits the stored index in place: it reads the changed parties'
+values and the top few bounds of each touched issue, so an edit of a known
+party costs O(log P) on the one issue it touches (a party joining or leaving
+touches them all), and runs inside the caller's WATCH / MULTI transaction.
+"""
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import heapq
+import json
+
+# Stale heap entries tolerated per issue before the heap is compacted
+HEAP_SLACK = 16
+
+
+class ZopaIndex:
+    """Per-issue ZOPA intervals over a changing set of party ranges."""
+
+    def __init__(self, issues: List[Dict[str, Any]]):
+        self.issues = [{'id': issue['id'], 'minValue': float(issue.get('minValue', 0)),
+                        'maxValue': float(issue.get('maxValue', 100))} for issue in issues]
+        self.defaults = {issue['id']: (issue['minValue'], issue['maxValue']) for issue in self.issues}
+        # party_id -> issue_id -> (reservation, target) as given
+        self.values: Dict[str, Dict[str, Tuple[float, float]]] = {}
+        # issue_id -> party_id -> (lo, hi) currently in force
+        self.ranges: Dict[str, Dict[str, Tuple[float, float]]] = {iid: {} for iid in self.defaults}
+        self.lower: Dict[str, List[Tuple[float, str]]] = {iid: [] for iid in self.defaults}
+        self.upper: Dict[str, List[Tuple[float, str]]] = {iid: [] for iid in self.defaults}
+        self.zopa: Dict[str, Optional[Tuple[float, float]]] = {iid: None for iid in self.defaults}
+
+    @classmethod
+    def build(cls, issues: List[Dict[str, Any]], reservations: Dict[str, Dict[str, float]],
+              targets: Dict[str, Dict[str, float]]) -> 'ZopaIndex':
+        """Index the parties in ``reservations``, with the same defaults as check_zopa."""
+        index = cls(issues)
+        for party_id in reservations.keys():
+            index.values[party_id] = {
+                iid: (float(reservations.get(party_id, {}).get(iid, lo)), float(targets.get(party_id, {}).get(iid, hi)))
+                for iid, (lo, hi) in index.defaults.items()
+            }
+        index._rebuild()
+        return index
+
+    # --- updates ----------------------------------------------------------------
+
+    def update(self, party_id: str, issue_id: str, reservation: Optional[float] = None,
+               target: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Change one party's reservation and/or target on one issue; returns the ZOPA deltas.
+
+        A party seen for the first time joins with the issue defaults everywhere,
+        which touches every issue once.
+        """
+        if issue_id not in self.defaults:
+            raise KeyError(f"Unknown issue: {issue_id}")
+        if party_id not in self.values:
+            return self.set_party(party_id, {issue_id: reservation} if reservation is not None else {},
+                                  {issue_id: target} if target is not None else {})
+        r, t = self.values[party_id].get(issue_id, self.defaults[issue_id])
+        r = r if reservation is None else float(reservation)
+        t = t if target is None else float(target)
+        self.values[party_id][issue_id] = (r, t)
+        self._place(issue_id, party_id, (min(r, t), max(r, t)))
+        return self._refresh([issue_id])
+
+    def set_party(self, party_id: str, reservations: Dict[str, float],
+                  targets: Dict[str, float]) -> List[Dict[str, Any]]:
+        """Replace (or add) a party's values on every issue; returns the ZOPA deltas."""
+        self.values[party_id] = {
+            iid: (float(reservations.get(iid, lo)), float(targets.get(iid, hi)))
+            for iid, (lo, hi) in self.defaults.items()
+        }
+        for iid, (r, t) in self.values[party_id].items():
+            self._place(iid, party_id, (min(r, t), max(r, t)))
+        return self._refresh(list(self.defaults))
+
+    def remove_party(self, party_id: str) -> List[Dict[str, Any]]:
+        """Drop a party from every issue; returns the ZOPA deltas."""
+        if self.values.pop(party_id, None) is None:
+            return []
+        for iid in self.defaults:
+            self.ranges[iid].pop(party_id, None)
+        return self._refresh(list(self.defaults))
+
+    # --- queries ----------------------------------------------------------------
+
+    def interval(self, issue_id: str) -> Optional[Tuple[float, float]]:
+        return self.zopa[issue_id]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Every issue in check_zopa's result shape."""
+        issue_results = []
+        for issue in self.issues:
+            iid = issue['id']
+            interval = self.zopa[iid]
+            issue_results.append({
+                'issue_id': iid,
+                'has_zopa': interval is not None,
+                'interval': list(interval) if interval is not None else None,
+                'party_ranges': [self.ranges[iid][pid] for pid in self.values if pid in self.ranges[iid]],
+            })
+        overall = all(item['has_zopa'] for item in issue_results) if issue_results else False
+        return {'issues': issue_results, 'all_issues_have_zopa': overall}
+
+    # --- persistence ------------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'issues': self.issues,
+            'parties': {pid: {iid: list(rt) for iid, rt in values.items()} for pid, values in self.values.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ZopaIndex':
+        index = cls(data['issues'])
+        for party_id, values in (data.get('parties') or {}).items():
+            index.values[party_id] = {iid: (float(r), float(t)) for iid, (r, t) in values.items()
+                                      if iid in index.defaults}
+        index._rebuild()
+        return index
+
+    def save(self, redis_client, key: str, ttl: Optional[int] = None) -> None:
+        """Replace the stored index (and drop the keys of issues it no longer has) in one transaction."""
+        raw = redis_client.get(f"{key}:meta")
+        stale = [issue['id'] for issue in json.loads(raw)['issues']] if raw is not None else []
+        pipe = redis_client.pipeline()
+        self.write(pipe, key, ttl, stale)
+        pipe.execute()
+
+    def write(self, pipe, key: str, ttl: Optional[int] = None, stale: Iterable[str] = ()) -> None:
+        """Queue save's writes on ``pipe``; ``stale``: previously stored issues whose keys are dropped."""
+        pipe.delete(f"{key}:meta", f"{key}:parties", f"{key}:open",
+                    *[k for iid in dict.fromkeys([*stale, *self.defaults]) for k in _issue_keys(key, iid)])
+        for iid in self.defaults:
+            ranges = self.ranges[iid]
+            if not ranges:
+                continue
+            values_key, lower_key, upper_key = _issue_keys(key, iid)
+            pipe.hset(values_key, mapping={pid: json.dumps(list(values.get(iid, self.defaults[iid])))
+                                           for pid, values in self.values.items()})
+            pipe.zadd(lower_key, {pid: lo for pid, (lo, _) in ranges.items()})
+            pipe.zadd(upper_key, {pid: hi for pid, (_, hi) in ranges.items()})
+            if ttl:
+                for k in (values_key, lower_key, upper_key):
+                    pipe.expire(k, ttl)
+        open_ = [iid for iid in self.defaults if self.zopa[iid] is None]
+        if open_:
+            pipe.sadd(f"{key}:open", *open_)
+        if self.values:
+            pipe.sadd(f"{key}:parties", *self.values)
+        pipe.set(f"{key}:meta", json.dumps({'issues': self.issues}), ex=ttl)
+        if ttl:
+            pipe.expire(f"{key}:parties", ttl)
+            pipe.expire(f"{key}:open", ttl)
+
+    @classmethod
+    def load(cls, redis_client, key: str) -> Optional['ZopaIndex']:
+        """Read the whole stored index back into memory (parties in sorted order)."""
+        raw = redis_client.get(f"{key}:meta")
+        if raw is None:
+            return None
+        index = cls(json.loads(raw)['issues'])
+        index.values = {pid: {} for pid in sorted(_text(pid) for pid in redis_client.smembers(f"{key}:parties"))}
+        for iid in index.defaults:
+            for pid, raw in redis_client.hgetall(_issue_keys(key, iid)[0]).items():
+                if _text(pid) in index.values:
+                    r, t = json.loads(raw)
+                    index.values[_text(pid)][iid] = (float(r), float(t))
+        index._rebuild()
+        return index
+
+    @staticmethod
+    def apply(pipe, key: str, updates: List[Dict[str, Any]],
+              ttl: Optional[int] = None) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        """Apply ``updates`` to the stored index without loading it.
+
+        pipe: a pipeline watching ``{key}:meta`` and ``{key}:parties``; the keys of
+            the touched issues are watched here before they are read, then
+            ``pipe.multi()`` is called and the writes are queued
+        updates: [{ party_id, issue_id, reservation?, target? }] or [{ party_id, remove: true }]
+        Each touched issue costs the batch's parties' values plus the top
+        len(parties) + 1 entries of its two sorted sets, so O(log P) per issue.
+        Returns (deltas, number of issues), or None when nothing is stored.
+        """
+        raw = pipe.get(f"{key}:meta")
+        if raw is None:
+            return None
+        issues = json.loads(raw)['issues']
+        defaults = {issue['id']: (float(issue['minValue']), float(issue['maxValue'])) for issue in issues}
+        party_ids = list(dict.fromkeys(update['party_id'] for update in updates))
+        stored = {pid for pid in party_ids if pipe.sismember(f"{key}:parties", pid)}
+
+        # A party joining or leaving touches every issue
+        present, joins_or_leaves = {pid: pid in stored for pid in party_ids}, False
+        for update in updates:
+            if not update.get('remove') and update['issue_id'] not in defaults:
+                raise KeyError(f"Unknown issue: {update['issue_id']}")
+            joins_or_leaves |= present[update['party_id']] == bool(update.get('remove'))
+            present[update['party_id']] = not update.get('remove')
+        touched = list(defaults) if joins_or_leaves else list(dict.fromkeys(u['issue_id'] for u in updates))
+        pipe.watch(*[k for iid in touched for k in _issue_keys(key, iid)])
+
+        known = sorted(stored)
+        current: Dict[str, Optional[Dict[str, Tuple[float, float]]]] = {
+            pid: ({iid: defaults[iid] for iid in touched} if pid in stored else None) for pid in party_ids}
+        tops = {}
+        for iid in touched:
+            values_key, lower_key, upper_key = _issue_keys(key, iid)
+            for pid, raw in zip(known, pipe.hmget(values_key, known) if known else []):
+                if raw is not None:
+                    current[pid][iid] = tuple(float(v) for v in json.loads(raw))
+            # The best entry not in the batch is among the top len(party_ids) + 1
+            tops[iid] = (pipe.zrange(lower_key, 0, len(party_ids), desc=True, withscores=True),
+                         pipe.zrange(upper_key, 0, len(party_ids), withscores=True))
+
+        for update in updates:
+            pid = update['party_id']
+            if update.get('remove'):
+                current[pid] = None
+                continue
+            if current[pid] is None:
+                current[pid] = {iid: defaults[iid] for iid in touched}
+            r, t = current[pid][update['issue_id']]
+            current[pid][update['issue_id']] = (r if update.get('reservation') is None else float(update['reservation']),
+                                                t if update.get('target') is None else float(update['target']))
+
+        pipe.multi()
+        deltas = []
+        kept = {pid: values for pid, values in current.items() if values is not None}
+        dropped = [pid for pid in known if current[pid] is None]
+        for iid in touched:
+            values_key, lower_key, upper_key = _issue_keys(key, iid)
+            lower, upper = tops[iid]
+            ranges = {pid: (min(values[iid]), max(values[iid])) for pid, values in kept.items()}
+            before = _intersection([s for _, s in lower[:1]], [s for _, s in upper[:1]])
+            after = _intersection([s for m, s in lower if _text(m) not in current][:1] + [lo for lo, _ in ranges.values()],
+                                  [s for m, s in upper if _text(m) not in current][:1] + [hi for _, hi in ranges.values()])
+            if after != before:
+                deltas.append({'issue_id': iid, 'has_zopa': after is not None,
+                               'interval': list(after) if after is not None else None})
+            if ranges:
+                pipe.hset(values_key, mapping={pid: json.dumps(list(values[iid])) for pid, values in kept.items()})
+                pipe.zadd(lower_key, {pid: lo for pid, (lo, _) in ranges.items()})
+                pipe.zadd(upper_key, {pid: hi for pid, (_, hi) in ranges.items()})
+            if dropped:
+                pipe.hdel(values_key, *dropped)
+                pipe.zrem(lower_key, *dropped)
+                pipe.zrem(upper_key, *dropped)
+            if after is None:
+                pipe.sadd(f"{key}:open", iid)
+            else:
+                pipe.srem(f"{key}:open", iid)
+            if ttl:
+                for k in (values_key, lower_key, upper_key):
+                    pipe.expire(k, ttl)
+        joined = [pid for pid in kept if pid not in stored]
+        if joined:
+            pipe.sadd(f"{key}:parties", *joined)
+        if dropped:
+            pipe.srem(f"{key}:parties", *dropped)
+        if ttl:
+            for k in (f"{key}:meta", f"{key}:parties", f"{key}:open"):
+                pipe.expire(k, ttl)
+        return deltas, len(issues)
+
+    @staticmethod
+    def open_issues(redis_client, key: str) -> int:
+        """How many stored issues have no ZOPA."""
+        return int(redis_client.scard(f"{key}:open"))
+
+    # --- internals --------------------------------------------------------------
+
+    def _place(self, issue_id: str, party_id: str, bounds: Tuple[float, float]) -> None:
+        if self.ranges[issue_id].get(party_id) == bounds:
+            return
+        self.ranges[issue_id][party_id] = bounds
+        lower, upper = self.lower[issue_id], self.upper[issue_id]
+        heapq.heappush(lower, (-bounds[0], party_id))
+        heapq.heappush(upper, (bounds[1], party_id))
+        if len(lower) > 2 * len(self.ranges[issue_id]) + HEAP_SLACK:
+            self._rebuild_issue(issue_id)
+
+    def _top(self, issue_id: str) -> Optional[Tuple[float, float]]:
+        """The issue's ZOPA from the heap tops, dropping stale entries on the way."""
+        ranges = self.ranges[issue_id]
+        lower, upper = self.lower[issue_id], self.upper[issue_id]
+        while lower and ranges.get(lower[0][1], (None,))[0] != -lower[0][0]:
+            heapq.heappop(lower)
+        while upper and ranges.get(upper[0][1], (None, None))[1] != upper[0][0]:
+            heapq.heappop(upper)
+        if not lower or not upper:
+            return None
+        lo, hi = -lower[0][0], upper[0][0]
+        return (lo, hi) if lo <= hi else None
+
+    def _refresh(self, issue_ids: List[str]) -> List[Dict[str, Any]]:
+        deltas = []
+        for iid in issue_ids:
+            interval = self._top(iid)
+            if interval != self.zopa[iid]:
+                self.zopa[iid] = interval
+                deltas.append({'issue_id': iid, 'has_zopa': interval is not None,
+                               'interval': list(interval) if interval is not None else None})
+        return deltas
+
+    def _rebuild_issue(self, issue_id: str) -> None:
+        ranges = self.ranges[issue_id]
+        self.lower[issue_id] = [(-lo, pid) for pid, (lo, _) in ranges.items()]
+        self.upper[issue_id] = [(hi, pid) for pid, (_, hi) in ranges.items()]
+        heapq.heapify(self.lower[issue_id])
+        heapq.heapify(self.upper[issue_id])
+
+    def _rebuild(self, issue_ids: Optional[Iterable[str]] = None) -> None:
+        for iid in (self.defaults if issue_ids is None else issue_ids):
+            self.ranges[iid] = {pid: (min(r, t), max(r, t)) for pid, values in self.values.items()
+                                for r, t in [values.get(iid, self.defaults[iid])]}
+            self._rebuild_issue(iid)
+            self.zopa[iid] = self._top(iid)
+
+
+def _issue_keys(key: str, issue_id: str) -> Tuple[str, str, str]:
+    """The issue's party values hash and its sorted sets of lower and upper bounds."""
+    return f"{key}:issue:{issue_id}:values", f"{key}:issue:{issue_id}:lower", f"{key}:issue:{issue_id}:upper"
+
+
+def _intersection(lower: List[float], upper: List[float]) -> Optional[Tuple[float, float]]:
+    if not lower or not upper:
+        return None
+    lo, hi = max(lower), min(upper)
+    return (lo, hi) if lo <= hi else None
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
@@ -0,0 +1,79 @@
+"""Rate-limited progress publishing over Redis pub/sub.
+
+Long-running tasks push intermediate snapshots to a channel such as
+``neg:{id}:opt`` (see ARCH.md). Publishing is best-effort: a missing or
+unreachable Redis never fails the task. A client can also ask the task to
+stop early by setting the ``{channel}:cancel`` key.
+"""
+from typing import Dict, Any, Optional
+import json
+import time
+import structlog
+
+from .config import settings
+
+logger = structlog.get_logger()
+
+DEFAULT_MIN_INTERVAL = 0.25
+
+
+def optimization_channel(negotiation_id: str) -> str:
+    return f"neg:{negotiation_id}:opt"
+
+
+def zopa_channel(negotiation_id: str) -> str:
+    return f"neg:{negotiation_id}:zopa"
+
+
+class ProgressPublisher:
+    """Publishes JSON messages to one channel at most once per ``min_interval`` seconds.
+
+    redis_client: defaults to a client for settings.REDIS_URL, created on first use
+    """
+
+    def __init__(self, channel: str, min_interval: float = DEFAULT_MIN_INTERVAL, redis_client=None):
+        self.channel = channel
+        self.cancel_key = f"{channel}:cancel"
+        self.min_interval = min_interval
+        self.published = 0
+        self._redis = redis_client
+        self._last = -float('inf')
+        self._disabled = False
+
+    def due(self) -> bool:
+        """True when the rate limit allows another snapshot."""
+        return time.monotonic() - self._last >= self.min_interval
+
+    def publish(self, message: Dict[str, Any], force: bool = False) -> bool:
+        if not force and not self.due():
+            return False
+        self._last = time.monotonic()
+        client = self._client()
+        if client is None:
+            return False
+        try:
+            client.publish(self.channel, json.dumps(message))
+            self.published += 1
+            return True
+        except Exception as e:
+            logger.warning("Progress publish failed", channel=self.channel, error=str(e))
+            return False
+
+    def cancelled(self) -> bool:
+        client = self._client()
+        if client is None:
+            return False
+        try:
+            return bool(client.exists(self.cancel_key))
+        except Exception:
+            return False
+
+    def _client(self) -> Optional[Any]:
+        if self._redis is None and not self._disabled:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(settings.REDIS_URL)
+            except Exception as e:
+                logger.warning("Progress publishing disabled", error=str(e))
+                self._disabled = True
+        return self._redis
@@ -1,126 +1,631 @@
-from celery import shared_task
-from typing import Dict, Any, List, Tuple
-import structlog
+from celery import chord, shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from typing import Dict, Any, List, Optional
 import math
+import time
+import structlog
+import numpy as np
+
+from ..config import settings
+from ..progress import ProgressPublisher, optimization_channel
+from ..engine.branch_bound import branch_and_bound
+from ..engine.cache import MAX_CACHED_BUNDLES, BundleCache, content_key, issues_fingerprint
+from ..engine.refinement import level_resolutions, refine_frontier
+from ..engine.shapley import EXACT_PARTIES, combine_shapley, shapley_values
+from ..engine.sensitivity import elasticities, party_features, perturbed_weights, recommendations, tipping_points
+from ..engine.utility import UtilityEngine, raw_weight_matrix
+from ..engine.columnar import to_columnar
+from ..engine.constraints import feasible_intervals, prune_grids
+from ..engine.curves import curves_from_preferences
+from ..engine.continuous import OBJECTIVES, solve_continuous
+from ..engine.enumeration import (
+    DEFAULT_CHUNK_SIZE, GridResolution, ParetoArchive, RunningBest,
+    grid_size, iter_combination_chunks, resolve_resolutions, shard_ranges,
+)
 
 logger = structlog.get_logger()
 
-@shared_task
-def optimize_bundles(issues: List[Dict[str, Any]], utilities: Dict[str, Dict[str, float]], method: str = 'nash', max_points: int = 500) -> Dict[str, Any]:
+# Default cap for the tasks that materialize the grid (sensitivity, attribution)
+MAX_COMBINATIONS = 5000
+MAX_NODES = 200_000
+OUTPUT_FORMATS = ('points', 'columnar', 'columnar_b64')
+SEARCHES = ('enumerate', 'branch_and_bound')
+MAX_ALTERNATIVES = 5
+
+_cache: Optional[BundleCache] = None
+
+def get_bundle_cache() -> BundleCache:
+    """Process-wide bundle cache, with a Redis tier when BUNDLE_CACHE_REDIS_URL is set."""
+    global _cache
+    if _cache is None:
+        redis_client = None
+        if settings.BUNDLE_CACHE_REDIS_URL:
+            import redis
+            redis_client = redis.Redis.from_url(settings.BUNDLE_CACHE_REDIS_URL)
+        _cache = BundleCache(settings.BUNDLE_CACHE_SIZE, redis_client, settings.BUNDLE_CACHE_TTL,
+                             settings.BUNDLE_CACHE_BYTES)
+    return _cache
+
+@shared_task(bind=True)
+def optimize_bundles(self, issues: List[Dict[str, Any]], utilities: Dict[str, Dict[str, float]], method: str = 'nash', max_points: int = 500,
+                     grid_resolution: GridResolution = 11, max_combinations: Optional[int] = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE, objective: str = 'nash', starts: int = 8,
+                     seed: int = 0, shards: int = 1, use_cache: bool = True, refine_levels: int = 0,
+                     time_budget: Optional[float] = None, output_format: str = 'points',
+                     deadline_ms: Optional[int] = None, negotiation_id: Optional[str] = None,
+                     preferences: Optional[Any] = None, prune: bool = True, search: str = 'enumerate',
+                     max_nodes: Optional[int] = MAX_NODES) -> Dict[str, Any]:
     """Optimize bundles across issues to compute Pareto frontier and recommend bundles.
 
     issues: [{ id, title, minValue, maxValue }]
     utilities: { party_id: { issue_id:value_utility_weighted } } or per-issue utilities
-    method: 'nash' | 'kalai' | 'wsw' (weighted social welfare)
+    method: 'nash' | 'kalai' | 'wsw' (weighted social welfare) | 'continuous'
+    grid_resolution: grid points per issue, or { issue_id: points }
+    max_combinations: opt-in cap on evaluated bundles, taken in grid order (the result
+        then reports truncated); by default the full grid is streamed
+    chunk_size: bundles evaluated per block; bounds peak memory
+    objective: with method='continuous', the solution returned as best ('nash' | 'kalai' | 'wsw')
+    starts, seed: multi-start count and RNG seed for the continuous Nash solver
+    shards: split the grid by the leading issue's values into this many
+        optimize_bundle_shard sub-tasks, merged by merge_bundle_shards
+    use_cache: reuse cached results, grids and per-party utility columns;
+        a weight change re-scores only that party's column
+    refine_levels: after the coarse grid pass, halve the grid step this many times
+        around the frontier only (adaptive mode; results report per-level counts)
+    time_budget: seconds after which adaptive mode starts no further level
+    output_format: 'points' (one dict per point) | 'columnar' (ids once, flat arrays)
+        | 'columnar_b64' (ids once, base64 float32 buffers); see engine.columnar
+    deadline_ms: anytime mode; stream the grid in-process and return the best so far
+        when the budget runs out (or on cancel / soft time limit)
+    negotiation_id: with deadline_ms, publish best and frontier snapshots to neg:{id}:opt
+    preferences: normalized preferences (as from normalize_intake); their utility
+        curves shape each party's utility (engine.curves), and with issue constraints
+        they bound each issue's feasible values (engine.constraints)
+    prune: drop grid values that break red lines, must-haves or reservation values
+        before enumeration; totals then count feasible bundles only
+    search: 'enumerate' scores bundles to build the frontier; 'branch_and_bound'
+        finds only the exact best bundle of the full grid ('nash' | 'wsw'),
+        ignoring max_combinations, and reports node and prune counts
+    max_nodes: with branch_and_bound, return the incumbent after this many nodes
+        (exact=False); None searches to the end. time_budget also applies
     """
-    logger.info("Starting bundle optimization", method=method, issues=len(issues))
+    logger.info("Starting bundle optimization", method=method, issues=len(issues), shards=shards)
 
     try:
-        # Discretize space (coarse grid for MVP)
-        grid_resolution = 11  # 0..10
-        grids: List[List[float]] = []
-        for issue in issues:
-            lo = float(issue.get('minValue', 0))
-            hi = float(issue.get('maxValue', 100))
-            step = (hi - lo) / (grid_resolution - 1)
-            grids.append([lo + step * i for i in range(grid_resolution)])
-
-        # Generate combinations (guard explosion by capping)
-        combos: List[Tuple[float, ...]] = []
-        def backtrack(idx: int, acc: List[float]):
-            nonlocal combos
-            if len(combos) >= 5000:  # hard cap
-                return
-            if idx == len(grids):
-                combos.append(tuple(acc))
-                return
-            for v in grids[idx]:
-                acc.append(v)
-                backtrack(idx + 1, acc)
-                acc.pop()
-        backtrack(0, [])
-
-        party_ids = list(utilities.keys())
-        issue_ids = [issue['id'] for issue in issues]
-
-        def compute_party_utility(party_id: str, values: Dict[str, float]) -> float:
-            # Expect utilities[party_id][issue_id] to be a weight factor [0..1] and we map value to 0..1 by issue range
-            total = 0.0
-            weight_sum = 0.0
-            for issue in issues:
-                iid = issue['id']
-                lo = float(issue.get('minValue', 0))
-                hi = float(issue.get('maxValue', 100))
-                w = float(utilities.get(party_id, {}).get(iid, 0.0))
-                if hi > lo:
-                    normalized = (values[iid] - lo) / (hi - lo)
-                else:
-                    normalized = 0.0
-                total += w * normalized
-                weight_sum += max(w, 0.0)
-            return total / weight_sum if weight_sum > 0 else 0.0
-
-        # Evaluate combinations
-        evaluated = []
-        for combo in combos:
-            values = { issue_ids[i]: combo[i] for i in range(len(issue_ids)) }
-            party_utils = { pid: compute_party_utility(pid, values) for pid in party_ids }
-            # Aggregate per method
-            if method == 'nash':
-                # Nash product
-                agg = 1.0
-                for pid in party_ids:
-                    agg *= max(party_utils[pid], 1e-6)
-            elif method == 'kalai':
-                # Equal proportional gains: approx by minimizing variance around mean
-                mean_u = sum(party_utils.values()) / max(1, len(party_utils))
-                agg = -sum((u - mean_u) ** 2 for u in party_utils.values())
-            else:  # wsw
-                agg = sum(party_utils.values())
-            evaluated.append({
-                'values': values,
-                'party_utils': party_utils,
-                'score': agg
-            })
-
-        # Compute Pareto frontier
-        def dominates(a, b):
-            better_or_equal_all = True
-            strictly_better = False
-            for pid in party_ids:
-                if a['party_utils'][pid] < b['party_utils'][pid]:
-                    better_or_equal_all = False
-                    break
-                if a['party_utils'][pid] > b['party_utils'][pid]:
-                    strictly_better = True
-            return better_or_equal_all and strictly_better
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        if search not in SEARCHES:
+            raise ValueError(f"Unknown search: {search}")
+        curves = curves_from_preferences(preferences)
+        engine = UtilityEngine(issues, utilities, curves=curves)
+        if method == 'continuous':
+            if not engine.is_linear:
+                raise ValueError("Continuous mode supports linear utility curves only")
+            return _optimize_continuous(engine, objective, starts, seed)
 
-        pareto = []
-        for i, a in enumerate(evaluated):
-            if any(dominates(b, a) for b in evaluated if b is not a):
-                continue
-            pareto.append(a)
+        # Discretize space, dropping values no party can accept
+        grids, pruning = _bundle_grids(engine, issues, grid_resolution, preferences, prune)
+        total = grid_size(grids)
+        if search == 'branch_and_bound':
+            result = _optimize_branch_bound(engine, grids, method, total, max_nodes, time_budget)
+            return _with_pruning(result, pruning)
+        stop = total if max_combinations is None else min(total, max_combinations)
+        if stop < total:
+            logger.warning("Bundle grid truncated", total=total, evaluated=stop)
+        if refine_levels > 0:
+            if deadline_ms is not None:
+                budget = deadline_ms / 1000.0
+                time_budget = budget if time_budget is None else min(time_budget, budget)
+            result = _optimize_adaptive(engine, issues, grid_resolution, method, max_points, stop, total,
+                                        chunk_size, refine_levels, time_budget, output_format,
+                                        pruning['intervals'])
+            return _with_pruning(result, pruning)
 
-        # Sort frontier by sum utility desc and cap
-        pareto.sort(key=lambda x: sum(x['party_utils'].values()), reverse=True)
-        if len(pareto) > max_points:
-            step = max(1, len(pareto) // max_points)
-            pareto = pareto[::step][:max_points]
+        if deadline_ms is not None:
+            result = _optimize_anytime(engine, grids, method, max_points, stop, total, chunk_size,
+                                       deadline_ms, negotiation_id, output_format)
+            return _with_pruning(result, pruning)
 
-        # Best recommendation by chosen method
-        best = max(evaluated, key=lambda x: x['score']) if evaluated else None
+        ranges = [(lo, min(hi, stop)) for lo, hi in shard_ranges(grids, shards) if lo < stop] if shards > 1 else []
+        if len(ranges) <= 1:
+            if not use_cache:
+                best, archive = _evaluate_range(engine, grids, method, 0, stop, chunk_size)
+                result = _bundle_result(engine, method, best, archive, max_points, stop, total, output_format)
+                return _with_pruning(result, pruning)
 
+            cache = get_bundle_cache()
+            key = content_key('result', issues_fingerprint(issues), utilities, curves, method, max_points,
+                              [grid.tolist() for grid in grids], stop, output_format)
+            result = cache.get_result(key)
+            if result is not None:
+                logger.info("Bundle optimization served from cache", frontier_size=result['frontier_size'])
+                return _with_pruning(result, pruning)
+            if stop <= MAX_CACHED_BUNDLES:
+                best, archive = _evaluate_cached(cache, engine, utilities, grids, method, stop)
+            else:
+                best, archive = _evaluate_range(engine, grids, method, 0, stop, chunk_size)
+            result = _bundle_result(engine, method, best, archive, max_points, stop, total, output_format)
+            cache.set_result(key, result)
+            return _with_pruning(result, pruning)
+
+        if self.request.called_directly:
+            # No worker to fan out to: run the shards in-process through the same merge
+            parts = [optimize_bundle_shard(issues, utilities, method, grid_resolution, lo, hi, chunk_size,
+                                           preferences, prune)
+                     for lo, hi in ranges]
+            result = merge_bundle_shards(parts, issues, utilities, method, max_points, stop, total, output_format)
+            return _with_pruning(result, pruning)
+    except Exception as e:
+        logger.error("Bundle optimization failed", error=str(e))
+        return { 'status': 'failed', 'error': str(e) }
+
+    # Replace this task with the chord so callers' AsyncResult receives the merged result
+    logger.info("Dispatching bundle optimization shards", shards=len(ranges), total=total)
+    header = [optimize_bundle_shard.s(issues, utilities, method, grid_resolution, lo, hi, chunk_size,
+                                      preferences, prune)
+              for lo, hi in ranges]
+    return self.replace(chord(header, merge_bundle_shards.s(issues, utilities, method, max_points, stop, total,
+                                                                output_format, _pruning_summary(pruning))))
+
+@shared_task
+def optimize_bundle_shard(issues: List[Dict[str, Any]], utilities: Dict[str, Dict[str, float]], method: str,
+                          grid_resolution: GridResolution, start: int, stop: int,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE, preferences: Optional[Any] = None,
+                          prune: bool = True) -> Dict[str, Any]:
+    """Evaluate the flat-index slice [start, stop) of the (pruned) bundle grid.
+
+    Returns the slice's running best and non-dominated set for merge_bundle_shards.
+    """
+    engine = UtilityEngine(issues, utilities, curves=curves_from_preferences(preferences))
+    grids, _ = _bundle_grids(engine, issues, grid_resolution, preferences, prune)
+    best, archive = _evaluate_range(engine, grids, method, start, stop, chunk_size)
+    logger.info("Bundle shard completed", start=start, stop=stop, frontier_size=len(archive))
+    return {'start': start, 'stop': stop, 'best': best.to_dict(), 'archive': archive.to_dict()}
+
+@shared_task
+def merge_bundle_shards(shard_results: List[Dict[str, Any]], issues: List[Dict[str, Any]],
+                        utilities: Dict[str, Dict[str, float]], method: str, max_points: int,
+                        evaluated: int, total: int, output_format: str = 'points',
+                        pruning: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Chord callback: fold shard bests and frontiers into the global result."""
+    try:
+        engine = UtilityEngine(issues, utilities)
+        best = RunningBest()
+        archive = ParetoArchive(engine.n_issues, engine.n_parties)
+        for part in shard_results:
+            best.merge(RunningBest.from_dict(part['best']))
+            archive.merge(ParetoArchive.from_dict(part['archive'], engine.n_issues, engine.n_parties))
+        result = _bundle_result(engine, method, best, archive, max_points, evaluated, total, output_format)
+        result['shards'] = len(shard_results)
+        if pruning:
+            result.update(pruning)
+        return result
+    except Exception as e:
+        logger.error("Bundle shard merge failed", error=str(e))
+        return { 'status': 'failed', 'error': str(e) }
+
+@shared_task
+def analyze_bundle_sensitivity(issues: List[Dict[str, Any]], utilities: Dict[str, Dict[str, float]],
+                               method: str = 'nash', grid_resolution: GridResolution = 11,
+                               max_combinations: Optional[int] = MAX_COMBINATIONS, mode: str = 'independent',
+                               magnitude: float = 0.1, samples: int = 500, seed: int = 0,
+                               concentration: float = 100.0, sweep_range: float = 0.5, sweep_steps: int = 21,
+                               preferences: Optional[Any] = None, prune: bool = True,
+                               use_cache: bool = True) -> Dict[str, Any]:
+    """How stable the recommended bundle is when party weights move.
+
+    The grid and its utility features are built once; every perturbed weight set
+    is then re-scored with a batched matrix product (see engine.sensitivity).
+    mode: 'independent' | 'issue' | 'party' | 'dirichlet' random perturbations
+    magnitude: relative weight change for the random modes (0.1 = ±10%)
+    concentration: Dirichlet concentration; higher stays closer to the current weights
+    sweep_range, sweep_steps: single-weight factors 1 ± sweep_range tested for tipping
+        points and elasticities
+    Returns the baseline recommendation, flip rate, most frequent alternatives, the
+    smallest flipping change per (party, issue) weight and per-issue elasticities.
+    """
+    logger.info("Starting bundle sensitivity analysis", method=method, mode=mode, samples=samples)
+
+    try:
+        engine = UtilityEngine(issues, utilities, curves=curves_from_preferences(preferences))
+        grids, pruning = _bundle_grids(engine, issues, grid_resolution, preferences, prune)
+        total = grid_size(grids)
+        stop = total if max_combinations is None else min(total, max_combinations)
+        if use_cache and stop <= MAX_CACHED_BUNDLES:
+            _, combos, normalized = get_bundle_cache().grid(engine, grids, stop)
+        else:
+            combos = np.vstack([chunk for _, chunk in iter_combination_chunks(grids, stop=stop)] or
+                               [np.zeros((0, engine.n_issues))])
+            normalized = engine.normalize(combos)
+        if not len(combos):
+            raise ValueError("No feasible bundles to analyze")
+
+        features = party_features(engine, normalized)
+        raw = raw_weight_matrix(issues, utilities, engine.party_ids)
+        baseline, baseline_score = recommendations(features, raw[None], method)
+        baseline = int(baseline[0])
+
+        weights, perturbed_party = perturbed_weights(raw, mode, magnitude, samples, seed, concentration)
+        best, scores = recommendations(features, weights, method)
+        flipped = best != baseline
+        indices, counts = np.unique(best, return_counts=True)
+        order = np.argsort(-counts, kind='stable')
+        alternatives = [{'bundle': dict(zip(engine.issue_ids, combos[indices[k]].tolist())),
+                         'frequency': float(counts[k] / samples)}
+                        for k in order if indices[k] != baseline][:MAX_ALTERNATIVES]
+
+        factors = np.linspace(1.0 - sweep_range, 1.0 + sweep_range, sweep_steps)
+        tipping = tipping_points(features, raw, method, baseline, factors)
+        slopes = elasticities(features, raw, normalized, method, factors)
+
+        utils = engine.party_utilities(combos[baseline][None, :])[0]
         result = {
             'status': 'success',
             'method': method,
-            'pareto': pareto,
-            'best': best,
-            'party_ids': party_ids,
-            'issue_ids': issue_ids,
-            'frontier_size': len(pareto)
+            'mode': mode,
+            'samples': samples,
+            'baseline': engine.to_point(combos[baseline], utils, baseline_score[0]),
+            'flip_rate': float(flipped.mean()) if samples else 0.0,
+            'alternatives': alternatives,
+            'recommended_ranges': {issue_id: [float(combos[best, i].min()), float(combos[best, i].max())]
+                                   for i, issue_id in enumerate(engine.issue_ids)} if samples else {},
+            'tipping_points': {pid: {issue_id: {'increase': _finite(tipping['increase'][i, p]),
+                                                'decrease': _finite(tipping['decrease'][i, p])}
+                                     for i, issue_id in enumerate(engine.issue_ids)}
+                               for p, pid in enumerate(engine.party_ids)},
+            'elasticities': dict(zip(engine.issue_ids, slopes.tolist())),
+            'combinations_evaluated': len(combos),
+            'combinations_total': total,
+            'truncated': stop < total,
         }
-        logger.info("Bundle optimization completed", frontier_size=len(pareto))
+        if perturbed_party is not None:
+            result['flip_rate_by_party'] = {pid: float(flipped[perturbed_party == p].mean())
+                                            for p, pid in enumerate(engine.party_ids)
+                                            if (perturbed_party == p).any()}
+        logger.info("Bundle sensitivity analysis completed", flip_rate=result['flip_rate'])
+        return _with_pruning(result, pruning)
+
+    except Exception as e:
+        logger.error("Bundle sensitivity analysis failed", error=str(e))
+        return { 'status': 'failed', 'error': str(e) }
+
+@shared_task(bind=True)
+def attribute_party_contributions(self, issues: List[Dict[str, Any]], utilities: Dict[str, Dict[str, float]],
+                                  method: str = 'wsw', grid_resolution: GridResolution = 11,
+                                  max_combinations: Optional[int] = MAX_COMBINATIONS,
+                                  max_permutations: int = 2000, min_permutations: int = 100, batch: int = 64,
+                                  tolerance: float = 0.01, seed: int = 0, processes: Optional[int] = 1,
+                                  preferences: Optional[Any] = None, prune: bool = True,
+                                  use_cache: bool = True, shards: int = 1) -> Dict[str, Any]:
+    """Shapley value of each party's participation in the achievable joint utility.
+
+    A coalition is worth the best 'wsw' (welfare) or 'nash' score the bundle grid
+    offers its members; values are estimated by permutation sampling with every
+    coalition scored once, or computed exactly for small party counts (see engine.shapley).
+    max_permutations, min_permutations, batch: sampling limits and round size
+    tolerance: stop when every standard error is within this share of the grand value
+    processes: local worker processes for an inline run; keep 1 under a Celery
+        prefork worker, which cannot start child processes
+    shards: when sampling, split the permutations across this many
+        attribute_contribution_shard sub-tasks with seeds spawned from ``seed``,
+        pooled by merge_contribution_shards; results depend on seed and shards
+    """
+    logger.info("Starting party contribution attribution", method=method, parties=len(utilities), shards=shards)
+
+    try:
+        engine = UtilityEngine(issues, utilities, curves=curves_from_preferences(preferences))
+        if shards <= 1 or engine.n_parties <= EXACT_PARTIES:
+            party_utils, stop, total, pruning = _contribution_utilities(engine, issues, utilities, grid_resolution,
+                                                                       max_combinations, preferences, prune, use_cache)
+            attribution = shapley_values(party_utils, method, max_permutations=max_permutations,
+                                         min_permutations=min_permutations, batch=batch, tolerance=tolerance,
+                                         seed=seed, processes=processes)
+            return _attribution_result(engine, method, attribution, stop, total, pruning)
+
+        # Each shard samples its share and stops at a looser tolerance, since pooling
+        # shards divides the standard errors by about sqrt(shards)
+        seeds = [int(stream.generate_state(1)[0]) for stream in np.random.SeedSequence(seed).spawn(shards)]
+        shard_settings = dict(max_permutations=-(-max_permutations // shards),
+                              min_permutations=-(-min_permutations // shards), batch=batch,
+                              tolerance=tolerance * math.sqrt(shards))
+        grid_args = (issues, utilities, method, grid_resolution, max_combinations, preferences, prune, use_cache)
+        if self.request.called_directly:
+            # No worker to fan out to: run the shards in-process through the same merge
+            parts = [attribute_contribution_shard(*grid_args, shard_seed, shard_settings) for shard_seed in seeds]
+            return merge_contribution_shards(parts, issues, utilities, method, tolerance, preferences)
+    except Exception as e:
+        logger.error("Party contribution attribution failed", error=str(e))
+        return { 'status': 'failed', 'error': str(e) }
+
+    # Replace this task with the chord so callers' AsyncResult receives the merged result
+    logger.info("Dispatching party contribution shards", shards=shards)
+    header = [attribute_contribution_shard.s(*grid_args, shard_seed, shard_settings) for shard_seed in seeds]
+    return self.replace(chord(header, merge_contribution_shards.s(issues, utilities, method, tolerance, preferences)))
+
+@shared_task
+def attribute_contribution_shard(issues: List[Dict[str, Any]], utilities: Dict[str, Dict[str, float]], method: str,
+                                 grid_resolution: GridResolution, max_combinations: Optional[int],
+                                 preferences: Optional[Any], prune: bool, use_cache: bool, seed: int,
+                                 settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Sample Shapley permutations with one seed; returns the sums for merge_contribution_shards."""
+    engine = UtilityEngine(issues, utilities, curves=curves_from_preferences(preferences))
+    party_utils, stop, total, pruning = _contribution_utilities(engine, issues, utilities, grid_resolution,
+                                                               max_combinations, preferences, prune, use_cache)
+    attribution = shapley_values(party_utils, method, seed=seed, processes=1, exact_parties=0, **settings)
+    logger.info("Party contribution shard completed", seed=seed, permutations=attribution['permutations'])
+    return {
+        'totals': attribution['totals'].tolist(),
+        'squares': attribution['squares'].tolist(),
+        'permutations': attribution['permutations'],
+        'coalitions': attribution['coalitions'],
+        'grand_value': attribution['grand_value'],
+        'combinations_evaluated': stop,
+        'combinations_total': total,
+        'pruning': _pruning_summary(pruning),
+    }
+
+@shared_task
+def merge_contribution_shards(shard_results: List[Dict[str, Any]], issues: List[Dict[str, Any]],
+                              utilities: Dict[str, Dict[str, float]], method: str, tolerance: float,
+                              preferences: Optional[Any] = None) -> Dict[str, Any]:
+    """Chord callback: pool the shards' permutation sums into one Shapley estimate."""
+    try:
+        engine = UtilityEngine(issues, utilities, curves=curves_from_preferences(preferences))
+        parts = [{**part, 'totals': np.asarray(part['totals']), 'squares': np.asarray(part['squares'])}
+                 for part in shard_results]
+        attribution = combine_shapley(parts, tolerance)
+        first = shard_results[0]
+        result = _attribution_result(engine, method, attribution, first['combinations_evaluated'],
+                                     first['combinations_total'], None)
+        result['shards'] = len(shard_results)
+        if first.get('pruning'):
+            result.update(first['pruning'])
         return result
     except Exception as e:
-        logger.error("Bundle optimization failed", error=str(e))
+        logger.error("Party contribution merge failed", error=str(e))
         return { 'status': 'failed', 'error': str(e) }
+
+def _contribution_utilities(engine: UtilityEngine, issues: List[Dict[str, Any]], utilities: Dict[str, Dict[str, float]],
+                            grid_resolution: GridResolution, max_combinations: Optional[int],
+                            preferences: Optional[Any], prune: bool, use_cache: bool):
+    """(bundles x parties) utilities over the (pruned, truncated) grid, with (stop, total, pruning)."""
+    grids, pruning = _bundle_grids(engine, issues, grid_resolution, preferences, prune)
+    total = grid_size(grids)
+    stop = total if max_combinations is None else min(total, max_combinations)
+    if use_cache and stop <= MAX_CACHED_BUNDLES:
+        cache = get_bundle_cache()
+        grid_key, _, normalized = cache.grid(engine, grids, stop)
+        party_utils = cache.party_columns(grid_key, engine, utilities, normalized)
+    else:
+        party_utils = np.vstack([engine.party_utilities(chunk) for _, chunk in iter_combination_chunks(grids, stop=stop)]
+                                or [np.zeros((0, engine.n_parties))])
+    return party_utils, stop, total, pruning
+
+def _attribution_result(engine: UtilityEngine, method: str, attribution: Dict[str, Any], stop: int, total: int,
+                        pruning: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    grand = attribution['grand_value']
+    result = {
+        'status': 'success',
+        'method': method,
+        'party_ids': engine.party_ids,
+        'shapley_values': dict(zip(engine.party_ids, attribution['values'].tolist())),
+        'standard_errors': dict(zip(engine.party_ids, attribution['standard_errors'].tolist())),
+        'shares': dict(zip(engine.party_ids, (attribution['values'] / grand).tolist()))
+                  if grand else {},
+        'grand_value': grand,
+        'permutations': attribution['permutations'],
+        'coalitions_evaluated': attribution['coalitions'],
+        'converged': attribution['converged'],
+        'exact': attribution['exact'],
+        'combinations_evaluated': stop,
+        'combinations_total': total,
+        'truncated': stop < total,
+    }
+    logger.info("Party contribution attribution completed", permutations=attribution['permutations'],
+                coalitions=attribution['coalitions'], converged=attribution['converged'])
+    return _with_pruning(result, pruning) if pruning is not None else result
+
+def _finite(value: float) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+def _bundle_grids(engine: UtilityEngine, issues: List[Dict[str, Any]], grid_resolution: GridResolution,
+                  preferences: Optional[Any], prune: bool):
+    """Per-issue grids, pruned to the feasible intervals when ``prune`` is set."""
+    grids = engine.grids(resolve_resolutions(issues, grid_resolution))
+    full = grid_size(grids)
+    if not prune:
+        return grids, {'intervals': None, 'grid_total': full, 'pruned': 0, 'unparsed': 0}
+    intervals, unparsed = feasible_intervals(issues, preferences)
+    grids = prune_grids(grids, intervals)
+    pruned = full - grid_size(grids)
+    if pruned:
+        logger.info("Bundle grid pruned by constraints", total=full, pruned=pruned)
+    return grids, {'intervals': intervals, 'grid_total': full, 'pruned': pruned, 'unparsed': unparsed}
+
+def _pruning_summary(pruning: Dict[str, Any]) -> Dict[str, Any]:
+    summary = {'combinations_pruned': pruning['pruned'], 'grid_total': pruning['grid_total']}
+    if pruning['intervals'] is not None:
+        summary['feasible_intervals'] = [interval.to_list() for interval in pruning['intervals']]
+        summary['unparsed_constraints'] = pruning['unparsed']
+    return summary
+
+def _with_pruning(result: Dict[str, Any], pruning: Dict[str, Any]) -> Dict[str, Any]:
+    if result.get('status') == 'success':
+        result.update(_pruning_summary(pruning))
+    return result
+
+def _optimize_branch_bound(engine: UtilityEngine, grids: List[np.ndarray], method: str, total: int,
+                           max_nodes: Optional[int], time_budget: Optional[float]) -> Dict[str, Any]:
+    """Exact best bundle of the full grid by branch and bound; no frontier is built."""
+    started = time.monotonic()
+    best, stats = branch_and_bound(engine, grids, method, max_nodes=max_nodes, time_budget=time_budget)
+    logger.info("Branch and bound completed", nodes=stats['nodes'], pruned=stats['pruned'],
+                exact=stats['exact'], elapsed=round(time.monotonic() - started, 3))
+    return {
+        'status': 'success',
+        'method': method,
+        'search': 'branch_and_bound',
+        'pareto': [],
+        'best': engine.to_point(best.combo, best.utils, best.score) if best.index is not None else None,
+        'party_ids': engine.party_ids,
+        'issue_ids': engine.issue_ids,
+        'frontier_size': 0,
+        'combinations_evaluated': stats['leaves'],
+        'combinations_total': total,
+        'truncated': not stats['exact'],
+        'nodes_expanded': stats['nodes'],
+        'nodes_pruned': stats['pruned'],
+        'exact': stats['exact'],
+    }
+
+def _optimize_adaptive(engine: UtilityEngine, issues: List[Dict[str, Any]], grid_resolution: GridResolution,
+                       method: str, max_points: int, stop: int, total: int, chunk_size: int,
+                       refine_levels: int, time_budget: Optional[float], output_format: str,
+                       intervals=None) -> Dict[str, Any]:
+    """Coarse pass plus frontier-local refinement; totals refer to the finest uniform grid."""
+    resolutions = resolve_resolutions(issues, grid_resolution)
+    best, archive, levels = refine_frontier(engine, resolutions, method, refine_levels, stop=stop,
+                                            chunk_size=chunk_size, time_budget=time_budget, intervals=intervals)
+    evaluated = sum(level['evaluated'] for level in levels)
+    finest = math.prod(level_resolutions(resolutions, levels[-1]['level']))
+    result = _bundle_result(engine, method, best, archive, max_points, evaluated, finest, output_format)
+    result['truncated'] = stop < total
+    result['levels'] = levels
+    return result
+
+def _optimize_anytime(engine: UtilityEngine, grids: List[np.ndarray], method: str, max_points: int, stop: int,
+                      total: int, chunk_size: int, deadline_ms: int, negotiation_id: Optional[str],
+                      output_format: str) -> Dict[str, Any]:
+    """Stream the grid until done, the deadline passes, or the client cancels."""
+    deadline = time.monotonic() + deadline_ms / 1000.0
+    publisher = ProgressPublisher(optimization_channel(negotiation_id)) if negotiation_id else None
+    best = RunningBest()
+    archive = ParetoArchive(engine.n_issues, engine.n_parties)
+    evaluated, stopped = 0, None
+    try:
+        for offset, combos in iter_combination_chunks(grids, chunk_size, stop=stop):
+            party_utils = engine.party_utilities(combos)
+            scores = engine.score(party_utils, method)
+            best.update(offset, combos, party_utils, scores)
+            archive.add(offset, combos, party_utils, scores)
+            evaluated = offset + len(combos)
+            if evaluated < stop and time.monotonic() >= deadline:
+                stopped = 'deadline'
+                break
+            if publisher is not None and publisher.due():
+                if publisher.cancelled():
+                    stopped = 'cancelled'
+                    break
+                publisher.publish(_snapshot(engine, best, archive, max_points, evaluated, total, 'snapshot'))
+    except SoftTimeLimitExceeded:
+        stopped = 'time_limit'
+
+    if stopped:
+        logger.warning("Bundle optimization stopped early", reason=stopped, evaluated=evaluated, total=total)
+    result = _bundle_result(engine, method, best, archive, max_points, evaluated, total, output_format)
+    result['stopped_early'] = stopped
+    if publisher is not None:
+        publisher.publish(_snapshot(engine, best, archive, max_points, evaluated, total, 'final'), force=True)
+        result['snapshots_published'] = publisher.published
+    return result
+
+def _snapshot(engine: UtilityEngine, best: RunningBest, archive: ParetoArchive, max_points: int,
+              evaluated: int, total: int, kind: str) -> Dict[str, Any]:
+    """Progress message for neg:{id}:opt; the frontier is always columnar to keep messages small."""
+    order = _frontier_order(archive, max_points)
+    return {
+        'type': kind,
+        'best': engine.to_point(best.combo, best.utils, best.score) if best.index is not None else None,
+        'pareto': to_columnar(engine.issue_ids, engine.party_ids, archive.combos[order], archive.utils[order],
+                              archive.scores[order]),
+        'frontier_size': len(order),
+        'combinations_evaluated': evaluated,
+        'combinations_total': total,
+    }
+
+def _evaluate_range(engine: UtilityEngine, grids: List[np.ndarray], method: str, start: int, stop: int,
+                    chunk_size: int):
+    """Stream combinations block by block, keeping only the best and the frontier."""
+    best = RunningBest()
+    archive = ParetoArchive(engine.n_issues, engine.n_parties)
+    for offset, combos in iter_combination_chunks(grids, chunk_size, start=start, stop=stop):
+        party_utils = engine.party_utilities(combos)
+        scores = engine.score(party_utils, method)
+        best.update(offset, combos, party_utils, scores)
+        archive.add(offset, combos, party_utils, scores)
+    return best, archive
+
+def _evaluate_cached(cache: BundleCache, engine: UtilityEngine, utilities: Dict[str, Dict[str, float]],
+                     grids: List[np.ndarray], method: str, stop: int):
+    """Evaluate the first ``stop`` bundles from the cached grid and party columns."""
+    grid_key, combos, normalized = cache.grid(engine, grids, stop)
+    party_utils = cache.party_columns(grid_key, engine, utilities, normalized)
+    scores = engine.score(party_utils, method)
+    best = RunningBest()
+    archive = ParetoArchive(engine.n_issues, engine.n_parties)
+    best.update(0, combos, party_utils, scores)
+    archive.add(0, combos, party_utils, scores)
+    return best, archive
+
+def _bundle_result(engine: UtilityEngine, method: str, best: RunningBest, archive: ParetoArchive,
+                   max_points: int, evaluated: int, total: int, output_format: str = 'points') -> Dict[str, Any]:
+    order = _frontier_order(archive, max_points)
+    if output_format == 'points':
+        pareto = [engine.to_point(archive.combos[i], archive.utils[i], archive.scores[i]) for i in order]
+    else:
+        encoding = 'base64' if output_format == 'columnar_b64' else 'list'
+        pareto = to_columnar(engine.issue_ids, engine.party_ids, archive.combos[order], archive.utils[order],
+                             archive.scores[order], encoding)
+
+    # Best recommendation by chosen method
+    best_point = engine.to_point(best.combo, best.utils, best.score) if best.index is not None else None
+
+    result = {
+        'status': 'success',
+        'method': method,
+        'pareto': pareto,
+        'best': best_point,
+        'party_ids': engine.party_ids,
+        'issue_ids': engine.issue_ids,
+        'frontier_size': len(order),
+        'combinations_evaluated': evaluated,
+        'combinations_total': total,
+        'truncated': evaluated < total
+    }
+    logger.info("Bundle optimization completed", frontier_size=len(order))
+    return result
+
+def _frontier_order(archive: ParetoArchive, max_points: int) -> np.ndarray:
+    # Sort frontier by sum utility desc and cap
+    order = np.argsort(-archive.utils.sum(axis=1), kind='stable')
+    if len(order) > max_points:
+        step = max(1, len(order) // max_points)
+        order = order[::step][:max_points]
+    return order
+
+def _optimize_continuous(engine: UtilityEngine, objective: str, starts: int, seed: int) -> Dict[str, Any]:
+    """Solve every bargaining objective over the continuous issue box; best follows ``objective``."""
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown continuous objective: {objective}")
+
+    solutions = {}
+    for name in OBJECTIVES:
+        solved = solve_continuous(engine, name, starts=starts, seed=seed)
+        point = engine.to_point(solved['values'], solved['party_utils'], solved['score'])
+        point['converged'] = solved['success']
+        point['evaluations'] = solved['evaluations']
+        solutions[name] = point
+
+    logger.info("Continuous bundle optimization completed", objective=objective,
+                converged=solutions[objective]['converged'])
+    return {
+        'status': 'success',
+        'method': 'continuous',
+        'objective': objective,
+        'pareto': [],
+        'best': solutions[objective],
+        'solutions': solutions,
+        'party_ids': engine.party_ids,
+        'issue_ids': engine.issue_ids,
+        'frontier_size': 0
+    }
@@ -1,12 +1,18 @@
 from celery import shared_task
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import structlog
 
+from ..engine.zopa import analyze_joint_zopa
+
 logger = structlog.get_logger()
 
 @shared_task
-def normalize_intake(negotiation_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Normalize intake data for negotiation processing"""
+def normalize_intake(negotiation_data: Dict[str, Any], joint_zopa: bool = False) -> Dict[str, Any]:
+    """Normalize intake data for negotiation processing
+
+    joint_zopa: also run the whole-package ZOPA linear program (off by default;
+        it costs milliseconds against a sub-millisecond intake)
+    """
     logger.info("Starting intake normalization", negotiation_id=negotiation_data.get('id'))
     
     try:
@@ -30,7 +36,8 @@ def normalize_intake(negotiation_data: Dict[str, Any]) -> Dict[str, Any]:
         )
         
         # Validate ZOPA potential
-        zopa_analysis = _analyze_zopa_potential(normalized_preferences)
+        zopa_analysis = _analyze_zopa_potential(normalized_preferences,
+                                                normalized_issues if joint_zopa else None)
         
         result = {
             "status": "normalized",
@@ -151,8 +158,16 @@ def _normalize_preferences(preferences: Dict[str, Any],
     
     return normalized
 
-def _analyze_zopa_potential(preferences: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Analyze Zone of Possible Agreement potential"""
+def _analyze_zopa_potential(preferences: List[Dict[str, Any]],
+                            issues: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Analyze Zone of Possible Agreement potential
+
+    With the issues given, also checks jointly whether any whole package meets
+    every party's weighted reservation utility (see workers.engine.zopa). The
+    joint check only runs when more than one issue carries reservations, since
+    with a single issue it cannot differ from the per-issue one; a failed solve
+    reports joint_zopa_exists as None.
+    """
     issue_analysis = {}
     
     # Group preferences by issue
@@ -188,10 +203,32 @@ def _analyze_zopa_potential(preferences: List[Dict[str, Any]]) -> Dict[str, Any]
     issues_with_zopa = sum(1 for analysis in issue_analysis.values() if analysis['zopa_exists'])
     total_issues = len(issue_analysis)
     
-    return {
+    result = {
         "overall_zopa_exists": issues_with_zopa > 0,
         "zopa_coverage": issues_with_zopa / total_issues if total_issues > 0 else 0,
         "issues_with_zopa": issues_with_zopa,
         "total_issues": total_issues,
         "issue_analysis": issue_analysis
     }
+
+    if issues and len(issue_prefs) > 1:
+        reservations, targets, weights = {}, {}, {}
+        for pref in preferences:
+            reservations.setdefault(pref['partyId'], {})[pref['issueId']] = pref['reservationValue']
+            targets.setdefault(pref['partyId'], {})[pref['issueId']] = pref['targetValue']
+            weights.setdefault(pref['partyId'], {})[pref['issueId']] = pref['weight']
+        # Parties that weighted nothing count every issue equally
+        for party_id, party_weights in weights.items():
+            if not any(w > 0 for w in party_weights.values()):
+                weights[party_id] = {issue_id: 1.0 for issue_id in party_weights}
+        try:
+            joint = analyze_joint_zopa(issues, reservations, targets, weights, preferences=preferences)
+        except RuntimeError as e:
+            logger.warning("Joint ZOPA check failed", error=str(e))
+            result["joint_zopa_exists"] = None
+            result["joint_analysis"] = None
+        else:
+            result["joint_zopa_exists"] = joint['feasible']
+            result["joint_analysis"] = joint
+
+    return result
@@ -2,6 +2,8 @@ from celery import shared_task
 from typing import Dict, Any, List
 import structlog
 
+from ..engine.columnar import frontier_size, is_columnar, points_to_columnar
+
 logger = structlog.get_logger()
 
 @shared_task
@@ -12,9 +14,14 @@ def consolidate_final_package(
     positions: Dict[str, Any],
     offers: List[Dict[str, Any]],
     optimization: Dict[str, Any],
-    risk: Dict[str, Any]
+    risk: Dict[str, Any],
+    include_frontier: bool = False
 ) -> Dict[str, Any]:
-    """Consolidate final package draft combining positions, selected offers, optimization insights, and risk notes."""
+    """Consolidate final package draft combining positions, selected offers, optimization insights, and risk notes.
+
+    include_frontier: also carry the full Pareto frontier (columnar) in the package;
+    by default only pareto_frontier_size is reported
+    """
     logger.info("Consolidating final package", negotiation_id=negotiation.get('id'))
     try:
         # Select recommended bundle from optimization (best)
@@ -36,6 +43,14 @@ def consolidate_final_package(
                 selected = min(candidates, key=lambda o: abs(float(o.get('proposed_value', 0)) - float(target)))
             selected_offers.append(selected)
 
+        # A failed or empty optimization has no frontier to carry
+        pareto = [] if optimization.get('status') == 'failed' else optimization.get('pareto') or []
+        size = frontier_size(pareto)
+        if include_frontier and size and not is_columnar(pareto):
+            # Point-format results are converted to columnar once here
+            party_ids = optimization.get('party_ids') or list(pareto[0].get('party_utils', {}))
+            pareto = points_to_columnar(pareto, optimization.get('issue_ids') or [i['id'] for i in issues], party_ids)
+
         # Risk notes
         risk_notes = []
         for item in risk.get('issues', []):
@@ -58,7 +73,7 @@ def consolidate_final_package(
             'positions': positions,
             'selected_offers': selected_offers,
             'recommended_values': recommended_values,
-            'pareto_frontier_size': optimization.get('frontier_size'),
+            'pareto_frontier_size': optimization.get('frontier_size', size),
             'risk_notes': risk_notes,
             'approvals_required': [
                 {'role': 'mediator', 'status': 'pending'},
@@ -66,6 +81,8 @@ def consolidate_final_package(
                 {'role': 'analyst', 'status': 'pending'}
             ]
         }
+        if include_frontier:
+            package['pareto_frontier'] = pareto
         logger.info("Consolidation complete", negotiation_id=negotiation.get('id'))
         return { 'status': 'success', 'package': package }
     except Exception as e:
@@ -0,0 +1,147 @@
+from celery import chord, shared_task
+from typing import Dict, Any, List, Optional
+import structlog
+import numpy as np
+
+from ..engine.concession import STRATEGIES, preference_arrays
+from ..engine.montecarlo import batch_shards, sample_outcomes, summarize
+from ..engine.simulation import simulate
+
+logger = structlog.get_logger()
+
+@shared_task
+def simulate_negotiation(parties: List[Dict[str, Any]], issues: List[Dict[str, Any]],
+                         preferences: Dict[str, Dict[str, Dict[str, Any]]], max_rounds: int = 20,
+                         tolerance: float = 0.01, patience: int = 3) -> Dict[str, Any]:
+    """Rehearse a negotiation in-process: run the offer rules round after round.
+
+    preferences: { party_id: { issue_id: { weight, reservation_value, target_value, current_value } } }
+        (same fields and defaults as propose_offer)
+    tolerance: converged when every issue's spread across parties is within this share of its range
+    patience: rounds without any movement before declaring deadlock
+    Returns the per-round trajectory and convergence metrics.
+    """
+    logger.info("Starting negotiation simulation", parties=len(parties), issues=len(issues), max_rounds=max_rounds)
+
+    try:
+        weight, reservation, target, current = preference_arrays(parties, issues, preferences)
+        span = _issue_spans(issues)
+
+        run = simulate(weight, reservation, target, current, span, max_rounds, tolerance, patience)
+
+        final = run['values'][-1] if run['rounds'] else current
+        party_ids = [party.get('id') for party in parties]
+        issue_ids = [issue.get('id') for issue in issues]
+        result = {
+            'status': 'success',
+            'outcome': run['status'],
+            'rounds': run['rounds'],
+            'party_ids': party_ids,
+            'issue_ids': issue_ids,
+            'strategy_names': list(STRATEGIES),
+            'trajectory': {
+                'values': run['values'].tolist(),
+                'strategies': run['strategies'].tolist(),
+                'spread': run['spread'].tolist(),
+                'max_move': run['moved'].tolist(),
+            },
+            'metrics': {
+                'final_spread': dict(zip(issue_ids, (run['spread'][-1] if run['rounds'] else np.zeros(len(issues))).tolist())),
+                'agreement': dict(zip(issue_ids, final.mean(axis=0).tolist())) if run['status'] == 'converged' else None,
+                'total_concession': dict(zip(party_ids, np.abs(final - run['values'][0]).sum(axis=1).tolist()))
+                                    if run['rounds'] else {},
+            },
+        }
+        logger.info("Negotiation simulation completed", outcome=run['status'], rounds=run['rounds'])
+        return result
+
+    except Exception as e:
+        logger.error("Negotiation simulation failed", error=str(e))
+        return { 'status': 'failed', 'error': str(e) }
+
+@shared_task(bind=True)
+def sample_negotiation_outcomes(self, parties: List[Dict[str, Any]], issues: List[Dict[str, Any]],
+                                preferences: Dict[str, Dict[str, Dict[str, Any]]], samples: int = 1000,
+                                seed: int = 0, processes: Optional[int] = 1, max_rounds: int = 20,
+                                tolerance: float = 0.01, patience: int = 3, weight_sd: float = 0.1,
+                                value_sd: float = 0.05, threshold_sd: float = 0.05, shards: int = 1) -> Dict[str, Any]:
+    """Monte Carlo over simulate_negotiation with perturbed preferences and strategy thresholds.
+
+    weight_sd, value_sd, threshold_sd: noise on weights, on reservation/target values
+        (as a share of the issue range) and on the strategy weight cut-offs
+    processes: local worker processes for an inline run; keep 1 under a Celery
+        prefork worker, which cannot start child processes
+    shards: split the sample batches into this many sample_negotiation_shard
+        sub-tasks, merged by merge_negotiation_samples; results depend only on seed
+    Returns agreement probability, per-issue final value distributions and the
+    rounds-to-agreement histogram (index 0 = round 1).
+    """
+    logger.info("Starting negotiation outcome sampling", samples=samples, seed=seed, shards=shards)
+    settings = dict(max_rounds=max_rounds, tolerance=tolerance, patience=patience, weight_sd=weight_sd,
+                    value_sd=value_sd, threshold_sd=threshold_sd)
+
+    try:
+        ranges = batch_shards(samples, shards) if shards > 1 else []
+        if len(ranges) <= 1:
+            weight, reservation, target, current = preference_arrays(parties, issues, preferences)
+            outcomes = sample_outcomes(weight, reservation, target, current, _issue_spans(issues), samples=samples,
+                                       seed=seed, processes=processes, **settings)
+            return _sampling_result(outcomes, issues, max_rounds, seed)
+
+        if self.request.called_directly:
+            # No worker to fan out to: run the shards in-process through the same merge
+            parts = [sample_negotiation_shard(parties, issues, preferences, samples, seed, lo, hi, settings)
+                     for lo, hi in ranges]
+            return merge_negotiation_samples(parts, issues, max_rounds, seed)
+    except Exception as e:
+        logger.error("Negotiation outcome sampling failed", error=str(e))
+        return { 'status': 'failed', 'error': str(e) }
+
+    # Replace this task with the chord so callers' AsyncResult receives the merged result
+    logger.info("Dispatching negotiation sampling shards", shards=len(ranges), samples=samples)
+    header = [sample_negotiation_shard.s(parties, issues, preferences, samples, seed, lo, hi, settings)
+              for lo, hi in ranges]
+    return self.replace(chord(header, merge_negotiation_samples.s(issues, max_rounds, seed)))
+
+@shared_task
+def sample_negotiation_shard(parties: List[Dict[str, Any]], issues: List[Dict[str, Any]],
+                             preferences: Dict[str, Dict[str, Dict[str, Any]]], samples: int, seed: int,
+                             start: int, stop: int, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Run sample batches [start, stop) of the full seeded sample.
+
+    Returns the per-sample outcome arrays as lists for merge_negotiation_samples.
+    """
+    weight, reservation, target, current = preference_arrays(parties, issues, preferences)
+    outcomes = sample_outcomes(weight, reservation, target, current, _issue_spans(issues), samples=samples,
+                               seed=seed, batch_range=(start, stop), **settings)
+    logger.info("Negotiation sampling shard completed", start=start, stop=stop, samples=len(outcomes['outcome']))
+    return {key: value.tolist() for key, value in outcomes.items()}
+
+@shared_task
+def merge_negotiation_samples(shard_results: List[Dict[str, Any]], issues: List[Dict[str, Any]],
+                              max_rounds: int, seed: int) -> Dict[str, Any]:
+    """Chord callback: concatenate the shards' samples in batch order and summarize."""
+    try:
+        outcomes = {
+            'outcome': np.concatenate([np.asarray(part['outcome'], dtype=np.int64) for part in shard_results]),
+            'rounds': np.concatenate([np.asarray(part['rounds'], dtype=np.int64) for part in shard_results]),
+            'final': np.concatenate([np.asarray(part['final'], dtype=float) for part in shard_results]),
+        }
+        result = _sampling_result(outcomes, issues, max_rounds, seed)
+        result['shards'] = len(shard_results)
+        return result
+    except Exception as e:
+        logger.error("Negotiation sample merge failed", error=str(e))
+        return { 'status': 'failed', 'error': str(e) }
+
+def _sampling_result(outcomes: Dict[str, np.ndarray], issues: List[Dict[str, Any]], max_rounds: int,
+                     seed: int) -> Dict[str, Any]:
+    summary = summarize(outcomes, max_rounds)
+    issue_ids = [issue.get('id') for issue in issues]
+    summary['final_values'] = dict(zip(issue_ids, summary['final_values']))
+    summary['agreed_values'] = dict(zip(issue_ids, summary['agreed_values']))
+    logger.info("Negotiation outcome sampling completed", agreement_probability=summary['agreement_probability'])
+    return {'status': 'success', 'seed': seed, **summary}
+
+def _issue_spans(issues: List[Dict[str, Any]]) -> np.ndarray:
+    return np.array([float(issue.get('maxValue', 100)) - float(issue.get('minValue', 0)) for issue in issues])
@@ -4,14 +4,25 @@ import structlog
 import random
 import math
 
+from ..engine.concession import (
+    FLEXIBILITY, PATTERNS, STRATEGIES, ConcessionState, concession_patterns, confidences, flexibility,
+    preference_arrays, proposed_values, select_strategies,
+)
+
 logger = structlog.get_logger()
 
 @shared_task
 def propose_offer(party_data: Dict[str, Any], issue_data: Dict[str, Any], 
                   preference_data: Dict[str, Any], round_number: int,
                   previous_offers: List[Dict[str, Any]] = None,
-                  other_parties_preferences: List[Dict[str, Any]] = None) -> Dict[str, Any]:
-    """Generate a negotiation offer for a party on a specific issue"""
+                  other_parties_preferences: List[Dict[str, Any]] = None,
+                  concession_state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Generate a negotiation offer for a party on a specific issue
+
+    concession_state: serialized ConcessionState to use instead of scanning
+        previous_offers; the result's concession_update carries back only this
+        (party, issue) slot with the offer recorded, for ConcessionState.merge
+    """
     logger.info("Starting offer proposal",
                party_id=party_data.get('id'),
                issue_id=issue_data.get('id'),
@@ -28,7 +39,11 @@ def propose_offer(party_data: Dict[str, Any], issue_data: Dict[str, Any],
         current_value = preference_data.get('current_value', 50)
         
         # Analyze previous offers to understand negotiation pattern
-        concession_pattern = _analyze_concession_pattern(previous_offers, party_name)
+        state = ConcessionState.from_dict(concession_state) if concession_state is not None else None
+        if state is not None:
+            concession_pattern = state.pattern(party_data.get('id'), issue_data.get('id'))
+        else:
+            concession_pattern = _analyze_concession_pattern(previous_offers, party_name)
         
         # Determine offer strategy based on round and context
         strategy = _determine_offer_strategy(round_number, weight, issue_type, concession_pattern)
@@ -64,12 +79,16 @@ def propose_offer(party_data: Dict[str, Any], issue_data: Dict[str, Any],
                    proposed_value=proposed_value,
                    strategy=strategy)
         
-        return {
+        result = {
             "status": "success",
             "offer": offer,
             "party_id": party_data.get('id'),
             "issue_id": issue_data.get('id')
         }
+        if state is not None:
+            state.record(party_data.get('id'), issue_data.get('id'), proposed_value)
+            result["concession_update"] = state.slots([(party_data.get('id'), issue_data.get('id'))]).to_dict()
+        return result
         
     except Exception as e:
         logger.error("Offer proposal failed",
@@ -83,6 +102,78 @@ def propose_offer(party_data: Dict[str, Any], issue_data: Dict[str, Any],
             "issue_id": issue_data.get('id')
         }
 
+@shared_task
+def propose_round(parties: List[Dict[str, Any]], issues: List[Dict[str, Any]],
+                  preferences: Dict[str, Dict[str, Dict[str, Any]]], round_number: int,
+                  previous_offers: List[Dict[str, Any]] = None,
+                  concession_state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Generate every party's offer on every issue for one round in a single call.
+
+    preferences: { party_id: { issue_id: { weight, reservation_value, target_value, current_value } } }
+    concession_state: as for propose_offer; patterns are then per (party, issue) and
+        concession_update carries back the slots of every pair in the round
+    Offers match propose_offer's; the offer history is scanned once for all parties.
+    """
+    logger.info("Starting round proposal", parties=len(parties), issues=len(issues), round_number=round_number)
+
+    try:
+        weight, reservation, target, current = preference_arrays(parties, issues, preferences)
+
+        names = [party.get('name', 'Unknown Party') for party in parties]
+        party_ids = [party.get('id') for party in parties]
+        issue_ids = [issue.get('id') for issue in issues]
+        state = ConcessionState.from_dict(concession_state) if concession_state is not None else None
+        if state is not None:
+            patterns = state.pattern_codes(party_ids, issue_ids)
+        else:
+            patterns, _, _ = concession_patterns(previous_offers, names)
+        strategies = select_strategies(round_number, weight, patterns)
+        values = proposed_values(current, target, reservation, strategies, weight)
+        confidence = confidences(weight, round_number)
+        flex = flexibility(weight, round_number)
+
+        offers = []
+        for p, party in enumerate(parties):
+            for i, issue in enumerate(issues):
+                strategy = STRATEGIES[strategies[p, i]]
+                proposed_value = float(values[p, i])
+                offers.append({
+                    "party_id": party.get('id'),
+                    "issue_id": issue.get('id'),
+                    "round_number": round_number,
+                    "proposed_value": proposed_value,
+                    "strategy": strategy,
+                    "rationale": _generate_offer_rationale(
+                        names[p], issue.get('title', 'Unknown Issue'), proposed_value, float(current[p, i]),
+                        strategy, round_number, float(weight[p, i]), issue.get('type', 'distributive')),
+                    "confidence": float(confidence[p, i]),
+                    "flexibility": FLEXIBILITY[flex[p, i]],
+                    "timestamp": "2024-12-19T15:45:00Z"  # TODO: Use actual timestamp
+                })
+
+        logger.info("Round proposal completed", round_number=round_number, offers=len(offers))
+        result = {
+            "status": "success",
+            "round_number": round_number,
+            "offers": offers,
+        }
+        if state is not None:
+            for offer in offers:
+                state.record(offer['party_id'], offer['issue_id'], offer['proposed_value'])
+            pairs = [(offer['party_id'], offer['issue_id']) for offer in offers]
+            result["concession_update"] = state.slots(pairs).to_dict()
+        else:
+            result["patterns"] = {pid: PATTERNS[patterns[p]] for p, pid in enumerate(party_ids)}
+        return result
+
+    except Exception as e:
+        logger.error("Round proposal failed", round_number=round_number, error=str(e))
+        return {
+            "status": "failed",
+            "error": str(e),
+            "round_number": round_number
+        }
+
 def _analyze_concession_pattern(previous_offers: List[Dict[str, Any]], party_name: str) -> Dict[str, Any]:
     """Analyze previous offers to understand concession patterns"""
     if not previous_offers:
@@ -1,9 +1,27 @@
 from celery import shared_task
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Sequence
 import structlog
 
+from ..config import settings
+from ..engine.cache import MemoCache, content_key
+
 logger = structlog.get_logger()
 
+POSITION_TYPES = ('public', 'private')
+
+_cache: Optional[MemoCache] = None
+
+def get_brief_cache() -> MemoCache:
+    """Process-wide brief memo, with a Redis tier when BRIEF_CACHE_REDIS_URL is set"""
+    global _cache
+    if _cache is None:
+        redis_client = None
+        if settings.BRIEF_CACHE_REDIS_URL:
+            import redis
+            redis_client = redis.Redis.from_url(settings.BRIEF_CACHE_REDIS_URL)
+        _cache = MemoCache(settings.BRIEF_CACHE_SIZE, redis_client, settings.BRIEF_CACHE_TTL)
+    return _cache
+
 @shared_task
 def draft_position(party_data: Dict[str, Any], issue_data: Dict[str, Any], 
                   preference_data: Dict[str, Any], position_type: str = 'public') -> Dict[str, Any]:
@@ -14,42 +32,7 @@ def draft_position(party_data: Dict[str, Any], issue_data: Dict[str, Any],
                position_type=position_type)
     
     try:
-        # Extract key information
-        party_name = party_data.get('name', 'Unknown Party')
-        party_type = party_data.get('type', 'organization')
-        party_country = party_data.get('country')
-        party_org = party_data.get('organization')
-        
-        issue_title = issue_data.get('title', 'Unknown Issue')
-        issue_description = issue_data.get('description', '')
-        issue_type = issue_data.get('type', 'distributive')
-        
-        weight = preference_data.get('weight', 0)
-        reservation_value = preference_data.get('reservationValue', 0)
-        target_value = preference_data.get('targetValue', 100)
-        batna = preference_data.get('batna', '')
-        
-        # Generate position based on type
-        if position_type == 'public':
-            position = _generate_public_position(
-                party_name, party_type, party_country, party_org,
-                issue_title, issue_description, issue_type,
-                weight, reservation_value, target_value, batna
-            )
-        else:  # private
-            position = _generate_private_position(
-                party_name, party_type, party_country, party_org,
-                issue_title, issue_description, issue_type,
-                weight, reservation_value, target_value, batna
-            )
-        
-        result = {
-            "status": "completed",
-            "position_type": position_type,
-            "party_id": party_data.get('id'),
-            "issue_id": issue_data.get('id'),
-            "position": position
-        }
+        result = _draft_brief(party_data, issue_data, preference_data, position_type)
         
         logger.info("Position drafting completed", 
                    party_id=party_data.get('id'),
@@ -69,6 +52,104 @@ def draft_position(party_data: Dict[str, Any], issue_data: Dict[str, Any],
             "issue_id": issue_data.get('id')
         }
 
+@shared_task
+def draft_positions(parties: List[Dict[str, Any]], issues: List[Dict[str, Any]],
+                    preferences: Dict[str, Dict[str, Dict[str, Any]]],
+                    position_types: Sequence[str] = POSITION_TYPES, use_cache: bool = True) -> Dict[str, Any]:
+    """Draft every party x issue x position type brief for a negotiation in one call.
+
+    preferences: { party_id: { issue_id: preference_data } } as for draft_position
+    use_cache: reuse briefs whose inputs are unchanged, so re-drafting after an
+        edit only regenerates the affected briefs
+    """
+    logger.info("Starting batch position drafting", parties=len(parties), issues=len(issues))
+
+    try:
+        cache = get_brief_cache() if use_cache else None
+        briefs = []
+        reused = 0
+        for party in parties:
+            party_prefs = preferences.get(party.get('id'), {}) or {}
+            for issue in issues:
+                preference = party_prefs.get(issue.get('id'), {}) or {}
+                for position_type in position_types:
+                    key = _brief_key(party, issue, preference, position_type) if cache else None
+                    brief = cache.get(key) if cache else None
+                    if brief is None:
+                        brief = _draft_brief(party, issue, preference, position_type)
+                        if cache:
+                            cache.set(key, brief)
+                    else:
+                        reused += 1
+                    briefs.append(brief)
+
+        logger.info("Batch position drafting completed", briefs=len(briefs), reused=reused)
+        return {
+            "status": "completed",
+            "briefs": briefs,
+            "drafted": len(briefs) - reused,
+            "reused": reused
+        }
+
+    except Exception as e:
+        logger.error("Batch position drafting failed", error=str(e))
+        return {
+            "status": "failed",
+            "error": str(e)
+        }
+
+def _draft_brief(party_data: Dict[str, Any], issue_data: Dict[str, Any],
+                 preference_data: Dict[str, Any], position_type: str) -> Dict[str, Any]:
+    """Pure brief generation shared by draft_position and draft_positions"""
+    # Extract key information
+    party_name = party_data.get('name', 'Unknown Party')
+    party_type = party_data.get('type', 'organization')
+    party_country = party_data.get('country')
+    party_org = party_data.get('organization')
+    
+    issue_title = issue_data.get('title', 'Unknown Issue')
+    issue_description = issue_data.get('description', '')
+    issue_type = issue_data.get('type', 'distributive')
+    
+    weight = preference_data.get('weight', 0)
+    reservation_value = preference_data.get('reservationValue', 0)
+    target_value = preference_data.get('targetValue', 100)
+    batna = preference_data.get('batna', '')
+    
+    # Generate position based on type
+    if position_type == 'public':
+        position = _generate_public_position(
+            party_name, party_type, party_country, party_org,
+            issue_title, issue_description, issue_type,
+            weight, reservation_value, target_value, batna
+        )
+    else:  # private
+        position = _generate_private_position(
+            party_name, party_type, party_country, party_org,
+            issue_title, issue_description, issue_type,
+            weight, reservation_value, target_value, batna
+        )
+    
+    return {
+        "status": "completed",
+        "position_type": position_type,
+        "party_id": party_data.get('id'),
+        "issue_id": issue_data.get('id'),
+        "position": position
+    }
+
+def _brief_key(party_data: Dict[str, Any], issue_data: Dict[str, Any],
+               preference_data: Dict[str, Any], position_type: str) -> str:
+    """Content hash of exactly the fields _draft_brief reads"""
+    return content_key(
+        'position',
+        [party_data.get(k) for k in ('id', 'name', 'type', 'country', 'organization')],
+        [issue_data.get(k) for k in ('id', 'title', 'description', 'type')],
+        [preference_data.get(k) for k in ('weight', 'reservationValue', 'targetValue', 'batna')],
+        position_type,
+        namespace='brief'
+    )
+
 def _generate_public_position(party_name: str, party_type: str, party_country: str, party_org: str,
                             issue_title: str, issue_description: str, issue_type: str,
                             weight: float, reservation_value: float, target_value: float, batna: str) -> Dict[str, Any]:
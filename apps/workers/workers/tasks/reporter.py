@@ -2,9 +2,14 @@ from celery import shared_task
 from typing import Dict, Any
 import structlog
 import json
+from itertools import islice
+
+from ..engine.columnar import frontier_size, iter_points
 
 logger = structlog.get_logger()
 
+MAX_REPORTED_POINTS = 10
+
 @shared_task
 def render_report(package: Dict[str, Any], format: str = 'md') -> Dict[str, Any]:
     """Render a package into the requested format (md, pdf, csv, json)."""
@@ -26,6 +31,15 @@ def render_report(package: Dict[str, Any], format: str = 'md') -> Dict[str, Any]
             for o in package.get('selected_offers', []):
                 lines.append(f"- Issue {o.get('issue_id')}: {o.get('proposed_value')} (conf {int((o.get('confidence') or 0)*100)}%)")
             lines.append('')
+            pareto = package.get('pareto_frontier') or []
+            size = frontier_size(pareto)
+            if size:
+                lines.append(f"## Pareto Frontier (top {min(MAX_REPORTED_POINTS, size)} of {size})")
+                for point in islice(iter_points(pareto), MAX_REPORTED_POINTS):
+                    values = ', '.join(f"{k}={v:g}" for k, v in point['values'].items())
+                    utils = ', '.join(f"{k}: {v:.2f}" for k, v in point['party_utils'].items())
+                    lines.append(f"- {values} ({utils})")
+                lines.append('')
             lines.append('## Risk Notes')
             for r in package.get('risk_notes', []):
                 lines.append(f"- {r.get('issue_id')}: {r.get('note')} ({int((r.get('expected_impact') or 0)*100)}%)")
@@ -1,11 +1,39 @@
-from celery import shared_task
-from typing import Dict, Any, List
+from celery import chord, shared_task
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 import structlog
+import numpy as np
+
+from ..config import settings
+from ..engine.risk import (DEFAULT_ALPHAS, DEFAULT_CHUNK, PERCENTILES, Scenarios, chunk_count,
+                           correlation_factor, expected_impacts, impact_summary, marginal_params,
+                           marginal_quantiles, merge_risk_states, risk_model, risk_state_from_lists,
+                           scenario_arrays, simulate_risk_chunks, summarize_risk)
+from ..engine.risk_tree import RiskTree
+from ..engine.utility import weight_matrix
+from ..transactions import run_watched
 
 logger = structlog.get_logger()
 
+BREAKDOWNS = ('auto', 'full', 'summary', 'none')
+TREE_EDITS = ('add', 'remove', 'set_probability', 'set_impacts')
+# With breakdown='auto', larger scenario sets get the summary instead of per-scenario lists
+FULL_BREAKDOWN_LIMIT = 1000
+
+_redis = None
+
+def get_risk_redis():
+    """Process-wide client for settings.REDIS_URL, where live risk trees are kept."""
+    global _redis
+    if _redis is None:
+        import redis
+        _redis = redis.Redis.from_url(settings.REDIS_URL)
+    return _redis
+
+def risk_tree_key(negotiation_id: str) -> str:
+    return f"neg:{negotiation_id}:risk:tree"
+
 @shared_task
-def build_risk_tree(issues: List[Dict[str, Any]], scenarios: List[Dict[str, Any]]) -> Dict[str, Any]:
+def build_risk_tree(issues: List[Dict[str, Any]], scenarios: Scenarios, breakdown: str = 'auto') -> Dict[str, Any]:
     """Build risk tree and compute expected outcomes per issue.
 
     issues: [{ id, title }]
@@ -16,36 +44,268 @@ def build_risk_tree(issues: List[Dict[str, Any]], scenarios: List[Dict[str, Any]
         "impacts": { issue_id: impact_on_utility in [-1,1] }
       }
     ]
+    or columnar { names, probabilities: [S], impacts: [[I] * S] } (impacts in issue order)
+    breakdown: 'full' (per-scenario impacts per issue) | 'summary' (per-issue std, range,
+        downside probability, worst scenario) | 'none' | 'auto' (full up to
+        FULL_BREAKDOWN_LIMIT scenarios, summary beyond)
     Returns expected utilities adjustments and per-scenario impacts.
     """
-    logger.info("Building risk tree", issues=len(issues), scenarios=len(scenarios))
+    n_scenarios = len(scenarios.get('probabilities') or []) if isinstance(scenarios, dict) else len(scenarios)
+    logger.info("Building risk tree", issues=len(issues), scenarios=n_scenarios)
     try:
-        # Normalize probabilities
-        total_p = sum(max(0.0, float(s.get('probability', 0.0))) for s in scenarios) or 1.0
-        normalized = []
-        for s in scenarios:
-            p = max(0.0, float(s.get('probability', 0.0))) / total_p
-            normalized.append({ **s, 'probability': p })
-
-        # Expected impact per issue
-        results = []
-        for issue in issues:
-            iid = issue['id']
-            exp_impact = 0.0
-            per_scenario = []
-            for s in normalized:
-                impact = float(s.get('impacts', {}).get(iid, 0.0))
-                p = float(s['probability'])
-                exp_impact += p * impact
-                per_scenario.append({ 'scenario': s.get('name', 'scenario'), 'probability': p, 'impact': impact })
-            results.append({
-                'issue_id': iid,
-                'expected_impact': exp_impact,
-                'scenarios': per_scenario
-            })
-
-        overall_risk_index = sum(abs(r['expected_impact']) for r in results) / max(1, len(results))
-        return { 'status': 'success', 'issues': results, 'overall_risk_index': overall_risk_index }
+        if breakdown not in BREAKDOWNS:
+            raise ValueError(f"Unknown breakdown: {breakdown}")
+        if breakdown == 'auto':
+            breakdown = 'full' if n_scenarios <= FULL_BREAKDOWN_LIMIT else 'summary'
+
+        issue_ids = [issue['id'] for issue in issues]
+        impacts, probabilities, names = scenario_arrays(issue_ids, scenarios)
+        expected = expected_impacts(impacts, probabilities)
+
+        results = [{ 'issue_id': iid, 'expected_impact': float(expected[i]) } for i, iid in enumerate(issue_ids)]
+        if breakdown == 'full':
+            probs = probabilities.tolist()
+            for i, result in enumerate(results):
+                result['scenarios'] = [{ 'scenario': name, 'probability': p, 'impact': impact }
+                                       for name, p, impact in zip(names, probs, impacts[:, i].tolist())]
+        elif breakdown == 'summary':
+            for result, summary in zip(results, impact_summary(impacts, probabilities, names, expected)):
+                result['summary'] = summary
+
+        overall_risk_index = float(np.abs(expected).sum() / max(1, len(results)))
+        return { 'status': 'success', 'issues': results, 'overall_risk_index': overall_risk_index,
+                 'scenario_count': n_scenarios, 'breakdown': breakdown }
     except Exception as e:
         logger.error("Risk tree build failed", error=str(e))
         return { 'status': 'failed', 'error': str(e) }
+
+
+@shared_task(bind=True)
+def simulate_risk_outcomes(self, issues: List[Dict[str, Any]], distributions: Dict[str, Dict[str, Any]],
+                           correlation: Optional[List[List[float]]] = None,
+                           utilities: Optional[Dict[str, Dict[str, float]]] = None,
+                           baseline: Optional[Dict[str, float]] = None,
+                           batna: Optional[Dict[str, float]] = None,
+                           draws: int = 1_000_000, seed: int = 0, chunk_size: int = DEFAULT_CHUNK,
+                           processes: Optional[int] = 1,
+                           alphas: Sequence[float] = DEFAULT_ALPHAS, shards: int = 1) -> Dict[str, Any]:
+    """Monte Carlo risk simulation with correlated issue impacts.
+
+    issues: [{ id, title }]
+    distributions: { issue_id: { type: normal|uniform|triangular|fixed, mean, sd | low, high, mode | value } }
+    correlation: (issues x issues) correlation matrix in issue order (default independent)
+    utilities: { party_id: { issue_id: weight } }; impacts move each party's joint
+        utility by its normalized weights
+    baseline: { party_id: joint utility before impacts } (default 0)
+    batna: { party_id: utility of the party's BATNA }
+    draws, seed, chunk_size: sample count, RNG seed and draws per vectorized chunk
+    processes: local worker processes for an inline run; keep 1 under a Celery
+        prefork worker, which cannot start child processes
+    shards: split the chunks into this many simulate_risk_shard sub-tasks, merged
+        by merge_risk_shards; results depend only on seed (moments up to float rounding)
+    alphas: confidence levels for VaR / CVaR, reported as positive losses from the
+        no-impact outcome (0 for total impact, the baseline for parties)
+    Returns per-issue percentile bands, total-impact tail metrics, and per-party
+    joint utility bands, tail metrics and probability of falling below BATNA.
+    """
+    logger.info("Simulating risk outcomes", issues=len(issues), draws=draws, shards=shards)
+    inputs = (issues, distributions, correlation, utilities, baseline, batna, draws, alphas)
+    try:
+        built = _risk_model(*inputs)
+        n_chunks = chunk_count(draws, chunk_size)
+        ranges = _chunk_ranges(n_chunks, shards) if shards > 1 else []
+        if len(ranges) <= 1:
+            state = simulate_risk_chunks(built[0], draws, seed, chunk_size, processes=processes)
+            return _simulation_result(built, issues, distributions, batna, draws, alphas, state, seed)
+
+        if self.request.called_directly:
+            # No worker to fan out to: run the shards in-process through the same merge
+            parts = [simulate_risk_shard(*inputs, seed, chunk_size, lo, hi) for lo, hi in ranges]
+            return merge_risk_shards(parts, *inputs, seed)
+    except Exception as e:
+        logger.error("Risk simulation failed", error=str(e))
+        return { 'status': 'failed', 'error': str(e) }
+
+    # Replace this task with the chord so callers' AsyncResult receives the merged result
+    logger.info("Dispatching risk simulation shards", shards=len(ranges), draws=draws)
+    header = [simulate_risk_shard.s(*inputs, seed, chunk_size, lo, hi) for lo, hi in ranges]
+    return self.replace(chord(header, merge_risk_shards.s(*inputs, seed)))
+
+
+@shared_task
+def simulate_risk_shard(issues: List[Dict[str, Any]], distributions: Dict[str, Dict[str, Any]],
+                        correlation: Optional[List[List[float]]], utilities: Optional[Dict[str, Dict[str, float]]],
+                        baseline: Optional[Dict[str, float]], batna: Optional[Dict[str, float]], draws: int,
+                        alphas: Sequence[float], seed: int, chunk_size: int, start: int, stop: int) -> Dict[str, Any]:
+    """Simulate chunks [start, stop) of the seeded draw; returns the fixed-size state for merge_risk_shards."""
+    model, _, _ = _risk_model(issues, distributions, correlation, utilities, baseline, batna, draws, alphas)
+    state = simulate_risk_chunks(model, draws, seed, chunk_size, chunk_range=(start, stop))
+    logger.info("Risk simulation shard completed", start=start, stop=stop)
+    return {key: value.tolist() for key, value in state.items()}
+
+
+@shared_task
+def merge_risk_shards(shard_results: List[Dict[str, Any]], issues: List[Dict[str, Any]],
+                      distributions: Dict[str, Dict[str, Any]], correlation: Optional[List[List[float]]],
+                      utilities: Optional[Dict[str, Dict[str, float]]], baseline: Optional[Dict[str, float]],
+                      batna: Optional[Dict[str, float]], draws: int, alphas: Sequence[float],
+                      seed: int) -> Dict[str, Any]:
+    """Chord callback: fold the shards' histograms and moments into one summary."""
+    try:
+        built = _risk_model(issues, distributions, correlation, utilities, baseline, batna, draws, alphas)
+        n_series = 1 + len(built[1])
+        state = merge_risk_states([risk_state_from_lists(part, n_series) for part in shard_results])
+        result = _simulation_result(built, issues, distributions, batna, draws, alphas, state, seed)
+        result['shards'] = len(shard_results)
+        return result
+    except Exception as e:
+        logger.error("Risk simulation merge failed", error=str(e))
+        return { 'status': 'failed', 'error': str(e) }
+
+
+def _risk_model(issues, distributions, correlation, utilities, baseline, batna, draws, alphas):
+    """(engine model, party ids, BATNA floors) from the task inputs, validated."""
+    if draws < 1:
+        raise ValueError("draws must be positive")
+    if any(not 0.0 < alpha < 1.0 for alpha in alphas):
+        raise ValueError("alphas must lie strictly between 0 and 1")
+    utilities = utilities or {}
+    baseline = baseline or {}
+    batna = batna or {}
+    issue_ids = [issue['id'] for issue in issues]
+    party_ids = list(utilities.keys())
+    kinds, params = marginal_params(issue_ids, distributions)
+    factor = correlation_factor(correlation, len(issue_ids))
+    weights = weight_matrix(issues, utilities, party_ids)
+    base = np.array([float(baseline.get(pid, 0.0)) for pid in party_ids])
+    floors = np.array([float(batna.get(pid, -np.inf)) for pid in party_ids])
+    return risk_model(kinds, params, factor, weights, base, floors, draws, alphas), party_ids, floors
+
+
+def _chunk_ranges(n_chunks: int, shards: int) -> List[Tuple[int, int]]:
+    bounds = np.linspace(0, n_chunks, max(1, min(shards, n_chunks)) + 1).round().astype(int)
+    return [(int(lo), int(hi)) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+
+
+def _simulation_result(built: Tuple, issues, distributions, batna, draws, alphas,
+                       state: Dict[str, np.ndarray], seed: int) -> Dict[str, Any]:
+    """Task result from the merged state; ``built`` is the (model, party ids, floors) from _risk_model."""
+    model, party_ids, floors = built
+    batna = batna or {}
+    kinds, params = model[0], model[1]
+    sim = summarize_risk(model, state, draws, alphas)
+    bands = marginal_quantiles(kinds, params, [q / 100.0 for q in PERCENTILES])
+
+    def series(s: int) -> Dict[str, Any]:
+        return {
+            'mean': float(sim['mean'][s]),
+            'std': float(sim['std'][s]),
+            'percentiles': dict(zip((f'p{q}' for q in PERCENTILES), sim['percentiles'][s].tolist())),
+            'var': { str(alpha): float(sim['var'][a, s]) for a, alpha in enumerate(alphas) },
+            'cvar': { str(alpha): float(sim['cvar'][a, s]) for a, alpha in enumerate(alphas) },
+        }
+
+    results = [{ 'issue_id': issue['id'], 'distribution': distributions.get(issue['id'], { 'type': 'fixed', 'value': 0.0 }),
+                 'percentiles': dict(zip((f'p{q}' for q in PERCENTILES), bands[:, i].tolist())) }
+               for i, issue in enumerate(issues)]
+    parties = []
+    for p, pid in enumerate(party_ids):
+        party = { 'party_id': pid, **series(p + 1) }
+        if pid in batna:
+            party['batna'] = float(floors[p])
+            party['probability_below_batna'] = float(sim['below_batna'][p])
+        parties.append(party)
+    return { 'status': 'success', 'issues': results, 'total_impact': series(0), 'parties': parties,
+             'draws': draws, 'seed': seed }
+
+
+@shared_task
+def evaluate_risk_tree(issues: List[Dict[str, Any]], tree: Optional[Dict[str, Any]] = None,
+                       edits: Optional[List[Dict[str, Any]]] = None,
+                       weights: Optional[Dict[str, float]] = None,
+                       negotiation_id: Optional[str] = None) -> Dict[str, Any]:
+    """Evaluate a decision/chance risk tree, applying edits incrementally.
+
+    issues: [{ id, title }]
+    tree: serialized tree { nodes: [{ id, parent_id, kind: decision|chance|terminal, name,
+        probability, impacts: { issue_id: impact } }] } in parent-before-child order,
+        as returned in 'tree' by an earlier call
+    edits: [{ op: add|remove|set_probability|set_impacts, node_id, ... }] applied in order;
+        add takes kind, parent_id, probability, impacts, name
+    weights: { issue_id: weight } scoring decision alternatives (default 1 per issue)
+    negotiation_id: keep the tree in Redis at neg:{id}:risk:tree. With a tree given it
+        is (re)stored there; without one the stored tree is used, and only the edited
+        nodes' paths are loaded and written back, so an edit costs O(depth x branching)
+        rather than O(tree). The stored issues and weights then apply. The load and
+        write-back run as one WATCH / MULTI transaction, retried when another edit
+        to the same tree commits in between.
+    Returns root expected impacts per issue, the decision policy, the nodes whose
+    expected values changed under the edits, and the updated serialized tree (when
+    one was given). For a stored tree the policy covers the loaded decision nodes.
+    """
+    edits = edits or []
+    nodes = len(tree.get('nodes') or []) if tree is not None else None
+    logger.info("Evaluating risk tree", negotiation_id=negotiation_id, issues=len(issues), nodes=nodes,
+                edits=len(edits))
+    try:
+        if tree is not None:
+            issue_ids = [issue['id'] for issue in issues]
+            weights = weights or {}
+            risk_tree = RiskTree.from_dict({ 'issue_ids': issue_ids,
+                                             'weights': [float(weights.get(iid, 1.0)) for iid in issue_ids],
+                                             'nodes': tree.get('nodes') or [] })
+            changed = _apply_tree_edits(risk_tree, edits)
+            if negotiation_id is not None:
+                risk_tree.save(get_risk_redis(), risk_tree_key(negotiation_id), settings.RISK_TREE_TTL, replace=True)
+        elif negotiation_id is not None:
+            key = risk_tree_key(negotiation_id)
+            touched = [edit.get('node_id') for edit in edits] + [edit.get('parent_id') for edit in edits]
+            removed = [edit.get('node_id') for edit in edits if edit.get('op') == 'remove']
+
+            def update(pipe):
+                stored = RiskTree.load(pipe, key, touched, removed)
+                if stored is None:
+                    raise ValueError(f"No risk tree for negotiation {negotiation_id}; pass tree to store one")
+                edited = _apply_tree_edits(stored, edits)
+                pipe.multi()
+                stored.write(pipe, key, settings.RISK_TREE_TTL)
+                return stored, edited
+
+            risk_tree, changed = run_watched(get_risk_redis(), [key, f"{key}:meta"], update)
+            issue_ids = risk_tree.issue_ids
+        else:
+            raise ValueError("Pass a tree or the negotiation_id of a stored one")
+
+        expected = risk_tree.expected()
+        results = [{ 'issue_id': iid, 'expected_impact': expected[iid] } for iid in issue_ids]
+        outcomes = [{ 'node_id': node_id, 'expected': risk_tree.expected(node_id), 'score': risk_tree.score(node_id) }
+                    for node_id in dict.fromkeys(changed) if node_id in risk_tree.nodes]
+        overall_risk_index = float(sum(abs(v) for v in expected.values()) / max(1, len(results)))
+        result = { 'status': 'success', 'issues': results, 'overall_risk_index': overall_risk_index,
+                   'policy': risk_tree.policy(), 'changed': outcomes }
+        if tree is not None:
+            result['tree'] = { 'nodes': risk_tree.to_dict()['nodes'] }
+        return result
+    except Exception as e:
+        logger.error("Risk tree evaluation failed", error=str(e))
+        return { 'status': 'failed', 'error': str(e) }
+
+
+def _apply_tree_edits(risk_tree: RiskTree, edits: List[Dict[str, Any]]) -> List[str]:
+    """Apply edits in order; returns the ids of nodes whose expected values changed."""
+    changed: List[str] = []
+    for edit in edits:
+        op = edit.get('op')
+        if op not in TREE_EDITS:
+            raise ValueError(f"Unknown risk tree edit: {op}")
+        node_id = edit['node_id']
+        if op == 'add':
+            changed += risk_tree.add_node(node_id, edit['kind'], edit.get('parent_id'),
+                                          edit.get('probability', 1.0), edit.get('impacts'), edit.get('name'))
+        elif op == 'remove':
+            changed += risk_tree.remove_node(node_id)
+        elif op == 'set_probability':
+            changed += risk_tree.set_probability(node_id, edit['probability'])
+        else:
+            changed += risk_tree.set_impacts(node_id, edit['impacts'])
+    return changed
@@ -1,20 +1,55 @@
 from celery import shared_task
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import structlog
 
+from ..config import settings
+from ..progress import ProgressPublisher, zopa_channel
+from ..engine.zopa import analyze_joint_zopa
+from ..engine.zopa_index import ZopaIndex
+from ..transactions import run_watched
+
 logger = structlog.get_logger()
 
+ZOPA_MODES = ('per_issue', 'joint', 'both')
+
+_redis = None
+
+def get_zopa_redis():
+    """Process-wide client for settings.REDIS_URL, where live ZOPA indexes are kept."""
+    global _redis
+    if _redis is None:
+        import redis
+        _redis = redis.Redis.from_url(settings.REDIS_URL)
+    return _redis
+
+def zopa_index_key(negotiation_id: str) -> str:
+    return f"neg:{negotiation_id}:zopa:index"
+
 @shared_task
-def check_zopa(issues: List[Dict[str, Any]], reservations: Dict[str, Dict[str, float]], targets: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+def check_zopa(issues: List[Dict[str, Any]], reservations: Dict[str, Dict[str, float]], targets: Dict[str, Dict[str, float]],
+               mode: str = 'per_issue', weights: Optional[Dict[str, Dict[str, float]]] = None,
+               reservation_utilities: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
     """Check ZOPA intervals per issue across all parties.
 
     issues: [{ id, minValue, maxValue }]
     reservations: { party_id: { issue_id: reservation_value } }
     targets: { party_id: { issue_id: target_value } }
-    Returns per-issue ZOPA intervals if exist: intersection of acceptable ranges.
+    mode: 'per_issue' | 'joint' (one LP over whole packages, allowing trade-offs
+        across issues; see workers.engine.zopa) | 'both'
+    weights: { party_id: { issue_id: weight } } for the joint package utilities (default equal)
+    reservation_utilities: { party_id: minimum joint package utility } (default 0)
+    Returns per-issue ZOPA intervals if exist: intersection of acceptable ranges,
+    and under 'joint' whether any package is acceptable to all, with a witness
+    package, the Chebyshev center and the binding constraints.
     """
-    logger.info("Checking ZOPA", issues=len(issues))
+    logger.info("Checking ZOPA", issues=len(issues), mode=mode)
     try:
+        if mode not in ZOPA_MODES:
+            raise ValueError(f"Unknown ZOPA mode: {mode}")
+        if mode == 'joint':
+            joint = analyze_joint_zopa(issues, reservations, targets, weights, reservation_utilities)
+            return { 'status': 'success', 'joint': joint, 'joint_zopa_exists': joint['feasible'] }
+
         issue_results = []
         for issue in issues:
             iid = issue['id']
@@ -42,7 +77,69 @@ def check_zopa(issues: List[Dict[str, Any]], reservations: Dict[str, Dict[str, f
             })
 
         overall = all(item['has_zopa'] for item in issue_results) if issue_results else False
-        return { 'status': 'success', 'issues': issue_results, 'all_issues_have_zopa': overall }
+        result = { 'status': 'success', 'issues': issue_results, 'all_issues_have_zopa': overall }
+        if mode == 'both':
+            result['joint'] = analyze_joint_zopa(issues, reservations, targets, weights, reservation_utilities)
+            result['joint_zopa_exists'] = result['joint']['feasible']
+        return result
     except Exception as e:
         logger.error("ZOPA check failed", error=str(e))
         return { 'status': 'failed', 'error': str(e) }
+
+@shared_task
+def update_zopa_index(negotiation_id: str, updates: List[Dict[str, Any]],
+                      issues: Optional[List[Dict[str, Any]]] = None,
+                      reservations: Optional[Dict[str, Dict[str, float]]] = None,
+                      targets: Optional[Dict[str, Dict[str, float]]] = None,
+                      publish: bool = True) -> Dict[str, Any]:
+    """Apply streaming reservation/target edits to the negotiation's live ZOPA index.
+
+    updates: [{ party_id, issue_id, reservation?, target? }] or [{ party_id, remove: true }]
+    issues, reservations, targets: as for check_zopa; when issues are given the index is
+        (re)built from them, otherwise the stored index is edited in one WATCH / MULTI
+        transaction touching only the updated issues (all of them when a party joins or leaves)
+    publish: push the deltas to neg:{id}:zopa
+    Returns only the issues whose ZOPA status or interval changed, each
+    { issue_id, has_zopa, interval }, plus whether every issue still has a ZOPA;
+    a (re)build also returns every issue as check_zopa does.
+    """
+    logger.info("Updating ZOPA index", negotiation_id=negotiation_id, updates=len(updates))
+    try:
+        client = get_zopa_redis()
+        key = zopa_index_key(negotiation_id)
+        if issues is not None:
+            index = ZopaIndex.build(issues, reservations or {}, targets or {})
+            before = dict(index.zopa)
+            changed: Dict[str, Dict[str, Any]] = {}
+            for update in updates:
+                if update.get('remove'):
+                    deltas = index.remove_party(update['party_id'])
+                else:
+                    deltas = index.update(update['party_id'], update['issue_id'],
+                                          update.get('reservation'), update.get('target'))
+                for delta in deltas:
+                    changed[delta['issue_id']] = delta
+            # An issue that changed and changed back within the batch is not a delta
+            deltas = [delta for iid, delta in changed.items() if index.interval(iid) != before[iid]]
+            index.save(client, key, settings.ZOPA_INDEX_TTL)
+            issue_count = len(index.issues)
+        else:
+            def update(pipe):
+                applied = ZopaIndex.apply(pipe, key, updates, settings.ZOPA_INDEX_TTL)
+                if applied is None:
+                    raise ValueError(f"No ZOPA index for negotiation {negotiation_id}; pass issues to build one")
+                return applied
+
+            # Only the updated issues are read and written, unless a party joins or leaves
+            deltas, issue_count = run_watched(client, [f"{key}:meta", f"{key}:parties"], update)
+        all_have_zopa = ZopaIndex.open_issues(client, key) == 0 if issue_count else False
+        result = { 'status': 'success', 'deltas': deltas, 'all_issues_have_zopa': all_have_zopa }
+        if issues is not None:
+            result['issues'] = index.snapshot()['issues']
+        if publish and deltas:
+            ProgressPublisher(zopa_channel(negotiation_id), min_interval=0.0, redis_client=client).publish(
+                { 'type': 'zopa_delta', 'deltas': deltas, 'all_issues_have_zopa': all_have_zopa }, force=True)
+        return result
+    except Exception as e:
+        logger.error("ZOPA index update failed", negotiation_id=negotiation_id, error=str(e))
+        return { 'status': 'failed', 'error': str(e) }
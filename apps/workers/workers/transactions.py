@@ -0,0 +1,35 @@
+"""Optimistic Redis transactions: WATCH the keys, read, then MULTI / EXEC.
+
+Read-modify-write updates of shared per-negotiation state (stored risk trees,
+the ZOPA index) run through :func:`run_watched`. If another worker writes a
+watched key between the reads and EXEC, EXEC is refused and the update is
+re-run on fresh data, so concurrent tasks never overwrite each other's sums.
+"""
+from typing import Any, Callable, Sequence
+import structlog
+
+logger = structlog.get_logger()
+
+MAX_WATCH_RETRIES = 32
+
+
+def run_watched(redis_client, keys: Sequence[str], update: Callable[[Any], Any],
+                retries: int = MAX_WATCH_RETRIES) -> Any:
+    """Run ``update(pipe)`` under WATCH on ``keys`` until its transaction commits.
+
+    update: reads through ``pipe`` (immediate while watching), calls
+        ``pipe.multi()`` and queues its writes; may run more than once, so it
+        must not have side effects outside Redis
+    Returns update's return value from the attempt that committed.
+    """
+    from redis.exceptions import WatchError
+    with redis_client.pipeline() as pipe:
+        for attempt in range(1, retries + 1):
+            try:
+                pipe.watch(*keys)
+                result = update(pipe)
+                pipe.execute()
+                return result
+            except WatchError:
+                logger.info("Redis transaction conflict, retrying", key=keys[0], attempt=attempt)
+    raise RuntimeError(f"Gave up on {keys[0]} after {retries} conflicting writes")